@@ -1,6 +1,8 @@
+import numpy as np
 import duo.core.photoatomic_xs as xs
 import duo.core.constant as constant
 import duo.core.search_interp as si
+import duo.core.duo_exception as de
 
 #------------------------------------------------------------
 #------------------------------------------------------------
@@ -8,10 +10,18 @@ class Element:
     """Class that manages element-specific data.
 
     :ivar float AWR: atomic weight ratio relative to neutron
-    :ivar dictionary xsTable: Each (key, value) pair is (process_id, a list of :class:`.PhotoAtomicXS`).
+    :ivar dictionary xsTable: Each (key, value) pair is (process_id, :class:`.PhotoAtomicXSArray`).
+    :ivar dictionary reactionIndex: Each (key, value) pair is (category, {process_id: :class:`.PhotoAtomicXSArray`}),
+        where category is one of :attr:`reactionCategoryList`. Built by :meth:`BuildReactionIndex` at load time.
+    :ivar dictionary unifiedXSTable: Sums of partial cross-sections ("total", "pe", "cs", "rl" and "pp")
+        tabulated on the union of the energy grids of all partials, as :class:`.PhotoAtomicXSArray`.
+        Built by :meth:`BuildUnifiedGrid` on first use.
 
     """
 
+    # photoelectric, incoherent (Compton), coherent (Rayleigh) and pair production
+    reactionCategoryList = ["pe", "cs", "rl", "pp"]
+
     #------------------------------------------------------------
     #------------------------------------------------------------
     def __init__(self, Z = 0):
@@ -21,6 +31,8 @@ class Element:
         self.AWR = 0.0
 
         self.xsTable = {}
+        self.reactionIndex = None
+        self.unifiedXSTable = None
 
     #------------------------------------------------------------
     #------------------------------------------------------------
@@ -43,6 +55,114 @@ class Element:
             result = "    xs name: {0:30s} number of data: {1:d}".format(key, len(value))
             print(result)
 
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def BuildReactionIndex(self):
+        """Classify every reaction of ``xsTable`` except "total_ref" into a category of :attr:`reactionCategoryList`.
+        Must be called again whenever ``xsTable`` is modified.
+
+        """
+        self.reactionIndex = {}
+        for category in self.reactionCategoryList:
+            self.reactionIndex[category] = {}
+
+        for key, value in self.xsTable.items():
+            category = GetReactionCategory(key)
+            if category is not None:
+                self.reactionIndex[category][key] = value
+
+        self.unifiedXSTable = None
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetReactionList(self, category):
+        """Get the cross-sections of all reactions of a category, in the order of ``xsTable``.
+
+        :param category: One of :attr:`reactionCategoryList`.
+        :type category: str.
+        :returns: list of :class:`.PhotoAtomicXSArray`.
+
+        """
+        if self.reactionIndex is None:
+            self.BuildReactionIndex()
+
+        return list(self.reactionIndex[category].values())
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def BuildUnifiedGrid(self):
+        """Tabulate the sums of partial cross-sections on the union of the energy grids of all partials.
+
+        Every partial is linear between two consecutive points of the union grid, so lin-lin interpolation
+        of the tabulated sums equals the sum of the interpolated partials, as required for the total
+        (see :meth:`CalculateTotalMicroXSAtE`). An energy where any partial is discontinuous,
+        e.g. a photoelectric edge, appears twice in the grid: first with the values just below it,
+        then with the values at and above it.
+
+        """
+        if self.reactionIndex is None:
+            self.BuildReactionIndex()
+
+        # (category, cross-section) of every partial, in the order of xsTable
+        categoryTable = {}
+        for category, reactionTable in self.reactionIndex.items():
+            for key, value in reactionTable.items():
+                categoryTable[key] = category
+        partialList = [(categoryTable[key], value) for key, value in self.xsTable.items()
+                       if key in categoryTable.keys() and len(value) > 0]
+
+        self.unifiedXSTable = {}
+
+        if len(partialList) == 0:
+            for key in ["total"] + self.reactionCategoryList:
+                self.unifiedXSTable[key] = xs.PhotoAtomicXSArray(np.zeros(0), np.zeros(0))
+            return
+
+        grid = np.unique(np.concatenate([value.energy for category, value in partialList]))
+
+        # values of each partial just below (left) and at (right) every grid energy
+        leftList = []
+        rightList = []
+        for category, value in partialList:
+            leftList.append(GetLeftLimit(value, grid))
+            rightList.append(GetRightLimit(value, grid, grid[-1]))
+
+        isDiscontinuous = np.zeros(len(grid), dtype = bool)
+        for left, right in zip(leftList, rightList):
+            isDiscontinuous |= (left != right)
+        # nothing is defined below the first energy
+        isDiscontinuous[0] = False
+
+        # position of the left and right value of every grid energy in the unified grid
+        rightIdx = np.cumsum(1 + isDiscontinuous) - 1
+        leftIdx = rightIdx - isDiscontinuous
+
+        unifiedGrid = np.repeat(grid, 1 + isDiscontinuous)
+
+        # sum in the order of xsTable, like the partial-by-partial calculation
+        sumTable = {}
+        for key in ["total"] + self.reactionCategoryList:
+            sumTable[key] = np.zeros(len(unifiedGrid))
+
+        for (category, value), left, right in zip(partialList, leftList, rightList):
+            microXS = np.empty(len(unifiedGrid))
+            microXS[leftIdx] = left
+            microXS[rightIdx] = right
+
+            sumTable["total"] += microXS
+            sumTable[category] += microXS
+
+        for key, value in sumTable.items():
+            self.unifiedXSTable[key] = xs.PhotoAtomicXSArray(unifiedGrid, value)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetUnifiedXS(self, name):
+        if self.unifiedXSTable is None:
+            self.BuildUnifiedGrid()
+
+        return self.unifiedXSTable[name]
+
     #------------------------------------------------------------
     #------------------------------------------------------------
     def CalculateTotalMicroXSAtE(self, energy):
@@ -64,97 +184,157 @@ class Element:
 
         So it is incorrect to directly interpolate ``self.xsTable["total_ref"]``
         The total microscopic cross-section must be calculated on the fly.
+        This is done once per element by :meth:`BuildUnifiedGrid`, which tabulates
+        the sum of all partials on the union of their energy grids.
 
         :param energy: Photon energy in keV.
         :type energy: float.
 
         """
+        return self.InterpUnifiedXS("total", energy)
 
-        result = 0.0
-
-        for key, value in self.xsTable.items():
-            if key != "total_ref":
-
-                # linear search
-                # temp = si.InterpXSLinearSearch(value, energy)
-
-                # binary search
-                temp = si.InterpXSBinarySearch(value, energy)
-
-                # print("-->", key, temp)
-                result += temp
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculatePEMicroXSAtE(self, energy):
+        return self.InterpUnifiedXS("pe", energy)
 
-        return result
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateCSMicroXSAtE(self, energy):
+        return self.InterpUnifiedXS("cs", energy)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def CalculatePEMicroXSAtE(self, energy):
-        result = 0.0
+    def CalculateRLMicroXSAtE(self, energy):
+        return self.InterpUnifiedXS("rl", energy)
 
-        for key, value in self.xsTable.items():
-            if ("[incoherent]" not in key) and\
-               ("[coherent]" not in key) and\
-               ("pair production" not in key) and\
-               ("total_ref" not in key):
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def InterpUnifiedXS(self, name, energy):
+        xsList = self.GetUnifiedXS(name)
 
-                # binary search
-                temp = si.InterpXSBinarySearch(value, energy)
+        if xsList.energy.size == 0:
+            return 0.0
 
-                # print("-->", key, temp)
-                result += temp
+        # binary search
+        return si.InterpXSBinarySearch(xsList, energy)
 
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateElectronXSAtE(self, energy):
+        result = self.CalculateTotalMicroXSAtE(energy)
+        result /= self.Z
         return result
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def CalculateCSMicroXSAtE(self, energy):
-        result = 0.0
+    def CalculateTotalMicroXSAtEnergies(self, energyList):
+        """Same as :meth:`CalculateTotalMicroXSAtE` for an array of energies.
 
-        for key, value in self.xsTable.items():
-            if "[incoherent]" in key:
+        :param energyList: Photon energies in keV.
+        :type energyList: array_like.
+        :returns: numpy.ndarray of the same shape as ``energyList``.
 
-                # binary search
-                temp = si.InterpXSBinarySearch(value, energy)
+        """
+        return self.InterpUnifiedXSAtEnergies("total", energyList)
 
-                # print("-->", key, temp)
-                result += temp
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculatePEMicroXSAtEnergies(self, energyList):
+        return self.InterpUnifiedXSAtEnergies("pe", energyList)
 
-        return result
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateCSMicroXSAtEnergies(self, energyList):
+        return self.InterpUnifiedXSAtEnergies("cs", energyList)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def CalculateRLMicroXSAtE(self, energy):
-        result = 0.0
+    def CalculateRLMicroXSAtEnergies(self, energyList):
+        return self.InterpUnifiedXSAtEnergies("rl", energyList)
 
-        for key, value in self.xsTable.items():
-            if "[coherent]" in key:
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateMicroXSAtEnergies(self, category, energyList):
+        """Microscopic cross-section of a category of reactions, or of all of them, for an array of energies.
 
-                # binary search
-                temp = si.InterpXSBinarySearch(value, energy)
+        :param category: "total" or one of :attr:`reactionCategoryList`.
+        :type category: str.
+        :param energyList: Photon energies in keV.
+        :type energyList: array_like.
+        :returns: numpy.ndarray of the same shape as ``energyList``.
 
-                # print("-->", key, temp)
-                result += temp
+        """
+        if category != "total" and category not in self.reactionCategoryList:
+            raise de.DuoException("--> Unknown reaction category: {:s}".format(str(category)))
 
-        return result
+        return self.InterpUnifiedXSAtEnergies(category, energyList)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def CalculateElectronXSAtE(self, energy):
-        result = self.CalculateTotalMicroXSAtE(energy)
-        result /= self.Z
-        return result
+    def CalculateElectronXSAtEnergies(self, energyList):
+        return self.CalculateTotalMicroXSAtEnergies(energyList) / self.Z
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def InterpUnifiedXSAtEnergies(self, name, energyList):
+        return si.InterpXSBinarySearchArray(self.GetUnifiedXS(name), energyList)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
     def GetCSList(self):
-        for key, value in self.xsTable.items():
-            if "[incoherent]" in key:
-                return value
+        for value in self.GetReactionList("cs"):
+            return value
 
     #------------------------------------------------------------
     #------------------------------------------------------------
     def GetRLList(self):
-        for key, value in self.xsTable.items():
-            if "[coherent]" in key:
-                return value
+        for value in self.GetReactionList("rl"):
+            return value
+
+
+#------------------------------------------------------------
+# Category of a reaction from its gnd label, None for the reference total
+#------------------------------------------------------------
+def GetReactionCategory(xsName):
+    if xsName == "total_ref":
+        return None
+    elif "[incoherent]" in xsName:
+        return "cs"
+    elif "[coherent]" in xsName:
+        return "rl"
+    elif "pair production" in xsName:
+        return "pp"
+    else:
+        return "pe"
+
+#------------------------------------------------------------
+# Value of a partial just below each energy of grid, 0 outside its range
+#------------------------------------------------------------
+def GetLeftLimit(xsList, grid):
+    energyList = xsList.energy
+    microXSList = xsList.microXS
+
+    # first index such that energyList[high] >= grid
+    high = np.searchsorted(energyList, grid, side = "left")
+    isInside = (grid > energyList[0]) & (grid <= energyList[-1])
+
+    high = np.clip(high, 1, len(energyList) - 1)
+    low = high - 1
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        result = si.LinLin(energyList[low], microXSList[low], energyList[high], microXSList[high], grid)
+    result = np.where(energyList[high] == grid, microXSList[high], result)
+
+    return np.where(isInside, result, 0.0)
+
+#------------------------------------------------------------
+# Value of a partial at each energy of grid, on the upper side of a discontinuity.
+# A partial that ends before gridEnd drops to 0 right at its last energy.
+#------------------------------------------------------------
+def GetRightLimit(xsList, grid, gridEnd):
+    result = si.InterpXSBinarySearchArray(xsList, grid)
+
+    isEnded = (grid == xsList.energy[-1]) & (grid != gridEnd)
 
+    return np.where(isEnded, 0.0, result)
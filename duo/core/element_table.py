@@ -1,35 +1,312 @@
 import os
+import numpy as np
+import duo.core.duo_exception as de
+import duo.core.element as duoelement
+import duo.core.xs_matrix as xs_matrix
 import duo.nuclear_data.photoatomic.photoatomic_xs_io as xs
 
+#------------------------------------------------------------
+#------------------------------------------------------------
+class LazyElementList(dict):
+    """Dictionary of (Z, :class:`.Element`) that loads an element the first time it is requested.
+
+    Looking up a single Z, with ``[]`` or ``get()``, loads only that element. Iterating over the dictionary
+    (``keys()``, ``values()``, ``items()`` or a for loop) loads all elements available,
+    and yields them in increasing order of Z, like a fully loaded ``elementList``.
+
+    """
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __init__(self, elementTable):
+        super().__init__()
+        self.elementTable = elementTable
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __missing__(self, Z):
+        if Z not in self.elementTable.fileIndex.keys():
+            raise KeyError(Z)
+
+        self.elementTable.LoadElements([Z])
+
+        return super().__getitem__(Z)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __contains__(self, Z):
+        return Z in self.elementTable.fileIndex.keys()
+
+    #------------------------------------------------------------
+    # dict.get does not call __missing__
+    #------------------------------------------------------------
+    def get(self, Z, default = None):
+        if Z in self:
+            return self[Z]
+
+        return default
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __len__(self):
+        return len(self.elementTable.fileIndex)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __iter__(self):
+        return iter(self.keys())
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def IsLoaded(self, Z):
+        return super().__contains__(Z)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def keys(self):
+        self.elementTable.LoadElements(self.elementTable.fileIndex.keys())
+        return sorted(super().keys())
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def values(self):
+        return [self[Z] for Z in self.keys()]
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def items(self):
+        return [(Z, self[Z]) for Z in self.keys()]
+
 #------------------------------------------------------------
 #------------------------------------------------------------
 class ElementTable:
     """Class that manages all elements available.
 
+    On the first run the ENDF-B and GND libraries are parsed and compiled into a binary cache
+    (``photoatomic_xs_cache.npz`` in ``dataPath`` by default). Subsequent runs load the cache instead,
+    unless the library files have changed since the cache was written.
+
+    Cross-sections are read from the GND library by default, or from the MF=23 sections of the ENDF-B library
+    with ``xsSource = "endfb"``. The latter uses a byte-offset index of the ENDF-B files
+    (``photoatomic_endfb_index.json`` in ``dataPath``) to seek to each section.
+
+    In lazy mode, when no valid cache is available, an element is parsed only the first time it is requested.
+    Use :meth:`LoadElements` to load a range of elements in one batch.
+
     :ivar dictionary elementList: Each (key, value) pair is (Z, :class:`.Element`).
-        This variable is simply a reference to ``PhotoAtomicXSIOManager.elementList``.
+        This variable is simply a reference to ``PhotoAtomicXSIOManager.elementList``,
+        or a :class:`LazyElementList` in lazy mode.
+    :ivar bool useCache: Whether to read and write the binary cache.
+    :ivar str cachePath: Location of the binary cache.
+    :ivar int numProcesses: Number of worker processes used to parse the libraries, None for one per cpu core.
+    :ivar bool lazy: Whether to load elements on demand.
+    :ivar str xsSource: Library of cross-sections, "gnd" or "endfb".
+    :ivar dictionary fileIndex: Each (key, value) pair is (Z, file name). Only used in lazy mode.
+    :ivar xsMatrix: Dense Z x E table of cross-sections built by :meth:`BuildXSMatrix`, None until then.
+        When it covers the requested elements and energies, :meth:`CalculateMicroXSAtE` and related methods read from it
+        if asked to with ``useXSMatrix = True``.
+    :vartype xsMatrix: :class:`.XSMatrix`
+    :ivar parameterizationCache: Fits of the coefficient calculators using this table, see :func:`duo.zeff.parameterization_cache.GetCache`.
+    :vartype parameterizationCache: :class:`.ParameterizationCache`
 
     """
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def __init__(self, dataPath):
+    def __init__(self, dataPath, useCache = True, cachePath = None, numProcesses = 1, lazy = False, xsSource = "gnd"):
         self.dataPath = dataPath
         self.elementList = {}
 
+        self.useCache = useCache
+        self.cachePath = cachePath
+        if self.cachePath is None:
+            self.cachePath = os.path.join(self.dataPath, "photoatomic_xs_cache.npz")
+
+        self.numProcesses = numProcesses
+
+        self.lazy = lazy
+
+        self.xsSource = xsSource
+        if self.xsSource not in ("gnd", "endfb"):
+            raise de.DuoException("--> Unknown cross-section source: {:s}".format(str(self.xsSource)))
+
+        self.ioManager = None
+        self.fileIndex = {}
+
+        self.xsMatrix = None
+
+        # created on first use by duo.zeff.parameterization_cache.GetCache
+        self.parameterizationCache = None
+
+        self.dataChecksum = None
+
         self.Initialize()
 
     #------------------------------------------------------------
     #------------------------------------------------------------
     def Initialize(self):
         mg = xs.PhotoAtomicXSIOManager(endfbDir=os.path.join(self.dataPath, "photoatomic_endfb"),
-                                       gndDir=os.path.join(self.dataPath, "photoatomic_gnd"))
+                                       gndDir=os.path.join(self.dataPath, "photoatomic_gnd"),
+                                       numProcesses=self.numProcesses)
+
+        if self.useCache and mg.InputXSFromCache(self.cachePath, self.xsSource):
+            self.elementList = mg.elementList
+            self.lazy = False
+            return
+
+        if self.lazy:
+            # only elements available in both libraries
+            endfbFileIndex = mg.GetFileIndex(mg.endfbDir)
+            gndFileIndex = mg.GetFileIndex(mg.gndDir)
+            for Z in sorted(endfbFileIndex.keys()):
+                if Z in gndFileIndex.keys():
+                    self.fileIndex[Z] = gndFileIndex[Z]
+
+            self.ioManager = mg
+            self.elementList = LazyElementList(self)
+            return
 
         mg.InputAWRFromEndfb()
-        mg.InputXSFromGnd()
+        self.InputXS(mg)
+
+        if self.useCache:
+            try:
+                mg.OutputXSToCache(self.cachePath, self.xsSource)
+            except OSError as err:
+                print("--> Unable to write cross-section cache: {:s}".format(str(err)))
 
         self.elementList = mg.elementList
 
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def InputXS(self, mg, ZList = None):
+        if self.xsSource == "endfb":
+            mg.InputXSFromEndfb(ZList)
+        else:
+            mg.InputXSFromGndStreaming(ZList)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def LoadElements(self, ZList):
+        """Load all elements of ``ZList`` that have not been loaded yet, in one batch.
+        Nothing is done unless in lazy mode.
+
+        :param ZList: Atomic numbers.
+        :type ZList: iterable of int.
+
+        """
+        if not self.lazy:
+            return
+
+        missingZList = sorted(set(int(Z) for Z in ZList if not self.elementList.IsLoaded(int(Z))))
+        if len(missingZList) == 0:
+            return
+
+        self.ioManager.InputAWRFromEndfb(missingZList)
+        self.InputXS(self.ioManager, missingZList)
+
+        for Z in missingZList:
+            dict.__setitem__(self.elementList, Z, self.ioManager.elementList[Z])
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetDataChecksum(self):
+        """Checksum of the cross-section library in use, see :meth:`.PhotoAtomicXSIOManager.CalculateChecksum`.
+
+        """
+        if self.dataChecksum is None:
+            mg = xs.PhotoAtomicXSIOManager(endfbDir=os.path.join(self.dataPath, "photoatomic_endfb"),
+                                           gndDir=os.path.join(self.dataPath, "photoatomic_gnd"))
+            self.dataChecksum = "{0:s}|{1:s}".format(self.xsSource, mg.CalculateChecksum())
+
+        return self.dataChecksum
+
     #------------------------------------------------------------
     #------------------------------------------------------------
     def GetElementByZ(self, Z):
         return self.elementList[Z]
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def BuildXSMatrix(self, startEnergy = 1.0, stopEnergy = 200.0, energyStep = 0.01, energyList = None,
+                      ZList = None, categoryList = None):
+        """Materialize a dense table of cross-sections (Z x energy grid, per reaction category).
+        The table is only read by calls that ask for it with ``useXSMatrix = True``, since it is interpolated
+        between grid energies and thus not exact near absorption edges. Among the built-in consumers,
+        only the mac and Zeff curves of :meth:`.Material.CalculateMacAtEnergies`, :meth:`.Material.CalculateCategoryMacAtEnergies`
+        and :meth:`.Material.CalculateZeffAtEnergies` offer it; coefficient fits always use the exact cross-sections.
+
+        :param startEnergy: First energy of the grid in keV.
+        :type startEnergy: float.
+        :param stopEnergy: Last energy of the grid in keV.
+        :type stopEnergy: float.
+        :param energyStep: Step of the grid in keV.
+        :type energyStep: float.
+        :param energyList: Explicit energy grid in keV, overrides the three parameters above.
+        :type energyList: array_like.
+        :param ZList: Atomic numbers, all elements available by default.
+        :type ZList: iterable of int.
+        :param categoryList: "total" and/or categories of :attr:`.Element.reactionCategoryList`, all of them by default.
+        :type categoryList: list of str.
+        :returns: :class:`.XSMatrix`.
+
+        """
+        if energyList is None:
+            numEnergy = int(round((stopEnergy - startEnergy) / energyStep)) + 1
+            # rounded so that grid energies such as 60.0 keV are exact
+            energyList = np.round(np.linspace(startEnergy, stopEnergy, numEnergy), 10)
+
+        if ZList is None:
+            ZList = self.elementList.keys()
+
+        if categoryList is None:
+            categoryList = ["total"] + duoelement.Element.reactionCategoryList
+
+        print("--> Build cross-section matrix")
+        self.xsMatrix = xs_matrix.XSMatrix(self, energyList, ZList, categoryList)
+
+        return self.xsMatrix
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateMicroXSAtEnergies(self, category, energyList, ZList, useXSMatrix = False):
+        """Microscopic cross-section of several elements for an array of energies, interpolated per element.
+        With ``useXSMatrix``, read from :attr:`xsMatrix` instead if it covers them.
+
+        :param category: "total" or one of :attr:`.Element.reactionCategoryList`.
+        :type category: str.
+        :param energyList: Photon energies in keV.
+        :type energyList: array_like.
+        :param ZList: Atomic numbers.
+        :type ZList: iterable of int.
+        :param useXSMatrix: Read from the approximate :attr:`xsMatrix` built by :meth:`BuildXSMatrix`, if any.
+        :type useXSMatrix: bool.
+        :returns: numpy.ndarray of shape (len(ZList),) + shape of ``energyList``.
+
+        """
+        ZList = np.asarray(ZList if isinstance(ZList, np.ndarray) else list(ZList), dtype = np.int64)
+
+        if useXSMatrix and self.xsMatrix is not None and self.xsMatrix.IsCovering(category, ZList, energyList):
+            return self.xsMatrix.CalculateMicroXSAtEnergies(category, energyList, ZList)
+
+        self.LoadElements(ZList)
+
+        # scalar energy: one binary search per element, without array overhead
+        if np.ndim(energyList) == 0:
+            if category != "total" and category not in duoelement.Element.reactionCategoryList:
+                raise de.DuoException("--> Unknown reaction category: {:s}".format(str(category)))
+
+            energy = float(energyList)
+            return np.array([self.GetElementByZ(Z).InterpUnifiedXS(category, energy) for Z in ZList.tolist()])
+
+        return np.array([self.GetElementByZ(Z).CalculateMicroXSAtEnergies(category, energyList) for Z in ZList.tolist()])
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateMicroXSAtE(self, category, energy, ZList, useXSMatrix = False):
+        return self.CalculateMicroXSAtEnergies(category, float(energy), ZList, useXSMatrix)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateElectronXSAtE(self, energy, ZList, useXSMatrix = False):
+        ZList = np.asarray(ZList if isinstance(ZList, np.ndarray) else list(ZList), dtype = np.int64)
+
+        return self.CalculateMicroXSAtE("total", energy, ZList, useXSMatrix) / ZList
@@ -1,3 +1,5 @@
+import hashlib
+import numpy as np
 import duo.core.element as duoelement
 import duo.core.duo_exception as de
 import duo.core.constant as constant
@@ -24,6 +26,14 @@ class Material:
         self.density = 0.0
         self.isCommitted = False
 
+        # compiled by Commit()
+        self.ZList = None
+        self.weightFractionList = None
+        self.atomicFractionList = None
+        self.inverseAList = None
+        self.ZOverAList = None
+        self.macWeightList = None
+
     #------------------------------------------------------------
     #------------------------------------------------------------
     def AddElement(self, Z, **kwargs):
@@ -70,6 +80,9 @@ class Material:
         if (not useWeightFraction) and (not useAtomicFraction):
             raise de.DuoException("--> Wrong weight fraction or atomic fraction.")
 
+        # load all elements in one batch if the element table is lazy
+        self.elementTable.LoadElements(self.elementList.keys())
+
         # convert between weight and atomic fraction
         # theory: w_i = n_i * A_i / A
         if useWeightFraction:
@@ -94,9 +107,50 @@ class Material:
             ec.weightFraction /= weightFractionSum
             ec.atomicFraction /= atomicFractionSum
 
+        self.Compile()
 
         self.isCommitted = True
 
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Compile(self):
+        """Build the per-element arrays used by all Calculate* methods, in the order of ``elementList``.
+        Called by :meth:`Commit`.
+
+        """
+        self.ZList = np.array(list(self.elementList.keys()), dtype = np.int64)
+        self.weightFractionList = np.array([ec.weightFraction for Z, ec in self.elementList.items()], dtype = np.float64)
+        self.atomicFractionList = np.array([ec.atomicFraction for Z, ec in self.elementList.items()], dtype = np.float64)
+
+        AList = np.array([self.elementTable.GetElementByZ(Z).A for Z in self.ZList], dtype = np.float64)
+        self.inverseAList = 1.0 / AList
+        self.ZOverAList = self.ZList / AList
+
+        # weight of each element in the mass attenuation coefficient
+        self.macWeightList = self.weightFractionList * self.inverseAList
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetContentHash(self):
+        """Hash of the normalized element fractions, the density and the checksum of the cross-section library.
+        Two materials with the same hash give the same results, whatever their names.
+        The density is usually set after :meth:`Commit`, so the hash is not stored.
+
+        """
+        if not self.isCommitted:
+            raise de.DuoException("--> Material not committed.")
+
+        sha = hashlib.sha1()
+        sha.update(self.elementTable.GetDataChecksum().encode("utf-8"))
+
+        for Z, ec in sorted(self.elementList.items()):
+            result = "{0:d}|{1:s}|{2:s}\n".format(Z, float(ec.weightFraction).hex(), float(ec.atomicFraction).hex())
+            sha.update(result.encode("utf-8"))
+
+        sha.update("density|{0:s}".format(float(self.density).hex()).encode("utf-8"))
+
+        return sha.hexdigest()
+
     #------------------------------------------------------------
     #------------------------------------------------------------
     def Show(self):
@@ -108,32 +162,58 @@ class Material:
             print(message)
 
     #------------------------------------------------------------
+    # Microscopic cross-section of every element of the material, in the order of ZList
     #------------------------------------------------------------
-    def CalculateMacAtE(self, energy):
+    def GetMicroXSList(self, category, energy, useXSMatrix = False):
         if not self.isCommitted:
             raise de.DuoException("--> Material not committed.")
 
-        mac = 0.0
+        return self.elementTable.CalculateMicroXSAtEnergies(category, energy, self.ZList, useXSMatrix)
 
-        for Z, ec in self.elementList.items():
-            element = self.elementTable.GetElementByZ(Z)
-            mac += ec.weightFraction / element.A * element.CalculateTotalMicroXSAtE(energy)
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateMacAtE(self, energy):
+        return self.CalculateCategoryMacAtE("total", energy)
 
-        mac *= constant.Endfb.Avogadro * 1e-24
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateMacAtEnergies(self, energyList, useXSMatrix = False):
+        """Same as :meth:`CalculateMacAtE` for an array of energies.
+        All ``*AtEnergies`` methods evaluate the whole array in one vectorized pass
+        and return a numpy.ndarray of the same shape as ``energyList``.
 
-        return mac # unit: cm ^ 2 / g
+        :param energyList: Photon energies in keV.
+        :type energyList: array_like.
+        :param useXSMatrix: Read the cross-sections from :attr:`.ElementTable.xsMatrix` if it covers them,
+            which is faster for long curves but approximate between its grid energies.
+        :type useXSMatrix: bool.
+        :returns: numpy.ndarray, unit: cm ^ 2 / g.
+
+        """
+        return self.CalculateCategoryMacAtEnergies("total", energyList, useXSMatrix)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def CalculatePEMacAtE(self, energy):
-        if not self.isCommitted:
-            raise de.DuoException("--> Material not committed.")
+    def CalculatePEMacAtEnergies(self, energyList):
+        return self.CalculateCategoryMacAtEnergies("pe", energyList)
 
-        mac = 0.0
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateCSMacAtEnergies(self, energyList):
+        return self.CalculateCategoryMacAtEnergies("cs", energyList)
 
-        for Z, ec in self.elementList.items():
-            element = self.elementTable.GetElementByZ(Z)
-            mac += ec.weightFraction / element.A * element.CalculatePEMicroXSAtE(energy)
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateRLMacAtEnergies(self, energyList):
+        return self.CalculateCategoryMacAtEnergies("rl", energyList)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateCategoryMacAtEnergies(self, category, energyList, useXSMatrix = False):
+        # one row per element, one column per energy
+        xsList = self.GetMicroXSList(category, np.asarray(energyList, dtype = np.float64), useXSMatrix)
+
+        mac = np.tensordot(self.macWeightList, xsList, axes = 1)
 
         mac *= constant.Endfb.Avogadro * 1e-24
 
@@ -141,31 +221,60 @@ class Material:
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def CalculateCSMacAtE(self, energy):
-        if not self.isCommitted:
-            raise de.DuoException("--> Material not committed.")
+    def CalculateZeffAtEnergies(self, energyList, useXSMatrix = False):
+        xsList = self.GetMicroXSList("total", np.asarray(energyList, dtype = np.float64), useXSMatrix)
 
-        mac = 0.0
+        # broadcast per-element values along the energy axes
+        shape = (-1,) + (1,) * (xsList.ndim - 1)
 
-        for Z, ec in self.elementList.items():
-            element = self.elementTable.GetElementByZ(Z)
-            mac += ec.weightFraction / element.A * element.CalculateCSMicroXSAtE(energy)
+        temp = self.atomicFractionList.reshape(shape) * xsList
+        up   = np.sum(temp, axis = 0)
+        down = np.sum(temp / self.ZList.reshape(shape), axis = 0)
 
-        mac *= constant.Endfb.Avogadro * 1e-24
+        return up / down
 
-        return mac # unit: cm ^ 2 / g
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateElectronXSAtEnergies(self, energyList):
+        xsList = self.GetMicroXSList("total", np.asarray(energyList, dtype = np.float64))
+
+        # electron cross-section of each element is sigma / Z
+        up   = np.tensordot(self.weightFractionList * self.ZOverAList / self.ZList, xsList, axes = 1)
+        down = np.dot(self.weightFractionList, self.ZOverAList)
+
+        return up / down
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateTotalMicroXSAtEnergiesPerAtom(self, energyList):
+        xsList = self.GetMicroXSList("total", np.asarray(energyList, dtype = np.float64))
+
+        up = np.tensordot(self.macWeightList, xsList, axes = 1)
+        down = np.sum(self.macWeightList)
+
+        return up / down
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculatePEMacAtE(self, energy):
+        return self.CalculateCategoryMacAtE("pe", energy)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateCSMacAtE(self, energy):
+        return self.CalculateCategoryMacAtE("cs", energy)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
     def CalculateRLMacAtE(self, energy):
-        if not self.isCommitted:
-            raise de.DuoException("--> Material not committed.")
+        return self.CalculateCategoryMacAtE("rl", energy)
 
-        mac = 0.0
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateCategoryMacAtE(self, category, energy):
+        xsList = self.GetMicroXSList(category, float(energy))
 
-        for Z, ec in self.elementList.items():
-            element = self.elementTable.GetElementByZ(Z)
-            mac += ec.weightFraction / element.A * element.CalculateRLMicroXSAtE(energy)
+        mac = float(np.dot(self.macWeightList, xsList))
 
         mac *= constant.Endfb.Avogadro * 1e-24
 
@@ -174,38 +283,26 @@ class Material:
     #------------------------------------------------------------
     #------------------------------------------------------------
     def CalculateZeffAtE(self, energy):
-        if not self.isCommitted:
-            raise de.DuoException("--> Material not committed.")
+        xsList = self.GetMicroXSList("total", float(energy))
 
-        Zeff = 0.0
-        up = 0.0
-        down = 0.0
+        temp = self.atomicFractionList * xsList
+        up   = np.sum(temp)
+        down = np.sum(temp / self.ZList)
 
-        for Z, ec in self.elementList.items():
-            element = self.elementTable.GetElementByZ(Z)
-            sigma = element.CalculateTotalMicroXSAtE(energy)
-            temp = ec.atomicFraction * sigma
-            up   += temp
-            down += temp / Z
-        Zeff = up / down
+        Zeff = float(up / down)
 
         return Zeff
 
     #------------------------------------------------------------
     #------------------------------------------------------------
     def CalculateElectronXSAtE(self, energy):
-        if not self.isCommitted:
-            raise de.DuoException("--> Material not committed.")
+        # electron cross-section of each element is sigma / Z
+        xsList = self.GetMicroXSList("total", float(energy)) / self.ZList
 
-        up = 0.0
-        down = 0.0
-        for Z, ec in self.elementList.items():
-            element = self.elementTable.GetElementByZ(Z)
-            sigma_e = element.CalculateElectronXSAtE(energy)
-            up   += ec.weightFraction * element.Z * sigma_e / element.A
-            down += ec.weightFraction * element.Z / element.A
+        up   = np.dot(self.weightFractionList * self.ZOverAList, xsList)
+        down = np.dot(self.weightFractionList, self.ZOverAList)
 
-        result = up / down
+        result = float(up / down)
         return result
 
     #------------------------------------------------------------
@@ -235,18 +332,12 @@ class Material:
     #------------------------------------------------------------
     #------------------------------------------------------------
     def CalculateTotalMicroXSAtEPerAtom(self, energy):
-        up = 0.0
-        down = 0.0
-
-        for Z, ec in self.elementList.items():
-            element = self.elementTable.GetElementByZ(Z)
-
-            temp = ec.weightFraction / element.A
+        xsList = self.GetMicroXSList("total", float(energy))
 
-            up += temp * element.CalculateTotalMicroXSAtE(energy)
-            down += temp
+        up = np.dot(self.macWeightList, xsList)
+        down = np.sum(self.macWeightList)
 
-        return up / down
+        return float(up / down)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
@@ -0,0 +1,217 @@
+import numpy as np
+import duo.core.duo_exception as de
+import duo.core.constant as constant
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+class MaterialBatch:
+    """Many materials sharing one list of elements, evaluated with matrix products.
+
+    Each row of the composition matrix is one material, each column one element of ``ZList``.
+    Fractions are normalized per material exactly as in :meth:`.Material.Commit`,
+    so every quantity equals the one of the corresponding :class:`.Material`.
+
+    :ivar numpy.ndarray ZList: Atomic numbers of the columns.
+    :ivar numpy.ndarray weightFractionMatrix: Normalized weight fractions, shape (numMaterial, numElement).
+    :ivar numpy.ndarray atomicFractionMatrix: Normalized atomic fractions, shape (numMaterial, numElement).
+    :ivar numpy.ndarray densityList: Densities in g / cm ^ 3, None if not given.
+
+    """
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __init__(self, elementTable, ZList, fractionMatrix, densityList = None, useWeightFraction = True):
+        """
+        :param elementTable: Element table.
+        :type elementTable: :class:`.ElementTable`.
+        :param ZList: Atomic numbers of the columns of ``fractionMatrix``.
+        :type ZList: array_like of int.
+        :param fractionMatrix: Weight or atomic fractions, shape (numMaterial, numElement). Rows need not be normalized.
+        :type fractionMatrix: array_like.
+        :param densityList: Density of each material in g / cm ^ 3.
+        :type densityList: array_like.
+        :param useWeightFraction: Whether ``fractionMatrix`` holds weight fractions, otherwise atomic fractions.
+        :type useWeightFraction: bool.
+
+        """
+        self.elementTable = elementTable
+
+        self.ZList = np.asarray(ZList, dtype = np.int64)
+        fractionMatrix = np.atleast_2d(np.asarray(fractionMatrix, dtype = np.float64))
+
+        if fractionMatrix.ndim != 2 or fractionMatrix.shape[1] != len(self.ZList):
+            raise de.DuoException("--> Composition matrix must have one column per element.")
+
+        if np.any(fractionMatrix < 0.0) or np.any(np.sum(fractionMatrix, axis = 1) <= 0.0):
+            raise de.DuoException("--> Wrong weight fraction or atomic fraction.")
+
+        self.densityList = None
+        if densityList is not None:
+            self.densityList = np.asarray(densityList, dtype = np.float64)
+            if self.densityList.shape != (fractionMatrix.shape[0],):
+                raise de.DuoException("--> One density per material is required.")
+
+        self.elementTable.LoadElements(self.ZList)
+        AList = np.array([self.elementTable.GetElementByZ(Z).A for Z in self.ZList.tolist()], dtype = np.float64)
+
+        # convert between weight and atomic fraction
+        # theory: w_i = n_i * A_i / A
+        if useWeightFraction:
+            self.weightFractionMatrix = fractionMatrix
+            self.atomicFractionMatrix = fractionMatrix / AList
+        else:
+            self.atomicFractionMatrix = fractionMatrix
+            self.weightFractionMatrix = fractionMatrix * AList
+
+        # normalize fraction values
+        self.weightFractionMatrix = self.weightFractionMatrix / np.sum(self.weightFractionMatrix, axis = 1, keepdims = True)
+        self.atomicFractionMatrix = self.atomicFractionMatrix / np.sum(self.atomicFractionMatrix, axis = 1, keepdims = True)
+
+        self.inverseAList = 1.0 / AList
+        self.ZOverAList = self.ZList / AList
+
+        # weight of each element in the mass attenuation coefficient
+        self.macWeightMatrix = self.weightFractionMatrix * self.inverseAList
+
+        # filled by CalculateDualEnergy()
+        self.mu_Ehigh       = None
+        self.CTNumber_Ehigh = None
+        self.Z_Ehigh        = None
+        self.mu_Elow        = None
+        self.CTNumber_Elow  = None
+        self.Z_Elow         = None
+        self.ZeffAve        = None
+        self.electronXS_Ehigh = None
+        self.electronXS_Elow  = None
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    @classmethod
+    def FromMaterialList(cls, elementTable, materialList):
+        """Build a batch from committed :class:`.Material` objects, using their weight fractions and densities.
+
+        """
+        ZSet = set()
+        for mat in materialList:
+            if not mat.isCommitted:
+                raise de.DuoException("--> Material not committed.")
+            ZSet.update(mat.elementList.keys())
+
+        ZList = sorted(ZSet)
+        columnIndex = {Z : idx for idx, Z in enumerate(ZList)}
+
+        fractionMatrix = np.zeros((len(materialList), len(ZList)))
+        for row, mat in enumerate(materialList):
+            for Z, ec in mat.elementList.items():
+                fractionMatrix[row, columnIndex[Z]] = ec.weightFraction
+
+        densityList = [mat.density for mat in materialList]
+
+        return cls(elementTable, ZList, fractionMatrix, densityList, useWeightFraction = True)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetNumMaterials(self):
+        return self.weightFractionMatrix.shape[0]
+
+    #------------------------------------------------------------
+    # Microscopic cross-section of every element, shape (numElement,) + shape of energy
+    #------------------------------------------------------------
+    def GetMicroXSList(self, category, energy):
+        return self.elementTable.CalculateMicroXSAtEnergies(category, energy, self.ZList)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateMacAtE(self, energy, category = "total"):
+        """Mass attenuation coefficient of every material in cm ^ 2 / g.
+
+        :param energy: Photon energy in keV, a scalar or an array.
+        :type energy: float or array_like.
+        :param category: "total" or one of :attr:`.Element.reactionCategoryList`.
+        :type category: str.
+        :returns: numpy.ndarray of shape (numMaterial,) + shape of ``energy``.
+
+        """
+        xsList = self.GetMicroXSList(category, energy)
+
+        mac = np.tensordot(self.macWeightMatrix, xsList, axes = 1)
+
+        mac *= constant.Endfb.Avogadro * 1e-24
+
+        return mac # unit: cm ^ 2 / g
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateMuAtE(self, energy):
+        if self.densityList is None:
+            raise de.DuoException("--> Density of materials not given.")
+
+        mac = self.CalculateMacAtE(energy)
+
+        return mac * self.densityList.reshape((-1,) + (1,) * (mac.ndim - 1)) # unit: 1 / cm
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateCTNumberAtE(self, energy, mu_water, mu_air):
+        mu = self.CalculateMuAtE(energy)
+
+        return (mu - mu_water) / (mu_water - mu_air) * 1000.0
+
+    #------------------------------------------------------------
+    # Direct Zeff, as Material.CalculateZeffAtE
+    #------------------------------------------------------------
+    def CalculateZeffAtE(self, energy):
+        xsList = self.GetMicroXSList("total", energy)
+
+        shape = (-1,) + (1,) * (xsList.ndim - 1)
+
+        up   = np.tensordot(self.atomicFractionMatrix, xsList, axes = 1)
+        down = np.tensordot(self.atomicFractionMatrix, xsList / self.ZList.reshape(shape), axes = 1)
+
+        return up / down
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateElectronXSAtE(self, energy):
+        xsList = self.GetMicroXSList("total", energy)
+
+        shape = (-1,) + (1,) * (xsList.ndim - 1)
+
+        # electron cross-section of each element is sigma / Z
+        up   = np.tensordot(self.weightFractionMatrix * self.ZOverAList, xsList / self.ZList.reshape(shape), axes = 1)
+        down = np.dot(self.weightFractionMatrix, self.ZOverAList)
+
+        return up / down.reshape((-1,) + (1,) * (up.ndim - 1))
+
+    #------------------------------------------------------------
+    # Total cross-section per atom, as Material.CalculateTotalMicroXSAtEPerAtom
+    #------------------------------------------------------------
+    def CalculateTotalMicroXSAtEPerAtom(self, energy):
+        xsList = self.GetMicroXSList("total", energy)
+
+        up   = np.tensordot(self.macWeightMatrix, xsList, axes = 1)
+        down = np.sum(self.macWeightMatrix, axis = 1)
+
+        return up / down.reshape((-1,) + (1,) * (up.ndim - 1))
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateDualEnergy(self, com):
+        """Calculate mu, CT number, electron cross-section and direct Zeff of every material at the low and high energies of ``com``,
+        like :class:`.ZeffCalculator` does with method "direct" for one material.
+
+        :param com: Provides Elow, Ehigh and the attenuation of water and air.
+        :type com: :class:`.Common`.
+
+        """
+        self.mu_Ehigh = self.CalculateMuAtE(com.Ehigh)
+        self.CTNumber_Ehigh = com.ConvertMuToCTNumber(self.mu_Ehigh, com.muWater_Ehigh, com.muAir_Ehigh)
+        self.Z_Ehigh = self.CalculateZeffAtE(com.Ehigh)
+        self.electronXS_Ehigh = self.CalculateElectronXSAtE(com.Ehigh)
+
+        self.mu_Elow = self.CalculateMuAtE(com.Elow)
+        self.CTNumber_Elow = com.ConvertMuToCTNumber(self.mu_Elow, com.muWater_Elow, com.muAir_Elow)
+        self.Z_Elow = self.CalculateZeffAtE(com.Elow)
+        self.electronXS_Elow = self.CalculateElectronXSAtE(com.Elow)
+
+        self.ZeffAve = (self.Z_Elow + self.Z_Ehigh) / 2.0
@@ -1,6 +1,7 @@
 import duo.core.element as duoelement
 import duo.core.duo_exception as de
 import duo.core.material as material
+import duo.core.constant as constant
 import numpy as np
 
 #------------------------------------------------------------
@@ -139,3 +140,217 @@ class Mixture(material.Material):
 
 
 
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+class MixtureFamily:
+    """Family of mixtures of the same base materials, one mixture per row of mixing fractions.
+
+    All quantities are evaluated from per-base-material sums, so that a sweep over many fractions
+    is one matrix product instead of one :class:`Mixture` per fraction.
+    Each mixture gives the same results as a :class:`Mixture` built with :meth:`Mixture.AddMaterial`,
+    :meth:`Mixture.Commit` and :meth:`Mixture.CalculateMixtureDensity`.
+
+    :ivar list baseMaterialList: Committed base materials, each with a density.
+    :ivar numpy.ndarray materialWeightFractionMatrix: Normalized material weight fractions, shape (numMixture, numBase).
+    :ivar numpy.ndarray fractionMatrix: Normalized fractions as given, material weight or material molar fractions.
+    :ivar numpy.ndarray densityList: Density of each mixture in g / cm ^ 3.
+
+    """
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __init__(self, baseMaterialList, fractionList, useMaterialWeightFraction = True):
+        """
+        :param baseMaterialList: Committed base materials.
+        :type baseMaterialList: list of :class:`.Material`.
+        :param fractionList: Material fractions of shape (numMixture, numBase), rows need not be normalized.
+            With two base materials, a 1-D array is the fraction of the first one, the rest being the second one.
+        :type fractionList: array_like.
+        :param useMaterialWeightFraction: Whether the fractions are material weight fractions, otherwise material molar fractions.
+        :type useMaterialWeightFraction: bool.
+
+        """
+        if len(baseMaterialList) < 2:
+            raise de.DuoException("--> At least two base materials are required.")
+
+        for mat in baseMaterialList:
+            if not mat.isCommitted:
+                raise de.DuoException("--> Material not committed.")
+            if mat.density <= 0.0:
+                raise de.DuoException("--> Density of base material not given: {:s}".format(mat.name))
+
+        self.baseMaterialList = baseMaterialList
+        self.elementTable = baseMaterialList[0].elementTable
+
+        fractionList = np.asarray(fractionList, dtype = np.float64)
+        if fractionList.ndim == 1 and len(baseMaterialList) == 2:
+            fractionList = np.stack([fractionList, 1.0 - fractionList], axis = 1)
+
+        if fractionList.ndim != 2 or fractionList.shape[1] != len(baseMaterialList):
+            raise de.DuoException("--> Fraction matrix must have one column per base material.")
+
+        if np.any(fractionList < 0.0) or np.any(np.sum(fractionList, axis = 1) <= 0.0):
+            raise de.DuoException("--> Wrong material weight fraction or material molar fraction.")
+
+        self.useMaterialWeightFraction = useMaterialWeightFraction
+        self.fractionMatrix = fractionList / np.sum(fractionList, axis = 1, keepdims = True)
+
+        if useMaterialWeightFraction:
+            densityFractionList = fractionList
+        else:
+            # Mixture.AddMaterial mixes the atomic fractions of the elements,
+            # which amounts to weighting each base material by its mean atomic mass
+            meanAList = np.array([1.0 / np.sum(mat.macWeightList) for mat in baseMaterialList])
+            # while Mixture.Commit converts the material fractions used for the density with the sum of A
+            A_allList = np.array([np.sum(1.0 / mat.inverseAList) for mat in baseMaterialList])
+
+            densityFractionList = fractionList * A_allList
+            fractionList = fractionList * meanAList
+
+        # normalize fraction values
+        self.materialWeightFractionMatrix = fractionList / np.sum(fractionList, axis = 1, keepdims = True)
+        densityFractionList = densityFractionList / np.sum(densityFractionList, axis = 1, keepdims = True)
+
+        # mass / volume, as Mixture.CalculateMixtureDensity
+        inverseDensityList = np.array([1.0 / mat.density for mat in baseMaterialList])
+        self.densityList = 1.0 / np.dot(densityFractionList, inverseDensityList)
+
+        # sum of w * Z / A of each base material
+        self.baseZOverAList = np.array([np.dot(mat.weightFractionList, mat.ZOverAList) for mat in baseMaterialList])
+
+        # (energy, base quantities) of the energies already evaluated
+        self.baseQuantityCache = {}
+
+        # filled by CalculateDualEnergy()
+        self.mu_Ehigh       = None
+        self.CTNumber_Ehigh = None
+        self.Z_Ehigh        = None
+        self.mu_Elow        = None
+        self.CTNumber_Elow  = None
+        self.Z_Elow         = None
+        self.ZeffAve        = None
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetNumMixtures(self):
+        return self.materialWeightFractionMatrix.shape[0]
+
+    #------------------------------------------------------------
+    # Sums over the elements of each base material:
+    # sigmaSum = sum of w * sigma / A, sigmaOverZSum = sum of w * sigma / (A * Z),
+    # each of shape (numBase,) + shape of energy
+    #------------------------------------------------------------
+    def GetBaseQuantity(self, energy):
+        isScalar = np.ndim(energy) == 0
+        if isScalar and float(energy) in self.baseQuantityCache.keys():
+            return self.baseQuantityCache[float(energy)]
+
+        energy = float(energy) if isScalar else np.asarray(energy, dtype = np.float64)
+
+        sigmaSumList = []
+        sigmaOverZSumList = []
+        for mat in self.baseMaterialList:
+            xsList = mat.GetMicroXSList("total", energy)
+            sigmaSumList.append(np.tensordot(mat.macWeightList, xsList, axes = 1))
+            sigmaOverZSumList.append(np.tensordot(mat.macWeightList / mat.ZList, xsList, axes = 1))
+
+        result = (np.array(sigmaSumList), np.array(sigmaOverZSumList))
+
+        if isScalar:
+            self.baseQuantityCache[energy] = result
+
+        return result
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateMacAtE(self, energy):
+        """Mass attenuation coefficient of every mixture in cm ^ 2 / g.
+
+        :param energy: Photon energy in keV, a scalar or an array.
+        :type energy: float or array_like.
+        :returns: numpy.ndarray of shape (numMixture,) + shape of ``energy``.
+
+        """
+        sigmaSumList, sigmaOverZSumList = self.GetBaseQuantity(energy)
+
+        mac = np.tensordot(self.materialWeightFractionMatrix, sigmaSumList, axes = 1)
+
+        mac *= constant.Endfb.Avogadro * 1e-24
+
+        return mac # unit: cm ^ 2 / g
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateMuAtE(self, energy):
+        mac = self.CalculateMacAtE(energy)
+
+        return mac * self.densityList.reshape((-1,) + (1,) * (mac.ndim - 1)) # unit: 1 / cm
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateCTNumberAtE(self, energy, mu_water, mu_air):
+        mu = self.CalculateMuAtE(energy)
+
+        return (mu - mu_water) / (mu_water - mu_air) * 1000.0
+
+    #------------------------------------------------------------
+    # Direct Zeff, as Material.CalculateZeffAtE
+    #------------------------------------------------------------
+    def CalculateZeffAtE(self, energy):
+        sigmaSumList, sigmaOverZSumList = self.GetBaseQuantity(energy)
+
+        up   = np.tensordot(self.materialWeightFractionMatrix, sigmaSumList, axes = 1)
+        down = np.tensordot(self.materialWeightFractionMatrix, sigmaOverZSumList, axes = 1)
+
+        return up / down
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateElectronXSAtE(self, energy):
+        sigmaSumList, sigmaOverZSumList = self.GetBaseQuantity(energy)
+
+        up   = np.tensordot(self.materialWeightFractionMatrix, sigmaSumList, axes = 1)
+        down = np.dot(self.materialWeightFractionMatrix, self.baseZOverAList)
+
+        return up / down.reshape((-1,) + (1,) * (up.ndim - 1))
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateDualEnergy(self, com):
+        """Calculate mu, CT number and direct Zeff of every mixture at the low and high energies of ``com``.
+
+        :param com: Provides Elow, Ehigh and the attenuation of water and air.
+        :type com: :class:`.Common`.
+
+        """
+        self.mu_Ehigh = self.CalculateMuAtE(com.Ehigh)
+        self.CTNumber_Ehigh = com.ConvertMuToCTNumber(self.mu_Ehigh, com.muWater_Ehigh, com.muAir_Ehigh)
+        self.Z_Ehigh = self.CalculateZeffAtE(com.Ehigh)
+
+        self.mu_Elow = self.CalculateMuAtE(com.Elow)
+        self.CTNumber_Elow = com.ConvertMuToCTNumber(self.mu_Elow, com.muWater_Elow, com.muAir_Elow)
+        self.Z_Elow = self.CalculateZeffAtE(com.Elow)
+
+        self.ZeffAve = (self.Z_Elow + self.Z_Ehigh) / 2.0
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def BuildMixture(self, index, name):
+        """Build the committed :class:`Mixture` of row ``index``, e.g. to add a chosen concentration to a material list.
+        The mixture is built from the fractions of the kind given, so that its density is the one of ``densityList``.
+
+        """
+        mix = Mixture(name, self.elementTable)
+        for mat, fraction in zip(self.baseMaterialList, self.fractionMatrix[index]):
+            if fraction <= 0.0:
+                continue
+
+            if self.useMaterialWeightFraction:
+                mix.AddMaterial(mat, materialWeightFraction = float(fraction))
+            else:
+                mix.AddMaterial(mat, materiaMolarFraction = float(fraction))
+        mix.Commit()
+        mix.CalculateMixtureDensity()
+
+        return mix
@@ -1,3 +1,4 @@
+import numpy as np
 
 #------------------------------------------------------------
 #------------------------------------------------------------
@@ -8,3 +9,42 @@ class PhotoAtomicXS:
         self.energy = energy # keV
         self.microXS = microXS # barn
         self.mac = 0.0 # mass attenuation coefficient, cm2 / g
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+class PhotoAtomicXSArray:
+    """Cross-section of one reaction stored as two contiguous arrays.
+
+    Indexing and iterating still yield :class:`PhotoAtomicXS` objects, so the array can be used
+    wherever a list of :class:`PhotoAtomicXS` was expected. New code should use
+    ``energy`` and ``microXS`` directly.
+
+    :ivar numpy.ndarray energy: Photon energy in keV, in increasing order.
+    :ivar numpy.ndarray microXS: Microscopic cross-section in barn.
+
+    """
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __init__(self, energy, microXS):
+        self.energy = np.ascontiguousarray(energy, dtype = np.float64) # keV
+        self.microXS = np.ascontiguousarray(microXS, dtype = np.float64) # barn
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __len__(self):
+        return len(self.energy)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return PhotoAtomicXSArray(self.energy[idx], self.microXS[idx])
+
+        return PhotoAtomicXS(float(self.energy[idx]), float(self.microXS[idx]))
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __iter__(self):
+        for energy, microXS in zip(self.energy.tolist(), self.microXS.tolist()):
+            yield PhotoAtomicXS(energy, microXS)
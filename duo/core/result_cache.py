@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import duo.core.duo_exception as de
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+class ResultCache:
+    """Disk-backed cache of json values, stored in a SQLite database, such as per-(material, energy, method) results.
+
+    For material results, a key is built by :meth:`MakeKey` from the content hash of a material (see :meth:`.Material.GetContentHash`),
+    so entries never need to be invalidated explicitly: a different composition, density or data library
+    gives a different key. Once the stored entries exceed ``maxSize`` bytes, the least recently used ones are removed.
+
+    :ivar str cachePath: Location of the database.
+    :ivar int maxSize: Maximum total size of the stored values in bytes.
+
+    """
+
+    # increment whenever the meaning of the stored values changes
+    cacheVersion = 1
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __init__(self, cachePath, maxSize = 64 * 1024 * 1024):
+        self.cachePath = cachePath
+        self.maxSize = maxSize
+
+        dirPath = os.path.dirname(os.path.abspath(self.cachePath))
+        if not os.path.isdir(dirPath):
+            raise de.DuoException("--> Directory of result cache not found: {:s}".format(dirPath))
+
+        # the connection may be used from several threads, one at a time
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(self.cachePath, check_same_thread = False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS result ("
+                                "key TEXT PRIMARY KEY, "
+                                "value TEXT NOT NULL, "
+                                "size INTEGER NOT NULL, "
+                                "lastAccess REAL NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS resultLastAccess ON result (lastAccess)")
+        self.connection.commit()
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    @classmethod
+    def MakeKey(cls, materialHash, energy, method):
+        """
+        :param materialHash: Content hash of the material.
+        :type materialHash: str.
+        :param energy: Photon energy in keV.
+        :type energy: float.
+        :param method: Method the results depend on, e.g. "bourque-bspline".
+        :type method: str.
+
+        """
+        return "{:d}|{:s}|{:s}|{:s}".format(cls.cacheVersion, materialHash, float(energy).hex(), method)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Get(self, key):
+        """Get the dictionary stored under ``key``, or None if there is none.
+
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM result WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+
+            self.connection.execute("UPDATE result SET lastAccess = ? WHERE key = ?", (time.time(), key))
+            self.connection.commit()
+
+            return json.loads(row[0])
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Set(self, key, value):
+        """Store a dictionary of json-serializable values under ``key``, then evict entries if needed.
+
+        """
+        with self.lock:
+            text = json.dumps(value)
+
+            self.connection.execute("INSERT OR REPLACE INTO result (key, value, size, lastAccess) VALUES (?, ?, ?, ?)",
+                                    (key, text, len(text), time.time()))
+            self.connection.commit()
+
+            self.Evict()
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetSize(self):
+        with self.lock:
+            return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM result").fetchone()[0]
+
+    #------------------------------------------------------------
+    # remove the least recently used entries until the total size fits in maxSize
+    #------------------------------------------------------------
+    def Evict(self):
+        with self.lock:
+            excess = self.GetSize() - self.maxSize
+            if excess <= 0:
+                return
+
+            keyList = []
+            for key, size in self.connection.execute("SELECT key, size FROM result ORDER BY lastAccess ASC"):
+                keyList.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+
+            self.connection.executemany("DELETE FROM result WHERE key = ?", keyList)
+            self.connection.commit()
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM result")
+            self.connection.commit()
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Close(self):
+        with self.lock:
+            self.connection.close()
@@ -45,25 +45,65 @@ def InterpXSLinearSearch(xsList, energy):
 #------------------------------------------------------------
 #------------------------------------------------------------
 def InterpXSBinarySearch(xsList, energy):
-    if energy < xsList[0].energy:
-        return 0.0
-    elif energy > xsList[-1].energy:
+    """Interpolate a :class:`.PhotoAtomicXSArray` at ``energy`` with lin-lin interpolation.
+    Zero is returned outside the tabulated range.
+
+    The interval is located with ``numpy.searchsorted``. At an energy tabulated twice
+    (a discontinuity), the value above the discontinuity is returned.
+
+    """
+    energyList = xsList.energy
+
+    if energy < energyList[0] or energy > energyList[-1]:
         return 0.0
-    else:
-        low = 0
-        high = len(xsList) - 1
 
-        while high - low > 1:
-            mid = (low + high) // 2
-            if energy < xsList[mid].energy:
-                high = mid
-            elif energy > xsList[mid].energy:
-                low = mid
-            else: # energy == xsList[mid].energy:
-                return xsList[mid].microXS
+    # last index such that energyList[low] <= energy
+    low = int(energyList.searchsorted(energy, side = "right")) - 1
+
+    x0 = float(energyList[low])
+    y0 = float(xsList.microXS[low])
+
+    if x0 == energy:
+        return y0
+
+    high = low + 1
+
+    # use lin-lin interpolation
+    return LinLin(x0, y0, float(energyList[high]), float(xsList.microXS[high]), energy)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def InterpXSBinarySearchArray(xsList, energyList):
+    """Same as :func:`InterpXSBinarySearch` for an array of energies, in one vectorized pass.
+    Zero is returned outside the tabulated range, and the tabulated value at a tabulated energy.
+
+    :param xsList: Cross-section to interpolate.
+    :type xsList: :class:`.PhotoAtomicXSArray`.
+    :param energyList: Photon energies in keV.
+    :type energyList: array_like.
+    :returns: numpy.ndarray of the same shape as ``energyList``.
+
+    """
+    energyList = np.asarray(energyList, dtype = np.float64)
+    tabulatedEnergy = xsList.energy
+    tabulatedXS = xsList.microXS
+
+    if len(tabulatedEnergy) == 0:
+        return np.zeros(energyList.shape)
+
+    isInside = (energyList >= tabulatedEnergy[0]) & (energyList <= tabulatedEnergy[-1])
 
-        # use lin-lin interpolation
-        return LinLin(xsList[low].energy, xsList[low].microXS, xsList[high].energy, xsList[high].microXS, energy)
+    # last index such that tabulatedEnergy[low] <= energy, kept inside [0, n - 2]
+    low = np.searchsorted(tabulatedEnergy, energyList, side = "right") - 1
+    low = np.clip(low, 0, max(len(tabulatedEnergy) - 2, 0))
+    high = np.minimum(low + 1, len(tabulatedEnergy) - 1)
 
+    # use lin-lin interpolation
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        result = LinLin(tabulatedEnergy[low], tabulatedXS[low], tabulatedEnergy[high], tabulatedXS[high], energyList)
 
+    # exact values at tabulated energies; high only matches at the last tabulated energy
+    result = np.where(tabulatedEnergy[low] == energyList, tabulatedXS[low], result)
+    result = np.where(tabulatedEnergy[high] == energyList, tabulatedXS[high], result)
 
+    return np.where(isInside, result, 0.0)
@@ -0,0 +1,111 @@
+import numpy as np
+import duo.core.duo_exception as de
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+class XSMatrix:
+    """Dense table of microscopic cross-sections of many elements on a common energy grid.
+
+    For each reaction category, row i and column j hold the cross-section of element ``ZList[i]``
+    at ``energyList[j]``. Values at grid energies are exact. Between two grid energies the columns
+    are linearly interpolated, so within the grid step that contains an absorption edge
+    the result differs from interpolating the ENDF data directly.
+
+    :ivar numpy.ndarray ZList: Atomic numbers, in increasing order.
+    :ivar numpy.ndarray energyList: Photon energies in keV, in increasing order.
+    :ivar dictionary table: Each (key, value) pair is (category, 2-D numpy.ndarray of shape (len(ZList), len(energyList))),
+        where category is "total" or one of :attr:`.Element.reactionCategoryList`. Unit: barn.
+
+    """
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __init__(self, elementTable, energyList, ZList, categoryList):
+        self.ZList = np.array(sorted(set(int(Z) for Z in ZList)), dtype = np.int64)
+        self.energyList = np.asarray(energyList, dtype = np.float64)
+
+        if self.energyList.ndim != 1 or len(self.energyList) < 2 or np.any(np.diff(self.energyList) <= 0.0):
+            raise de.DuoException("--> Energy grid must contain at least 2 energies in strictly increasing order.")
+
+        elementTable.LoadElements(self.ZList)
+
+        self.table = {}
+        for category in categoryList:
+            self.table[category] = np.empty((len(self.ZList), len(self.energyList)))
+
+            for idx, Z in enumerate(self.ZList):
+                element = elementTable.GetElementByZ(Z)
+                self.table[category][idx, :] = element.CalculateMicroXSAtEnergies(category, self.energyList)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def IsCovering(self, category, ZList, energy):
+        """Whether all of ``ZList`` and ``energy`` (scalar or array) are inside the table.
+
+        """
+        if category not in self.table.keys():
+            return False
+
+        energy = np.asarray(energy)
+        if energy.size > 0 and (np.min(energy) < self.energyList[0] or np.max(energy) > self.energyList[-1]):
+            return False
+
+        return bool(np.all(np.isin(np.asarray(ZList), self.ZList)))
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetRowIndex(self, ZList):
+        ZList = np.asarray(ZList)
+        rowIdx = np.searchsorted(self.ZList, ZList)
+
+        if np.any(rowIdx >= len(self.ZList)) or np.any(self.ZList[np.minimum(rowIdx, len(self.ZList) - 1)] != ZList):
+            raise de.DuoException("--> Element not found in cross-section matrix.")
+
+        return rowIdx
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateMicroXSAtEnergies(self, category, energyList, ZList = None):
+        """Interpolate the table between grid energies.
+
+        :param category: "total" or one of :attr:`.Element.reactionCategoryList`.
+        :type category: str.
+        :param energyList: Photon energies in keV, inside the grid.
+        :type energyList: array_like.
+        :param ZList: Atomic numbers, all elements of the table by default.
+        :type ZList: array_like.
+        :returns: numpy.ndarray of shape (len(ZList),) + shape of ``energyList``.
+
+        """
+        if category not in self.table.keys():
+            raise de.DuoException("--> Category not in cross-section matrix: {:s}".format(str(category)))
+
+        energyList = np.asarray(energyList, dtype = np.float64)
+        if energyList.size > 0 and (np.min(energyList) < self.energyList[0] or np.max(energyList) > self.energyList[-1]):
+            raise de.DuoException("--> Energy out of the range of cross-section matrix.")
+
+        table = self.table[category]
+        if ZList is not None:
+            table = table[self.GetRowIndex(ZList), :]
+
+        # left column of the interval, kept inside [0, n - 2]
+        low = np.searchsorted(self.energyList, energyList, side = "right") - 1
+        low = np.clip(low, 0, len(self.energyList) - 2)
+
+        # weight of the right column, 0 or 1 at grid energies so that they are exact
+        weight = (energyList - self.energyList[low]) / (self.energyList[low + 1] - self.energyList[low])
+
+        return table[:, low] * (1.0 - weight) + table[:, low + 1] * weight
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateMicroXSAtE(self, category, energy, ZList = None):
+        return self.CalculateMicroXSAtEnergies(category, float(energy), ZList)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Show(self):
+        print("--> Cross-section matrix: {:d} elements, {:d} energies from {:f} to {:f} keV".format(
+              len(self.ZList), len(self.energyList), self.energyList[0], self.energyList[-1]))
+        for category, value in self.table.items():
+            print("    {:10s} {:10.1f} MB".format(category, value.nbytes / 1e6))
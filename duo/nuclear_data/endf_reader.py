@@ -0,0 +1,290 @@
+import os
+import re
+import json
+import numpy as np
+import duo.core.duo_exception as de
+
+# an ENDF-6 real number may omit the "E" of the exponent, e.g. 1.234567+5 or -2.5-3
+endfExponentPattern = re.compile(r"(?<=[0-9.])([+-])(?=[0-9])")
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def ParseEndfFloat(field):
+    """Convert one 11-column ENDF-6 field to float. A blank field is zero.
+
+    """
+    field = field.strip()
+    if len(field) == 0:
+        return 0.0
+
+    return float(endfExponentPattern.sub(r"E\1", field))
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def ParseEndfFloatArray(lineList, count):
+    """Convert the first ``count`` 11-column fields of a list of ENDF-6 data lines to a NumPy array.
+
+    The fields are split with a fixed-width view of the text instead of one slice per field.
+
+    """
+    text = "".join(line[0:66].ljust(66) for line in lineList).encode("ascii")
+    fieldList = np.frombuffer(text, dtype = "S11")[0:count]
+
+    text = b" ".join(field.strip() or b"0" for field in fieldList.tolist()).decode("ascii")
+    text = endfExponentPattern.sub(r"E\1", text)
+
+    return np.array(text.split(), dtype = np.float64)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+class EndfReader:
+    """Reader of one ENDF-6 file with random access to its MF/MT sections.
+
+    Every line of an ENDF-6 file carries its MAT, MF and MT numbers in columns 67-75.
+    :meth:`BuildIndex` scans the file once and records the byte range of every section,
+    after which :meth:`ReadSectionLines` reads a section by seeking directly to it.
+
+    :ivar str filePath: Path of the ENDF-6 file.
+    :ivar dictionary sectionIndex: Each (key, value) pair is ((MF, MT), (start, stop)),
+        where start and stop are byte offsets in the file.
+
+    """
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __init__(self, filePath, sectionIndex = None):
+        self.filePath = filePath
+        self.sectionIndex = sectionIndex
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def BuildIndex(self):
+        self.sectionIndex = {}
+
+        with open(self.filePath, "rb") as infile:
+            offset = 0
+            for line in infile:
+                lineLength = len(line)
+
+                # MF and MT are in columns 71-72 and 73-75
+                try:
+                    MF = int(line[70:72])
+                    MT = int(line[72:75])
+                except ValueError:
+                    offset += lineLength
+                    continue
+
+                # MT = 0 marks the end of a section (SEND), MF = 0 the end of a file (FEND)
+                if MF > 0 and MT > 0:
+                    key = (MF, MT)
+                    if key not in self.sectionIndex.keys():
+                        self.sectionIndex[key] = [offset, offset + lineLength]
+                    else:
+                        self.sectionIndex[key][1] = offset + lineLength
+
+                offset += lineLength
+
+        for key, value in self.sectionIndex.items():
+            self.sectionIndex[key] = tuple(value)
+
+        return self.sectionIndex
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetSectionList(self, MF = None):
+        if self.sectionIndex is None:
+            self.BuildIndex()
+
+        return sorted(key for key in self.sectionIndex.keys() if MF is None or key[0] == MF)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def ReadSectionLines(self, MF, MT):
+        """Read all lines of section (MF, MT) by seeking to it.
+
+        """
+        if self.sectionIndex is None:
+            self.BuildIndex()
+
+        if (MF, MT) not in self.sectionIndex.keys():
+            raise de.DuoException("--> Section MF={:d} MT={:d} not found in {:s}.".format(MF, MT, self.filePath))
+
+        start, stop = self.sectionIndex[(MF, MT)]
+        with open(self.filePath, "rb") as infile:
+            infile.seek(start)
+            data = infile.read(stop - start)
+
+        return data.decode("ascii").splitlines()
+
+    #------------------------------------------------------------
+    # The HEAD record of MF=1/MT=451 is the first line after the tape id,
+    # so it can be read without an index
+    #------------------------------------------------------------
+    def ReadHead(self):
+        """Read ZA and AWR from the HEAD record of MF=1/MT=451.
+
+        """
+        if self.sectionIndex is not None:
+            line = self.ReadSectionLines(1, 451)[0]
+        else:
+            with open(self.filePath, "r") as infile:
+                for line in infile:
+                    if line[70:75] == " 1451":
+                        break
+                else:
+                    raise de.DuoException("--> HEAD record not found in {:s}.".format(self.filePath))
+
+        ZA = ParseEndfFloat(line[0:11])
+        AWR = ParseEndfFloat(line[11:22])
+
+        return ZA, AWR
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def ReadSymbol(self):
+        """Read the chemical symbol from ZSYMAM (e.g. `` 1-H -  0``) in the description of MF=1/MT=451.
+
+        """
+        lineList = self.ReadSectionLines(1, 451)
+        ZSYMAM = lineList[4][0:11]
+
+        return ZSYMAM.split("-")[1].strip()
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def ReadTab1(self, MF, MT):
+        """Read a section made of a HEAD record followed by a TAB1 record, such as MF=23 photoatomic cross-sections.
+
+        :returns: (interpolationList, x, y), where interpolationList is a list of (NBT, INT) pairs.
+
+        """
+        lineList = self.ReadSectionLines(MF, MT)
+
+        # line 0: HEAD record
+        # line 1: TAB1 control record C1 C2 L1 L2 NR NP
+        NR = int(lineList[1][44:55])
+        NP = int(lineList[1][55:66])
+
+        # interpolation table, 3 (NBT, INT) pairs per line
+        numInterpolationLine = (NR + 2) // 3
+        interpolationList = []
+        for line in lineList[2 : 2 + numInterpolationLine]:
+            for idx in range(3):
+                if len(interpolationList) == NR:
+                    break
+                NBT = int(line[22 * idx : 22 * idx + 11])
+                INT = int(line[22 * idx + 11 : 22 * idx + 22])
+                interpolationList.append((NBT, INT))
+
+        # (x, y) pairs, 3 pairs (6 fields) per line
+        numDataLine = (NP + 2) // 3
+        dataLineList = lineList[2 + numInterpolationLine : 2 + numInterpolationLine + numDataLine]
+
+        result = ParseEndfFloatArray(dataLineList, 2 * NP)
+        if len(result) != 2 * NP:
+            raise de.DuoException("--> Corrupted TAB1 record MF={:d} MT={:d} in {:s}.".format(MF, MT, self.filePath))
+
+        return interpolationList, result[0::2], result[1::2]
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+class EndfLibraryIndex:
+    """Byte-offset index of the MF/MT sections of all ENDF-6 files in a directory.
+
+    The index is persisted as json in ``indexPath``. An entry is rebuilt only when the size
+    or modification time of its file has changed.
+
+    :ivar dictionary fileIndex: Each (key, value) pair is (file name, {"size", "mtime", "sections"}).
+
+    """
+
+    # increment whenever the layout of the index file changes
+    indexVersion = 1
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __init__(self, dirPath, indexPath = None):
+        self.dirPath = dirPath
+        self.indexPath = indexPath
+        if self.indexPath is None:
+            self.indexPath = os.path.normpath(self.dirPath) + "_index.json"
+
+        self.fileIndex = {}
+        self.isModified = False
+
+        self.InputIndex()
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def InputIndex(self):
+        if not os.path.isfile(self.indexPath):
+            return
+
+        try:
+            with open(self.indexPath, "r") as infile:
+                data = json.load(infile)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") == self.indexVersion:
+            self.fileIndex = data["files"]
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def OutputIndex(self):
+        if not self.isModified:
+            return
+
+        data = {"version" : self.indexVersion, "files" : self.fileIndex}
+
+        try:
+            tempPath = self.indexPath + ".tmp"
+            with open(tempPath, "w") as outfile:
+                json.dump(data, outfile)
+            os.replace(tempPath, self.indexPath)
+        except OSError as err:
+            print("--> Unable to write ENDF index: {:s}".format(str(err)))
+            return
+
+        self.isModified = False
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetSectionIndex(self, fileName):
+        """Get the section index of the file, or None if it is missing or stale.
+
+        """
+        stat = os.stat(os.path.join(self.dirPath, fileName))
+
+        entry = self.fileIndex.get(fileName)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime_ns:
+            return None
+
+        sectionIndex = {}
+        for MF, MT, start, stop in entry["sections"]:
+            sectionIndex[(MF, MT)] = (start, stop)
+
+        return sectionIndex
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def SetSectionIndex(self, fileName, sectionIndex):
+        stat = os.stat(os.path.join(self.dirPath, fileName))
+
+        sectionList = [[MF, MT, start, stop] for (MF, MT), (start, stop) in sorted(sectionIndex.items())]
+        self.fileIndex[fileName] = {"size" : stat.st_size, "mtime" : stat.st_mtime_ns, "sections" : sectionList}
+        self.isModified = True
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetReader(self, fileName):
+        """Get an :class:`EndfReader` of the file, building its index if missing or stale.
+
+        """
+        reader = EndfReader(os.path.join(self.dirPath, fileName), self.GetSectionIndex(fileName))
+
+        if reader.sectionIndex is None:
+            reader.BuildIndex()
+            self.SetSectionIndex(fileName, reader.sectionIndex)
+
+        return reader
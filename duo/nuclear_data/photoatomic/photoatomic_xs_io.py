@@ -1,8 +1,13 @@
 import os
+import re
+import hashlib
+import concurrent.futures
+import numpy as np
 import xml.etree.ElementTree as ET
 import duo.core.duo_exception as de
 import duo.core.element as duoelement
 import duo.core.photoatomic_xs as duophotoatomic_xs
+import duo.nuclear_data.endf_reader as endf_reader
 
 #------------------------------------------------------------
 #------------------------------------------------------------
@@ -14,53 +19,128 @@ class PhotoAtomicXSIOManager:
 
     - gnd format: Newer xml-based format. Used herein for both atomic weight ratio (AWR) and microscopic cross-section.
 
+    Two loaders are available for the gnd format. :meth:`InputXSFromGnd` builds the full xml tree of each file
+    and queries it with xpath. :meth:`InputXSFromGndStreaming` reads each file in a single pass with
+    ``iterparse`` and discards every subtree once it has been processed.
+
+    A compiled binary cache (``.npz``) of everything read from both libraries can be written
+    with :meth:`OutputXSToCache` and read back with :meth:`InputXSFromCache`.
+
+    The endfb library can also be used as the source of cross-sections with :meth:`InputXSFromEndfb`.
+    MF=23 sections are then read by seeking, with the byte-offset index of :class:`.EndfLibraryIndex`.
+
+    Files are independent per element. When ``numProcesses`` is larger than 1 they are parsed
+    in a process pool, and the results are merged in the order of Z.
+
     :ivar dictionary elementList: Each (key, value) pair is (Z, :class:`.Element`).
 
     """
 
+    # increment whenever the layout of the binary cache changes
+    cacheVersion = 2
+
+    # href of a summand of the total cross-section, e.g.
+    # /reactionSuite/reactions/reaction[@label='H + photon [coherent]']/crossSection
+    summandPattern = re.compile(r"^/reactionSuite/reactions/reaction\[@label='([^']*)'\]/crossSection$")
+
+    # file name of both libraries, e.g. photoat-001_H_000.endf and photoat-001_H_000.xml
+    fileNamePattern = re.compile(r"^photoat-(\d+)_")
+
+    # MT numbers of the endfb MF=23 sections and the corresponding reaction labels of the gnd format.
+    # MT=501 is the total, and MT=516 (sum of 515 and 517) and 522 (sum of subshells) are skipped.
+    endfbReactionNameTable = {502 : "{0:s} + photon [coherent]",
+                              504 : "{0:s} + photon [incoherent]",
+                              515 : "e- + e+ + {0:s} [pair production: electron field]",
+                              517 : "e- + e+ + {0:s} [pair production: nuclear field]"}
+
+    # photoelectric subshells, MT=534 (K) to MT=572 (Q3)
+    endfbSubshellList = ["1s1/2",
+                         "2s1/2", "2p1/2", "2p3/2",
+                         "3s1/2", "3p1/2", "3p3/2", "3d3/2", "3d5/2",
+                         "4s1/2", "4p1/2", "4p3/2", "4d3/2", "4d5/2", "4f5/2", "4f7/2",
+                         "5s1/2", "5p1/2", "5p3/2", "5d3/2", "5d5/2", "5f5/2", "5f7/2", "5g7/2", "5g9/2",
+                         "6s1/2", "6p1/2", "6p3/2", "6d3/2", "6d5/2", "6f5/2", "6f7/2", "6g7/2", "6g9/2", "6h9/2", "6h11/2",
+                         "7s1/2", "7p1/2", "7p3/2"]
+
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def __init__(self, endfbDir="", gndDir=""):
+    def __init__(self, endfbDir="", gndDir="", numProcesses=1):
         self.endfbDir = endfbDir
         self.endfbFileList = []
 
         self.gndDir = gndDir
         self.gndFileList = []
 
+        # number of worker processes used to parse files, None means one per cpu core
+        self.numProcesses = numProcesses
+        if self.numProcesses is None:
+            self.numProcesses = os.cpu_count()
+
         self.elementList = {}
 
     #------------------------------------------------------------
     #------------------------------------------------------------
     def InputData(self):
         self.InputAWRFromEndfb()
-        self.InputXSFromGnd()
+        self.InputXSFromGndStreaming()
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def InputAWRFromEndfb(self):
+    def InputAWRFromEndfb(self, ZList = None):
+        """Input atomic weight ratio of all elements, or only of the elements in ``ZList``.
+
+        """
         print("--> Input atomic weight ratio")
 
         # use sorted() to enforce order that is consistent across different file systems
-        self.endfbFileList = sorted(os.listdir(self.endfbDir))
+        self.endfbFileList = self.GetFileList(self.endfbDir, ZList)
+        fullPathList = [os.path.join(self.endfbDir, fileName) for fileName in self.endfbFileList]
+
+        for Z, AWR in self.Map(ProcessEndfbFile, fullPathList):
+            element = duoelement.Element()
+            element.Z = Z
+            element.AWR = AWR
+
+            element.GetAFromAWR()
+
+            self.elementList[element.Z] = element
 
-        for fileName in self.endfbFileList:
-            fullPath = os.path.join(self.endfbDir, fileName)
-            with open(fullPath, "r") as infile:
-                lineNumber = 0
-                for line in infile:
-                    lineNumber += 1
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetFileIndex(self, dirPath):
+        """Build the Z -> file name index of a library directory from the file names.
 
-                    if lineNumber == 2:
-                        lineString = line.split()
-                        element = duoelement.Element()
-                        element.Z = int(float(lineString[0]) / 1000.0)
-                        element.AWR = float(lineString[1])
+        """
+        fileIndex = {}
+        for fileName in os.listdir(dirPath):
+            result = self.fileNamePattern.match(fileName)
+            if result is not None:
+                fileIndex[int(result.group(1))] = fileName
 
-                        element.GetAFromAWR()
+        return fileIndex
 
-                        self.elementList[element.Z] = element
+    #------------------------------------------------------------
+    # Sorted list of all files in dirPath, or of the files of the elements in ZList
+    #------------------------------------------------------------
+    def GetFileList(self, dirPath, ZList = None):
+        if ZList is None:
+            return sorted(os.listdir(dirPath))
 
+        fileIndex = self.GetFileIndex(dirPath)
+        for Z in ZList:
+            if Z not in fileIndex.keys():
+                raise de.DuoException("--> Element not found.")
+
+        return sorted(fileIndex[Z] for Z in set(ZList))
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def ReadAWRFromEndfbFile(self, fullPath):
+        # only the HEAD record at the top of the file is read
+        ZA, AWR = endf_reader.EndfReader(fullPath).ReadHead()
+        Z = int(ZA / 1000.0)
 
+        return Z, AWR
 
     #------------------------------------------------------------
     #------------------------------------------------------------
@@ -96,6 +176,8 @@ class PhotoAtomicXSIOManager:
 
             self.GetAllOtherXS(root, element)
 
+            element.BuildReactionIndex()
+
     #------------------------------------------------------------
     # Add element symbol
     #------------------------------------------------------------
@@ -127,18 +209,7 @@ class PhotoAtomicXSIOManager:
 
         xsXML = result[0].findall(".//XYs1d/values")
 
-        xsList = []
-        for subXML in xsXML:
-            stringList = subXML.text.split()
-
-            for i in range(len(stringList) // 2):
-                energy = float(stringList[2 * i]) / 1000.0 # eV to keV
-                microXS = float(stringList[2 * i + 1]) # barn
-
-                xs = duophotoatomic_xs.PhotoAtomicXS(energy, microXS)
-                xsList.append(xs)
-
-        element.xsTable["total_ref"] = xsList
+        element.xsTable["total_ref"] = self.GetXSFromValues(xsXML)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
@@ -160,21 +231,368 @@ class PhotoAtomicXSIOManager:
             # use xpath feature to find specific node
             xsXML = block[0].findall(".//XYs1d/values")
 
-            xsList = []
-            for subXML in xsXML:
-                stringList = subXML.text.split()
+            element.xsTable[xsName] = self.GetXSFromValues(xsXML)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def InputXSFromGndStreaming(self, ZList = None):
+        """Same as :meth:`InputXSFromGnd`, but each file is streamed with ``iterparse``
+        instead of being loaded as a full xml tree.
+        If ``ZList`` is given, only the files of these elements are read.
+
+        """
+        print("--> Input total microscopic cross-section (streaming)")
+
+        self.gndFileList = self.GetFileList(self.gndDir, ZList)
+        fullPathList = [os.path.join(self.gndDir, fileName) for fileName in self.gndFileList]
+
+        if self.numProcesses <= 1:
+            for fullPath in fullPathList:
+                self.StreamXSFromGnd(fullPath)
+            return
+
+        for Z, symbol, xsArrayTable in self.Map(ProcessGndFile, fullPathList):
+            self.AddXSArrayToElement(Z, symbol, xsArrayTable.items())
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def StreamXSFromGnd(self, fullPath):
+        Z, symbol, xsArrayTable = self.ReadXSFromGndFile(fullPath)
+
+        return self.AddXSArrayToElement(Z, symbol, xsArrayTable.items())
+
+    #------------------------------------------------------------
+    # Add symbol and cross-sections, given as (xsName, (energy, microXS)) pairs of arrays
+    #------------------------------------------------------------
+    def AddXSArrayToElement(self, Z, symbol, xsArrayList):
+        element = self.GetElementForGnd(Z, symbol)
+
+        for xsName, (energyList, microXSList) in xsArrayList:
+            element.xsTable[xsName] = duophotoatomic_xs.PhotoAtomicXSArray(energyList, microXSList)
+
+        element.BuildReactionIndex()
 
-                for i in range(len(stringList) // 2):
-                    energy = float(stringList[2 * i]) / 1000.0 # eV to keV
-                    microXS = float(stringList[2 * i + 1]) # barn
+        return element
 
-                    xs = duophotoatomic_xs.PhotoAtomicXS(energy, microXS)
-                    xsList.append(xs)
+    #------------------------------------------------------------
+    # Add element symbol
+    #------------------------------------------------------------
+    def GetElementForGnd(self, Z, symbol):
+        if Z not in self.elementList.keys():
+            raise de.DuoException("--> Element not found.")
+        element = self.elementList[Z]
+        element.symbol = symbol
 
-            element.xsTable[xsName] = xsList
+        return element
+
+    #------------------------------------------------------------
+    # Single pass over one gnd file
+    #
+    # Reactions precede the sums in a gnd file, so the cross-section
+    # of every reaction is kept (as arrays, not as xml)
+    # until the summands of MT=501 are known at the end of the file.
+    #
+    # Returns Z, symbol and a table of (energy, microXS) arrays ordered as in Element.xsTable
+    #------------------------------------------------------------
+    def ReadXSFromGndFile(self, fullPath):
+        infoList = []
+        reactionXSTable = {}
+        totalXSList = None
+        summandList = None
+
+        # elements that have been opened but not closed yet
+        nodeStack = []
+
+        for event, node in ET.iterparse(fullPath, events = ("start", "end")):
+            if event == "start":
+                nodeStack.append(node)
+                continue
+
+            nodeStack.pop()
+            parent = nodeStack[-1] if nodeStack else None
+
+            if node.tag == "chemicalElement":
+                infoList.append(dict(node.attrib))
+
+            elif node.tag == "crossSection" and parent is not None:
+                if parent.tag == "reaction":
+                    reactionXSTable[parent.attrib["label"]] = self.GetXSArrayFromValues(node.findall(".//XYs1d/values"))
+                elif parent.tag == "crossSectionSum" and parent.attrib.get("ENDF_MT") == "501":
+                    result = node.findall(".//regions1d")
+                    if len(result) != 1:
+                        raise de.DuoException("--> More than 1 interesting section found. Need further handling.")
+                    totalXSList = self.GetXSArrayFromValues(result[0].findall(".//XYs1d/values"))
+
+            elif node.tag == "crossSectionSum":
+                if node.attrib.get("ENDF_MT") == "501":
+                    summandList = [item.attrib["href"] for item in node.findall("./summands/*")]
+
+            # discard processed subtrees
+            if node.tag in ("reaction", "crossSectionSum", "documentations", "PoPs", "styles"):
+                node.clear()
+                if parent is not None:
+                    parent.remove(node)
+
+        if len(infoList) != 1:
+            raise de.DuoException("--> More than 1 chemical info.")
+
+        if totalXSList is None or summandList is None:
+            raise de.DuoException("--> Total cross-section not found.")
+
+        xsTable = {}
+        xsTable["total_ref"] = totalXSList
+
+        for href in summandList:
+            result = self.summandPattern.match(href)
+            if result is None or result.group(1) not in reactionXSTable.keys():
+                raise de.DuoException("--> Unsupported summand: {:s}".format(href))
+
+            xsName = result.group(1)
+            xsTable[xsName] = reactionXSTable[xsName]
+
+        return int(infoList[0]["Z"]), infoList[0]["symbol"], xsTable
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetXSFromValues(self, xsXML):
+        energyList, microXSList = self.GetXSArrayFromValues(xsXML)
+
+        return duophotoatomic_xs.PhotoAtomicXSArray(energyList, microXSList)
+
+    #------------------------------------------------------------
+    # Parse the text of all XYs1d/values nodes straight into arrays
+    # of energy (keV) and microscopic cross-section (barn)
+    #------------------------------------------------------------
+    def GetXSArrayFromValues(self, xsXML):
+        pairList = [np.fromstring(subXML.text, dtype = np.float64, sep = " ").reshape(-1, 2) for subXML in xsXML]
+
+        if len(pairList) == 0:
+            return np.zeros(0), np.zeros(0)
+
+        pairList = np.concatenate(pairList)
+
+        return pairList[:, 0] / 1000.0, pairList[:, 1] # eV to keV, barn
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def InputXSFromEndfb(self, ZList = None, indexPath = None):
+        """Input microscopic cross-sections from the MF=23 sections of the endfb library instead of the gnd library.
+        Reactions are named and ordered as in :meth:`InputXSFromGnd`.
+        If ``ZList`` is given, only the files of these elements are read.
+
+        The byte-offset index of the library is read from and written back to ``indexPath``,
+        by default ``photoatomic_endfb_index.json`` next to the library directory.
+
+        """
+        print("--> Input total microscopic cross-section (endfb)")
+
+        libraryIndex = endf_reader.EndfLibraryIndex(self.endfbDir, indexPath)
+
+        self.endfbFileList = self.GetFileList(self.endfbDir, ZList)
+        argList = [(os.path.join(self.endfbDir, fileName), libraryIndex.GetSectionIndex(fileName))
+                   for fileName in self.endfbFileList]
+
+        for fileName, (Z, symbol, xsArrayList, sectionIndex) in zip(self.endfbFileList, self.Map(ProcessEndfbXSFile, argList)):
+            libraryIndex.SetSectionIndex(fileName, sectionIndex)
+
+            self.AddXSArrayToElement(Z, symbol, xsArrayList)
+
+        libraryIndex.OutputIndex()
+
+    #------------------------------------------------------------
+    # Returns Z, symbol and a list of (xsName, (energy, microXS)) ordered as in Element.xsTable
+    #------------------------------------------------------------
+    def ReadXSFromEndfbFile(self, reader):
+        ZA, AWR = reader.ReadHead()
+        Z = int(ZA / 1000.0)
+        symbol = reader.ReadSymbol()
+
+        xsArrayList = []
+        for MF, MT in reader.GetSectionList(23):
+            if MT == 501:
+                xsName = "total_ref"
+            elif MT in self.endfbReactionNameTable.keys():
+                xsName = self.endfbReactionNameTable[MT].format(symbol)
+            elif 534 <= MT < 534 + len(self.endfbSubshellList):
+                xsName = "e- + {0:s}{{{1:s}}}".format(symbol, self.endfbSubshellList[MT - 534])
+            else:
+                continue
+
+            interpolationList, energyList, microXSList = reader.ReadTab1(MF, MT)
+            for NBT, INT in interpolationList:
+                if INT != 2:
+                    raise de.DuoException("--> Only lin-lin interpolation is supported.")
+
+            # drop points repeated verbatim, which the gnd library does not have
+            isKept = np.ones(len(energyList), dtype = bool)
+            isKept[1:] = (energyList[1:] != energyList[:-1]) | (microXSList[1:] != microXSList[:-1])
+
+            xsArrayList.append((xsName, (energyList[isKept] / 1000.0, microXSList[isKept]))) # eV to keV
+
+        # total first
+        xsArrayList.sort(key = lambda item: item[0] != "total_ref")
+
+        return Z, symbol, xsArrayList
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateChecksum(self):
+        """Calculate a checksum of both source directories.
+
+        The checksum is built from the name, size and modification time of every file,
+        so it is cheap to evaluate and changes whenever a library file is replaced.
+
+        """
+        sha = hashlib.sha1()
+
+        for dirPath in [self.endfbDir, self.gndDir]:
+            sha.update(os.path.basename(os.path.normpath(dirPath)).encode("utf-8"))
+
+            for fileName in sorted(os.listdir(dirPath)):
+                stat = os.stat(os.path.join(dirPath, fileName))
+                result = "{0:s}|{1:d}|{2:d}\n".format(fileName, stat.st_size, stat.st_mtime_ns)
+                sha.update(result.encode("utf-8"))
+
+        return sha.hexdigest()
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def OutputXSToCache(self, cachePath, xsSource = "gnd"):
+        """Write all elements, AWR/A values and cross-sections to a binary cache.
+
+        Cross-sections of all reactions are packed into two contiguous arrays,
+        ``energy`` and ``microXS``, indexed by ``reactionOffset``.
+
+        :param cachePath: Path of the ``.npz`` file.
+        :type cachePath: str.
+        :param xsSource: Library the cross-sections have been read from, "gnd" or "endfb".
+        :type xsSource: str.
+
+        """
+        print("--> Output cross-section cache")
+
+        ZList = sorted(self.elementList.keys())
+
+        reactionZList = []
+        reactionNameList = []
+        reactionOffsetList = [0]
+        energyList = []
+        microXSList = []
+
+        for Z in ZList:
+            element = self.elementList[Z]
+            for key, value in element.xsTable.items():
+                reactionZList.append(Z)
+                reactionNameList.append(key)
+                reactionOffsetList.append(reactionOffsetList[-1] + len(value))
+                energyList.append(value.energy)
+                microXSList.append(value.microXS)
+
+        # write to a temporary file first so that an interrupted run never leaves a broken cache
+        tempPath = cachePath + ".tmp"
+        with open(tempPath, "wb") as outfile:
+            np.savez(outfile,
+                     version = np.array(self.cacheVersion),
+                     checksum = np.array(self.CalculateChecksum()),
+                     source = np.array(xsSource),
+                     Z = np.array(ZList, dtype = np.int64),
+                     AWR = np.array([self.elementList[Z].AWR for Z in ZList], dtype = np.float64),
+                     A = np.array([self.elementList[Z].A for Z in ZList], dtype = np.float64),
+                     symbol = np.array([self.elementList[Z].symbol for Z in ZList]),
+                     reactionZ = np.array(reactionZList, dtype = np.int64),
+                     reactionName = np.array(reactionNameList),
+                     reactionOffset = np.array(reactionOffsetList, dtype = np.int64),
+                     energy = np.concatenate(energyList),
+                     microXS = np.concatenate(microXSList))
+
+        os.replace(tempPath, cachePath)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def InputXSFromCache(self, cachePath, xsSource = "gnd"):
+        """Read all elements from a binary cache written by :meth:`OutputXSToCache`.
+
+        :param cachePath: Path of the ``.npz`` file.
+        :type cachePath: str.
+        :param xsSource: Library the cross-sections must have been read from, "gnd" or "endfb".
+        :type xsSource: str.
+        :returns: True if the cache has been loaded, False if it is missing, stale or from another library.
+
+        """
+        if not os.path.isfile(cachePath):
+            return False
+
+        with np.load(cachePath, allow_pickle = False) as data:
+            if int(data["version"]) != self.cacheVersion or\
+               str(data["checksum"]) != self.CalculateChecksum() or\
+               str(data["source"]) != xsSource:
+                print("--> Cross-section cache is stale")
+                return False
+
+            print("--> Input cross-section cache")
+
+            for Z, AWR, A, symbol in zip(data["Z"].tolist(),
+                                         data["AWR"].tolist(),
+                                         data["A"].tolist(),
+                                         data["symbol"].tolist()):
+                element = duoelement.Element(Z)
+                element.AWR = AWR
+                element.A = A
+                element.symbol = symbol
+                self.elementList[Z] = element
+
+            reactionOffset = data["reactionOffset"].tolist()
+            energy = data["energy"]
+            microXS = data["microXS"]
+
+            for idx, (Z, xsName) in enumerate(zip(data["reactionZ"].tolist(), data["reactionName"].tolist())):
+                start = reactionOffset[idx]
+                stop = reactionOffset[idx + 1]
+
+                self.elementList[Z].xsTable[xsName] = duophotoatomic_xs.PhotoAtomicXSArray(energy[start : stop],
+                                                                                            microXS[start : stop])
+
+        for Z, element in self.elementList.items():
+            element.BuildReactionIndex()
+
+        return True
+
+    #------------------------------------------------------------
+    # Apply func to every item of argList, in a process pool if requested.
+    # The results are returned in the order of argList.
+    #------------------------------------------------------------
+    def Map(self, func, argList):
+        if self.numProcesses <= 1:
+            return [func(arg) for arg in argList]
+
+        chunkSize = max(1, len(argList) // (4 * self.numProcesses))
+        with concurrent.futures.ProcessPoolExecutor(max_workers = self.numProcesses) as executor:
+            return list(executor.map(func, argList, chunksize = chunkSize))
 
     #------------------------------------------------------------
     #------------------------------------------------------------
     def Show(self):
         for key, value in self.elementList.items():
             value.Show()
+
+#------------------------------------------------------------
+# Workers of the process pool. They are module-level functions so that
+# they can be pickled, and return plain data instead of Element objects.
+#------------------------------------------------------------
+def ProcessEndfbFile(fullPath):
+    return PhotoAtomicXSIOManager().ReadAWRFromEndfbFile(fullPath)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def ProcessGndFile(fullPath):
+    return PhotoAtomicXSIOManager().ReadXSFromGndFile(fullPath)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def ProcessEndfbXSFile(arg):
+    fullPath, sectionIndex = arg
+
+    reader = endf_reader.EndfReader(fullPath, sectionIndex)
+    Z, symbol, xsArrayList = PhotoAtomicXSIOManager().ReadXSFromEndfbFile(reader)
+
+    return Z, symbol, xsArrayList, reader.sectionIndex
@@ -1,6 +1,60 @@
 import os
 import os.path
 import numpy as np
+import duo.core.duo_exception as de
+import duo.core.constant as constant
+
+#------------------------------------------------------------
+# Read a spectrum file made of (energy in keV, intensity) lines,
+# lines starting with # are comment lines
+#------------------------------------------------------------
+def ReadSpectrumFile(fullFilePath):
+    energyList = []
+    intensityList = []
+    commentList = []
+
+    with open(fullFilePath, 'r') as myFile:
+        for line in myFile:
+            result = line.split()
+            if len(result) == 0: # empty line
+                continue
+            elif result[0] == '#': # line starting with # is a comment line
+                commentList.append(line.strip().lstrip('#').strip())
+            else: # data line
+                energy = float(result[0])
+                intensity = float(result[1])
+                energyList.append(energy)
+                intensityList.append(intensity)
+
+    # convert to numpy
+    return np.array(energyList), np.array(intensityList), commentList
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def CalculateSpectrumWeight(energyList, intensityList, weighting = "fluence", detectorResponseList = None):
+    """Unnormalized weight of each bin (last axis) of one or several spectra.
+
+    :param weighting: "fluence" to weight each bin by its number of photons (photon counting detector),
+        "energyFluence" by its energy fluence E * N (energy integrating detector).
+    :type weighting: str.
+    :param detectorResponseList: Detection efficiency of each bin, applied on top of ``weighting``.
+    :type detectorResponseList: array_like.
+
+    """
+    weightList = np.asarray(intensityList, dtype = np.float64)
+
+    if weighting == "energyFluence":
+        weightList = weightList * energyList
+    elif weighting != "fluence":
+        raise de.DuoException("--> Unknown spectrum weighting: {:s}".format(str(weighting)))
+
+    if detectorResponseList is not None:
+        detectorResponseList = np.asarray(detectorResponseList, dtype = np.float64)
+        if detectorResponseList.shape != np.shape(energyList):
+            raise de.DuoException("--> Detector response must have one value per spectrum bin.")
+        weightList = weightList * detectorResponseList
+
+    return weightList
 
 #------------------------------------------------------------
 #------------------------------------------------------------
@@ -16,26 +70,8 @@ class SpectrumManager:
     #------------------------------------------------------------
     #------------------------------------------------------------
     def ImportSpectrum(self, filePath):
-        self.energyList = []
-        self.intensityList = []
-
         fullFilePath = os.path.join(self.spectrumPath, filePath)
-        with open(fullFilePath, 'r') as myFile:
-            for line in myFile:
-                result = line.split()
-                if len(result) == 0: # empty line
-                    continue
-                elif result[0] == '#': # line starting with # is a comment line
-                    continue
-                else: # data line
-                    energy = float(result[0])
-                    intensity = float(result[1])
-                    self.energyList.append(energy)
-                    self.intensityList.append(intensity)
-
-        # convert to numpy
-        self.energyList = np.array(self.energyList)
-        self.intensityList = np.array(self.intensityList)
+        self.energyList, self.intensityList, commentList = ReadSpectrumFile(fullFilePath)
 
         # statistics
         up = np.sum(np.multiply(self.energyList, self.intensityList))
@@ -43,11 +79,203 @@ class SpectrumManager:
         self.effectiveEnergy = up / down
         print("--> effective energy = ", self.effectiveEnergy)
 
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CreateSpectralEngine(self, elementTable, weighting = "fluence", detectorResponseList = None, ZList = None):
+        """Create a :class:`SpectralEngine` for the spectrum imported last.
+
+        """
+        if len(self.energyList) == 0:
+            raise de.DuoException("--> No spectrum imported.")
+
+        return SpectralEngine(elementTable, self.energyList, self.intensityList,
+                              weighting = weighting, detectorResponseList = detectorResponseList, ZList = ZList)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+class SpectralEngine:
+    """Spectrum-weighted attenuation of materials, replacing the attenuation at a single effective energy.
+
+    The microscopic cross-sections of all elements of ``ZList`` are evaluated once at every bin of the spectrum,
+    so the effective attenuation of a material (or of a :class:`.MaterialBatch`) is one matrix product.
+
+    The effective attenuation coefficient is the weighted mean over the bins,
+    or, if a thickness t is given, the one of the transmitted beam, i.e. -ln(sum of w * exp(-mu * t)) / t,
+    which includes beam hardening.
+
+    :ivar numpy.ndarray energyList: Energies of the bins in keV, bins of zero weight removed.
+    :ivar numpy.ndarray weightList: Normalized weight of each bin.
+    :ivar numpy.ndarray ZList: Atomic numbers of the rows of ``xsTable``.
+    :ivar numpy.ndarray xsTable: Total microscopic cross-section in barn, shape (len(ZList), len(energyList)).
+    :ivar float muWater: Effective attenuation coefficient of water, set by :meth:`SetWaterAndAir`.
+    :ivar float muAir: Effective attenuation coefficient of air, set by :meth:`SetWaterAndAir`.
+
+    """
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __init__(self, elementTable, energyList, intensityList, weighting = "fluence", detectorResponseList = None, ZList = None):
+        """
+        :param elementTable: Element table.
+        :type elementTable: :class:`.ElementTable`.
+        :param energyList: Energies of the bins in keV.
+        :type energyList: array_like.
+        :param intensityList: Number of photons of each bin.
+        :type intensityList: array_like.
+        :param weighting: Weighting of the bins, see :func:`CalculateSpectrumWeight`.
+        :type weighting: str.
+        :param detectorResponseList: Detection efficiency of each bin.
+        :type detectorResponseList: array_like.
+        :param ZList: Atomic numbers of the elements to tabulate, all elements available by default.
+        :type ZList: iterable of int.
+
+        """
+        energyList = np.asarray(energyList, dtype = np.float64)
+        weightList = np.asarray(intensityList, dtype = np.float64)
+
+        if energyList.shape != weightList.shape:
+            raise de.DuoException("--> Energy and intensity of the spectrum must have the same length.")
+
+        weightList = CalculateSpectrumWeight(energyList, weightList, weighting, detectorResponseList)
 
+        # bins that do not contribute
+        mask = (weightList > 0.0) & (energyList > 0.0)
+        if not np.any(mask):
+            raise de.DuoException("--> Spectrum has no positive intensity.")
 
+        self.weighting = weighting
+        self.energyList = energyList[mask]
+        self.weightList = weightList[mask] / np.sum(weightList[mask])
 
+        if ZList is None:
+            ZList = elementTable.elementList.keys()
+        self.ZList = np.array(sorted(set(int(Z) for Z in ZList)), dtype = np.int64)
 
+        self.xsTable = elementTable.CalculateMicroXSAtEnergies("total", self.energyList, self.ZList)
 
+        self.muWater = None
+        self.muAir = None
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetEffectiveEnergy(self):
+        return float(np.dot(self.weightList, self.energyList))
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetRowIndex(self, ZList):
+        ZList = np.asarray(ZList)
+        rowIdx = np.searchsorted(self.ZList, ZList)
+
+        if np.any(rowIdx >= len(self.ZList)) or np.any(self.ZList[np.minimum(rowIdx, len(self.ZList) - 1)] != ZList):
+            raise de.DuoException("--> Element not tabulated in spectral engine.")
+
+        return rowIdx
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateEffectiveMicroXS(self, ZList = None):
+        """Spectrum-weighted total microscopic cross-section in barn of each element of ``ZList``, all tabulated ones by default.
 
+        """
+        if ZList is None:
+            return np.dot(self.xsTable, self.weightList)
 
+        return np.dot(self.xsTable[self.GetRowIndex(ZList), :], self.weightList)
 
+    #------------------------------------------------------------
+    # mac of each material at each bin, shape (numMaterial, numBin)
+    #------------------------------------------------------------
+    def CalculateMacListOfBatch(self, macWeightMatrix, ZList):
+        mac = np.dot(macWeightMatrix, self.xsTable[self.GetRowIndex(ZList), :])
+
+        mac *= constant.Endfb.Avogadro * 1e-24
+
+        return mac # unit: cm ^ 2 / g
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateMacList(self, mat):
+        """Mass attenuation coefficient of a committed material at every bin of the spectrum.
+
+        """
+        if not mat.isCommitted:
+            raise de.DuoException("--> Material not committed.")
+
+        return self.CalculateMacListOfBatch(mat.macWeightList.reshape(1, -1), mat.ZList)[0]
+
+    #------------------------------------------------------------
+    # reduce mu of each bin, shape (..., numBin), to the effective mu
+    #------------------------------------------------------------
+    def ReduceMu(self, muList, thickness = None):
+        if thickness is None:
+            return np.dot(muList, self.weightList)
+
+        # transmitted fraction, relative to the largest exponent to avoid underflow
+        exponent = -muList * thickness
+        maxExponent = np.max(exponent, axis = -1, keepdims = True)
+        transmission = np.dot(np.exp(exponent - maxExponent), self.weightList)
+
+        return -(np.log(transmission) + maxExponent[..., 0]) / thickness
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateEffectiveMac(self, mat):
+        return float(np.dot(self.CalculateMacList(mat), self.weightList))
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateEffectiveMu(self, mat, thickness = None):
+        """Spectrum-weighted linear attenuation coefficient of a material in 1 / cm.
+
+        :param mat: Committed material with a density.
+        :type mat: :class:`.Material`.
+        :param thickness: Thickness in cm to include beam hardening, None for the weighted mean over the bins.
+        :type thickness: float.
+
+        """
+        return float(self.ReduceMu(self.CalculateMacList(mat) * mat.density, thickness))
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateEffectiveMuOfBatch(self, batch, thickness = None):
+        """Spectrum-weighted linear attenuation coefficient of every material of a batch in 1 / cm.
+
+        :param batch: Materials with densities.
+        :type batch: :class:`.MaterialBatch`.
+        :returns: numpy.ndarray of shape (numMaterial,).
+
+        """
+        if batch.densityList is None:
+            raise de.DuoException("--> Density of materials not given.")
+
+        muList = self.CalculateMacListOfBatch(batch.macWeightMatrix, batch.ZList) * batch.densityList.reshape(-1, 1)
+
+        return self.ReduceMu(muList, thickness)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def SetWaterAndAir(self, water, air, thickness = None):
+        """Set the reference materials of :meth:`CalculateCTNumber`.
+
+        """
+        self.muWater = self.CalculateEffectiveMu(water, thickness)
+        self.muAir = self.CalculateEffectiveMu(air, thickness)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def ConvertMuToCTNumber(self, mu):
+        if self.muWater is None or self.muAir is None:
+            raise de.DuoException("--> Water and air not set in spectral engine.")
+
+        return (mu - self.muWater) / (self.muWater - self.muAir) * 1000.0
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateCTNumber(self, mat, thickness = None):
+        return float(self.ConvertMuToCTNumber(self.CalculateEffectiveMu(mat, thickness)))
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateCTNumberOfBatch(self, batch, thickness = None):
+        return self.ConvertMuToCTNumber(self.CalculateEffectiveMuOfBatch(batch, thickness))
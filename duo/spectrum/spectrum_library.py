@@ -0,0 +1,303 @@
+import os
+import os.path
+import hashlib
+import numpy as np
+import duo.core.duo_exception as de
+import duo.core.constant as constant
+import duo.core.material_batch as material_batch
+import duo.spectrum.spectrum as spectrum
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+class SpectrumLibrary:
+    """All spectra of the spectrum directory, resampled onto one shared energy grid.
+
+    The spectra are stored as one 2-D array (spectrum x bin), so that spectrum-weighted quantities
+    of many materials for all spectra are one matrix product.
+    On the first run the spectrum files are parsed and written to a binary cache
+    (``spectrum_library_cache.npz`` next to the spectrum directory by default),
+    which is reused until a spectrum file or the grid changes.
+
+    Each spectrum is resampled as a number of photons per bin: the photon density (intensity per keV)
+    is linearly interpolated and multiplied by the grid step, so that the total number of photons is kept.
+
+    :ivar numpy.ndarray energyList: Shared energy grid in keV.
+    :ivar numpy.ndarray intensityMatrix: Number of photons of each spectrum at each bin, shape (numSpectrum, len(energyList)).
+    :ivar list nameList: Name of each spectrum, i.e. its file name without extension.
+    :ivar list commentList: Comment lines of each spectrum file, joined by new lines.
+    :ivar numpy.ndarray effectiveEnergyList: Mean energy of each spectrum, from the original file.
+
+    """
+
+    # increment whenever the layout of the cache file changes
+    cacheVersion = 1
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __init__(self, dataPath, energyStep = 1.0, energyList = None, useCache = True, cachePath = None):
+        """
+        :param dataPath: Data directory containing the ``spectrum`` directory.
+        :type dataPath: str.
+        :param energyStep: Step of the shared grid in keV, the grid running from ``energyStep`` to the highest energy of all spectra.
+        :type energyStep: float.
+        :param energyList: Explicit shared grid in keV with a constant step, overrides ``energyStep``.
+        :type energyList: array_like.
+
+        """
+        self.spectrumPath = os.path.join(dataPath, "spectrum")
+
+        self.energyStep = energyStep
+        self.energyList = None
+        if energyList is not None:
+            self.energyList = np.asarray(energyList, dtype = np.float64)
+            if self.energyList.ndim != 1 or len(self.energyList) < 2 or np.any(np.diff(self.energyList) <= 0.0):
+                raise de.DuoException("--> Energy grid must contain at least 2 energies in strictly increasing order.")
+            self.energyStep = float(self.energyList[1] - self.energyList[0])
+
+        self.useCache = useCache
+        self.cachePath = cachePath
+        if self.cachePath is None:
+            self.cachePath = os.path.normpath(self.spectrumPath) + "_library_cache.npz"
+
+        self.intensityMatrix = None
+        self.nameList = []
+        self.commentList = []
+        self.effectiveEnergyList = None
+        self.checksum = None
+
+        self.Initialize()
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Initialize(self):
+        # before the default grid is built, which depends on the spectra
+        self.checksum = self.CalculateChecksum()
+
+        if self.useCache and self.InputCache():
+            return
+
+        self.InputSpectra()
+
+        if self.useCache:
+            try:
+                self.OutputCache()
+            except OSError as err:
+                print("--> Unable to write spectrum library cache: {:s}".format(str(err)))
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetFileList(self):
+        return sorted(fileName for fileName in os.listdir(self.spectrumPath) if fileName.endswith(".txt"))
+
+    #------------------------------------------------------------
+    # The checksum is built from the name, size and modification time of every
+    # spectrum file, and from the requested grid
+    #------------------------------------------------------------
+    def CalculateChecksum(self):
+        sha = hashlib.sha1()
+
+        for fileName in self.GetFileList():
+            stat = os.stat(os.path.join(self.spectrumPath, fileName))
+            result = "{0:s}|{1:d}|{2:d}\n".format(fileName, stat.st_size, stat.st_mtime_ns)
+            sha.update(result.encode("utf-8"))
+
+        sha.update("step|{0:s}\n".format(float(self.energyStep).hex()).encode("utf-8"))
+        if self.energyList is not None:
+            sha.update(self.energyList.tobytes())
+
+        return sha.hexdigest()
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def InputSpectra(self):
+        print("--> Input spectrum library")
+
+        fileList = self.GetFileList()
+        if len(fileList) == 0:
+            raise de.DuoException("--> No spectrum found in {:s}".format(self.spectrumPath))
+
+        spectrumList = []
+        for fileName in fileList:
+            energyList, intensityList, commentList = spectrum.ReadSpectrumFile(os.path.join(self.spectrumPath, fileName))
+            if len(energyList) < 2:
+                raise de.DuoException("--> Spectrum with less than 2 bins: {:s}".format(fileName))
+
+            spectrumList.append((energyList, intensityList))
+            self.nameList.append(os.path.splitext(fileName)[0])
+            self.commentList.append("\n".join(commentList))
+
+        if self.energyList is None:
+            maxEnergy = max(np.max(energyList) for energyList, intensityList in spectrumList)
+            numEnergy = int(np.ceil(maxEnergy / self.energyStep - 1e-9))
+            # rounded so that grid energies such as 60.0 keV are exact
+            self.energyList = np.round(np.arange(1, numEnergy + 1) * self.energyStep, 10)
+
+        self.intensityMatrix = np.empty((len(spectrumList), len(self.energyList)))
+        self.effectiveEnergyList = np.empty(len(spectrumList))
+
+        for idx, (energyList, intensityList) in enumerate(spectrumList):
+            # number of photons per keV
+            densityList = intensityList / np.gradient(energyList)
+            self.intensityMatrix[idx, :] = np.interp(self.energyList, energyList, densityList, left = 0.0, right = 0.0) * self.energyStep
+
+            self.effectiveEnergyList[idx] = np.sum(energyList * intensityList) / np.sum(intensityList)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def OutputCache(self):
+        print("--> Output spectrum library cache")
+
+        # write to a temporary file first so that an interrupted run never leaves a broken cache
+        tempPath = self.cachePath + ".tmp"
+        with open(tempPath, "wb") as outfile:
+            np.savez(outfile,
+                     version = np.array(self.cacheVersion),
+                     checksum = np.array(self.checksum),
+                     energy = self.energyList,
+                     intensity = self.intensityMatrix,
+                     name = np.array(self.nameList),
+                     comment = np.array(self.commentList),
+                     effectiveEnergy = self.effectiveEnergyList)
+
+        os.replace(tempPath, self.cachePath)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def InputCache(self):
+        if not os.path.isfile(self.cachePath):
+            return False
+
+        with np.load(self.cachePath, allow_pickle = False) as data:
+            if int(data["version"]) != self.cacheVersion or str(data["checksum"]) != self.checksum:
+                print("--> Spectrum library cache is stale")
+                return False
+
+            print("--> Input spectrum library cache")
+
+            self.energyList = data["energy"]
+            self.intensityMatrix = data["intensity"]
+            self.nameList = data["name"].tolist()
+            self.commentList = data["comment"].tolist()
+            self.effectiveEnergyList = data["effectiveEnergy"]
+
+        return True
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetIndex(self, name):
+        if name not in self.nameList:
+            raise de.DuoException("--> Spectrum not found: {:s}".format(str(name)))
+
+        return self.nameList.index(name)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetSpectrum(self, name):
+        """Get (energyList, intensityList) of a spectrum on the shared grid.
+
+        """
+        return self.energyList, self.intensityMatrix[self.GetIndex(name), :]
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetWeightMatrix(self, weighting = "fluence", detectorResponseList = None, nameList = None):
+        """Normalized weight of each bin of each spectrum, shape (numSpectrum, len(energyList)).
+
+        :param weighting: Weighting of the bins, see :func:`.CalculateSpectrumWeight`.
+        :type weighting: str.
+        :param detectorResponseList: Detection efficiency of each bin of the shared grid.
+        :type detectorResponseList: array_like.
+        :param nameList: Names of the spectra, all spectra by default.
+        :type nameList: list of str.
+
+        """
+        intensityMatrix = self.intensityMatrix
+        if nameList is not None:
+            intensityMatrix = intensityMatrix[[self.GetIndex(name) for name in nameList], :]
+
+        weightMatrix = spectrum.CalculateSpectrumWeight(self.energyList, intensityMatrix, weighting, detectorResponseList)
+
+        weightSumList = np.sum(weightMatrix, axis = 1, keepdims = True)
+        if np.any(weightSumList <= 0.0):
+            raise de.DuoException("--> Spectrum has no positive intensity.")
+
+        return weightMatrix / weightSumList
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CreateSpectralEngine(self, name, elementTable, weighting = "fluence", detectorResponseList = None, ZList = None):
+        """Create a :class:`.SpectralEngine` for one spectrum of the library.
+
+        """
+        energyList, intensityList = self.GetSpectrum(name)
+
+        return spectrum.SpectralEngine(elementTable, energyList, intensityList,
+                                       weighting = weighting, detectorResponseList = detectorResponseList, ZList = ZList)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateEffectiveMuOfBatch(self, elementTable, batch, thickness = None, weighting = "fluence",
+                                    detectorResponseList = None, nameList = None):
+        """Spectrum-weighted linear attenuation coefficient in 1 / cm of every material for every spectrum,
+        defined as in :class:`.SpectralEngine`.
+
+        :param elementTable: Element table.
+        :type elementTable: :class:`.ElementTable`.
+        :param batch: Materials with densities.
+        :type batch: :class:`.MaterialBatch`.
+        :param thickness: Thickness in cm to include beam hardening, None for the weighted mean over the bins.
+        :type thickness: float.
+        :returns: numpy.ndarray of shape (numMaterial, numSpectrum).
+
+        """
+        if batch.densityList is None:
+            raise de.DuoException("--> Density of materials not given.")
+
+        weightMatrix = self.GetWeightMatrix(weighting, detectorResponseList, nameList)
+
+        # bins of zero weight in every spectrum
+        mask = np.any(weightMatrix > 0.0, axis = 0)
+
+        xsTable = elementTable.CalculateMicroXSAtEnergies("total", self.energyList[mask], batch.ZList)
+
+        muList = np.dot(batch.macWeightMatrix, xsTable)
+        muList *= constant.Endfb.Avogadro * 1e-24 * batch.densityList.reshape(-1, 1)
+
+        if thickness is None:
+            return np.dot(muList, weightMatrix[:, mask].T)
+
+        # transmitted fraction, relative to the largest exponent of each material to avoid underflow
+        exponent = -muList * thickness
+        maxExponent = np.max(exponent, axis = 1, keepdims = True)
+        transmission = np.dot(np.exp(exponent - maxExponent), weightMatrix[:, mask].T)
+
+        return -(np.log(transmission) + maxExponent) / thickness
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateCTNumberOfBatch(self, elementTable, batch, water, air, thickness = None, weighting = "fluence",
+                                 detectorResponseList = None, nameList = None):
+        """Spectrum-weighted CT number of every material for every spectrum, shape (numMaterial, numSpectrum).
+
+        :param water: Committed water, with its density.
+        :type water: :class:`.Material`.
+        :param air: Committed air, with its density.
+        :type air: :class:`.Material`.
+
+        """
+        reference = material_batch.MaterialBatch.FromMaterialList(elementTable, [water, air])
+        muReference = self.CalculateEffectiveMuOfBatch(elementTable, reference, thickness, weighting, detectorResponseList, nameList)
+        muWater = muReference[0, :]
+        muAir = muReference[1, :]
+
+        mu = self.CalculateEffectiveMuOfBatch(elementTable, batch, thickness, weighting, detectorResponseList, nameList)
+
+        return (mu - muWater) / (muWater - muAir) * 1000.0
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Show(self):
+        print("--> Spectrum library: {:d} spectra, {:d} bins from {:f} to {:f} keV".format(
+              len(self.nameList), len(self.energyList), self.energyList[0], self.energyList[-1]))
+        for name, effectiveEnergy in zip(self.nameList, self.effectiveEnergyList):
+            print("    {:20s} effective energy = {:f}".format(name, effectiveEnergy))
@@ -144,14 +144,11 @@ class ReproducedAbbemaCoeffCalculator(AbbemaCoeffCalculator):
         element = self.elementTable.elementList[Z]
 
         # PE: get b
-        xs_pe_list = []
         startEnergy = 50.0
         stopEnergy = 100.0
         numPoints = 100
         energy_pe_list = np.linspace(startEnergy, stopEnergy, numPoints)
-        for energy in energy_pe_list:
-            xsPE = element.CalculatePEMicroXSAtE(energy)
-            xs_pe_list.append(xsPE)
+        xs_pe_list = element.CalculateMicroXSAtEnergies("pe", energy_pe_list)
 
         result = scipy.optimize.curve_fit(lambda x, b, t : t * np.power(x, -b),
                     energy_pe_list,
@@ -166,12 +163,10 @@ class ReproducedAbbemaCoeffCalculator(AbbemaCoeffCalculator):
 
 
         # CS: get j
-        energy_cs_list = []
-        xs_cs_list = []
-        for xs in element.GetCSList():
-            if xs.energy >= startEnergy and xs.energy <= stopEnergy:
-                energy_cs_list.append(xs.energy)
-                xs_cs_list.append(xs.microXS)
+        xsList = element.GetCSList()
+        isInRange = (xsList.energy >= startEnergy) & (xsList.energy <= stopEnergy)
+        energy_cs_list = xsList.energy[isInRange]
+        xs_cs_list = xsList.microXS[isInRange]
 
         # initial guess from Cai's draft paper
         t_init = 0.688 * np.power(Z, 0.928)
@@ -190,12 +185,10 @@ class ReproducedAbbemaCoeffCalculator(AbbemaCoeffCalculator):
             fit_xs_cs_list.append(y)
 
         # RL: get f
-        energy_rl_list = []
-        xs_rl_list = []
-        for xs in element.GetRLList():
-            if xs.energy >= startEnergy and xs.energy <= stopEnergy:
-                energy_rl_list.append(xs.energy)
-                xs_rl_list.append(xs.microXS)
+        xsList = element.GetRLList()
+        isInRange = (xsList.energy >= startEnergy) & (xsList.energy <= stopEnergy)
+        energy_rl_list = xsList.energy[isInRange]
+        xs_rl_list = xsList.microXS[isInRange]
 
         result = scipy.optimize.curve_fit(lambda x, f, t : t * np.power(x, -f),
                     energy_rl_list,
@@ -233,23 +226,11 @@ class ReproducedAbbemaCoeffCalculator(AbbemaCoeffCalculator):
 
         energy = (51.93 + 69.28) / 2.0
 
-        xs_pe_list = []
-        xs_cs_list = []
-        xs_rl_list = []
-
         ZList = np.arange(startZ, stopZ + 1)
 
-        for Z in ZList:
-            element = self.elementTable.elementList[Z]
-
-            xsPE = element.CalculatePEMicroXSAtE(energy)
-            xs_pe_list.append(xsPE)
-
-            xsCS = element.CalculateCSMicroXSAtE(energy)
-            xs_cs_list.append(xsCS)
-
-            xsRL = element.CalculateRLMicroXSAtE(energy)
-            xs_rl_list.append(xsRL)
+        xs_pe_list = self.elementTable.CalculateMicroXSAtE("pe", energy, ZList)
+        xs_cs_list = self.elementTable.CalculateMicroXSAtE("cs", energy, ZList)
+        xs_rl_list = self.elementTable.CalculateMicroXSAtE("rl", energy, ZList)
 
         result = scipy.optimize.curve_fit(lambda x, c, t : t * np.power(x, c),
                     ZList,
@@ -394,18 +375,10 @@ class ImprovedAbbemaCoeffCalculator(AbbemaCoeffCalculator):
         numPoints = 100
         energyList = np.linspace(startEnergy, stopEnergy, numPoints)
 
-        ZFullList = []
-        energyFullList = []
-        xsFullList = []
-
-        for Z in ZList:
-            element = self.elementTable.elementList[Z]
-            for energy in energyList:
-                ZFullList.append(Z)
-                energyFullList.append(energy)
-
-                xs = element.CalculatePEMicroXSAtE(energy)
-                xsFullList.append(xs)
+        # one row per Z, one column per energy
+        ZFullList = np.repeat(ZList, len(energyList))
+        energyFullList = np.tile(energyList, len(ZList))
+        xsFullList = self.elementTable.CalculateMicroXSAtEnergies("pe", energyList, ZList).ravel()
 
 
         result = scipy.optimize.curve_fit(FuncPE,
@@ -427,18 +400,10 @@ class ImprovedAbbemaCoeffCalculator(AbbemaCoeffCalculator):
         numPoints = 100
         energyList = np.linspace(startEnergy, stopEnergy, numPoints)
 
-        ZFullList = []
-        energyFullList = []
-        xsFullList = []
-
-        for Z in ZList:
-            element = self.elementTable.elementList[Z]
-            for energy in energyList:
-                ZFullList.append(Z)
-                energyFullList.append(energy)
-
-                xs = element.CalculateCSMicroXSAtE(energy)
-                xsFullList.append(xs)
+        # one row per Z, one column per energy
+        ZFullList = np.repeat(ZList, len(energyList))
+        energyFullList = np.tile(energyList, len(ZList))
+        xsFullList = self.elementTable.CalculateMicroXSAtEnergies("cs", energyList, ZList).ravel()
 
         # initial guess from Cai's draft paper
         h_init = 0.688
@@ -464,18 +429,10 @@ class ImprovedAbbemaCoeffCalculator(AbbemaCoeffCalculator):
         numPoints = 100
         energyList = np.linspace(startEnergy, stopEnergy, numPoints)
 
-        ZFullList = []
-        energyFullList = []
-        xsFullList = []
-
-        for Z in ZList:
-            element = self.elementTable.elementList[Z]
-            for energy in energyList:
-                ZFullList.append(Z)
-                energyFullList.append(energy)
-
-                xs = element.CalculateRLMicroXSAtE(energy)
-                xsFullList.append(xs)
+        # one row per Z, one column per energy
+        ZFullList = np.repeat(ZList, len(energyList))
+        energyFullList = np.tile(energyList, len(ZList))
+        xsFullList = self.elementTable.CalculateMicroXSAtEnergies("rl", energyList, ZList).ravel()
 
 
         result = scipy.optimize.curve_fit(FuncRL,
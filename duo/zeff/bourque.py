@@ -7,6 +7,7 @@ import numpy.polynomial.polynomial as poly
 import scipy.interpolate as interpolate
 import duo.zeff.common as common
 import duo.core.duo_exception as de
+import duo.core.material_batch as material_batch
 
 #------------------------------------------------------------
 #------------------------------------------------------------
@@ -32,13 +33,23 @@ class Bourque:
         :ivar bcc: Bourque coefficient calculator object.
         :ivar dList: Parameters of DER(Z) polynomial curve fitting.
         :ivar bs: Parameters of Z(DER) B-spline curve fitting.
+        :ivar useLookupTable: Fast mode, where images are answered from a dense table of Z(DER)
+            instead of ``bs``, see :meth:`BuildLookupTable`.
+        :ivar lookupTableMaxError: Upper bound of the difference in Z between the table and ``bs``.
     """
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def __init__(self, com, method = "bspline"):
+    def __init__(self, com, method = "bspline", useLookupTable = False, lookupTableSize = 65536, useFloat32 = False):
         """Initialization method.
 
+        :param useLookupTable: Answer images from a dense table of Z(DER), see :meth:`BuildLookupTable`.
+        :type useLookupTable: bool.
+        :param lookupTableSize: Number of DER values of the table.
+        :type lookupTableSize: int.
+        :param useFloat32: Compute images in single precision in fast mode, which halves the memory traffic.
+        :type useFloat32: bool.
+
         """
         self.elementTable = com.elementTable
         self.method = method
@@ -67,6 +78,23 @@ class Bourque:
         self.Ehigh = 0.0
         self.Elow = 0.0
 
+        # ratio of mac of water at Ehigh and Elow, which normalizes DER
+        self.waterMacRatio = None
+
+        # spectral engines of the low and high kVp spectra, in polychromatic mode only
+        self.lowEngine = None
+        self.highEngine = None
+
+        # fast mode
+        self.useLookupTable = useLookupTable
+        self.lookupTableSize = lookupTableSize
+        self.lookupDtype = np.float32 if useFloat32 else np.float64
+        self.lookupZList = None
+        self.lookupSlopeList = None
+        self.lookupScale = 0.0
+        self.lookupOffset = 0.0
+        self.lookupTableMaxError = None
+
         # construct water material
         self.water = material.Material("Water", self.com.elementTable)
         self.water.AddElement(1 , weightFraction =  0.111894)
@@ -108,9 +136,9 @@ class Bourque:
         #------------------------------------------------------------
         # polynomial parameterization
         #------------------------------------------------------------
-        self.bcc.ParameterizeAtE(energy)
+        param = self.bcc.ParameterizeAtE(energy)
 
-        results = self.bcc.FindRoots(my_xs_tt)
+        results = self.bcc.FindRoots(param, my_xs_tt)
 
         root = -1.0
         allRoots = []
@@ -127,17 +155,47 @@ class Bourque:
 
         return root
 
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateZeffAtEForXSList(self, xsList, energy, refine = False):
+        """Batched :meth:`CalculateZeffAtE`, given the electron cross-section of many materials.
+        Instead of raising an exception, a material whose root is not found gets Zeff = -1 and status False.
+
+        :param xsList: Electron cross-section of each material.
+        :type xsList: array_like.
+        :param energy: Photon energy in keV.
+        :type energy: float.
+        :param refine: With method "bspline", refine the roots by bisection instead of interpolating in the inverse table.
+        :type refine: bool.
+        :returns: (ZeffList, statusList).
+
+        """
+        param = self.bcc.ParameterizeAtE(energy)
+
+        return self.bcc.FindRootBatch(param, xsList, upperBound = 100.0, refine = refine)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateZeffAtEForMaterialList(self, materialList, energy, refine = False):
+        """Batched :meth:`CalculateZeffAtE`, see :meth:`CalculateZeffAtEForXSList`.
+
+        :param materialList: Committed materials.
+        :type materialList: list of :class:`.Material`.
+
+        """
+        batch = material_batch.MaterialBatch.FromMaterialList(self.elementTable, materialList)
+
+        return self.CalculateZeffAtEForXSList(batch.CalculateElectronXSAtE(energy), energy, refine)
+
     #------------------------------------------------------------
     #------------------------------------------------------------
     def CalculateDualEnergyRatio(self, Ehigh, Elow, Z):
         """Given Ehigh, Elow, Z, calculate DER using parametric equation of exs in Z
 
         """
-        self.bcc.ParameterizeAtE(Elow)
-        exs_low = self.bcc.CalculateElectronXS(Z)
+        exs_low = self.bcc.CalculateElectronXS(self.bcc.ParameterizeAtE(Elow), Z)
 
-        self.bcc.ParameterizeAtE(Ehigh)
-        exs_high = self.bcc.CalculateElectronXS(Z)
+        exs_high = self.bcc.CalculateElectronXS(self.bcc.ParameterizeAtE(Ehigh), Z)
 
         der = exs_low / exs_high
 
@@ -166,6 +224,10 @@ class Bourque:
         self.Ehigh = Ehigh
         self.Elow = Elow
 
+        # monochromatic mode, references of CT numbers are those of Common
+        self.lowEngine = None
+        self.highEngine = None
+
         derList = []
         ZList = np.arange(1, 36 + 1)
 
@@ -173,6 +235,56 @@ class Bourque:
             der = self.CalculateDualEnergyRatio(self.Ehigh, self.Elow, Z)
             derList.append(der)
 
+        self.waterMacRatio = self.water.CalculateMacAtE(self.Ehigh) / self.water.CalculateMacAtE(self.Elow)
+
+        self.FitDualEnergyRatioAndZ(ZList, derList)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def ParameterizeDualEnergyRatioAndZWithSpectra(self, lowSpectrum, highSpectrum, weighting = "fluence"):
+        """
+        Polychromatic version of :meth:`ParameterizeDualEnergyRatioAndZ`, using the actual low and high kVp spectra
+        instead of one mean energy each.
+
+        The electron cross-sections of Z = 1 ~ 36 are weighted by each spectrum
+        (see :class:`.SpectralEngine`), which takes one matrix-vector product per spectrum.
+        The tabulated cross-sections are used directly, without the fitting of the Bourque coefficient calculator.
+
+        :param lowSpectrum: Spectrum manager with the low kVp spectrum imported.
+        :type lowSpectrum: :class:`.SpectrumManager`.
+        :param highSpectrum: Spectrum manager with the high kVp spectrum imported.
+        :type highSpectrum: :class:`.SpectrumManager`.
+        :param weighting: Weighting of the spectrum bins, see :class:`.SpectralEngine`.
+        :type weighting: str.
+        """
+        ZList = np.arange(1, 36 + 1)
+
+        self.lowEngine = lowSpectrum.CreateSpectralEngine(self.elementTable, weighting = weighting, ZList = ZList)
+        self.highEngine = highSpectrum.CreateSpectralEngine(self.elementTable, weighting = weighting, ZList = ZList)
+
+        self.Elow = self.lowEngine.GetEffectiveEnergy()
+        self.Ehigh = self.highEngine.GetEffectiveEnergy()
+
+        exs_low = self.lowEngine.CalculateEffectiveMicroXS(ZList) / ZList
+        exs_high = self.highEngine.CalculateEffectiveMicroXS(ZList) / ZList
+
+        # references of CT numbers, air as in Common
+        self.lowEngine.SetWaterAndAir(self.water, self.com.air)
+        self.highEngine.SetWaterAndAir(self.water, self.com.air)
+
+        # water density is 1
+        self.waterMacRatio = self.highEngine.muWater / self.lowEngine.muWater
+
+        derList = exs_low / exs_high * self.waterMacRatio
+
+        self.FitDualEnergyRatioAndZ(ZList, derList)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def FitDualEnergyRatioAndZ(self, ZList, derList):
+        """Fit DER as a function of Z (``dList``) and Z as a function of DER (``bs``).
+
+        """
         self.dList = poly.polyfit(ZList, derList, 9)
 
         self.derMax = np.amax(derList)
@@ -193,6 +305,46 @@ class Bourque:
 
         self.bs = interpolate.BSpline(t, c, k, extrapolate = True)
 
+        if self.useLookupTable:
+            self.BuildLookupTable()
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def BuildLookupTable(self):
+        """Tabulate Z(DER) of ``bs`` on ``lookupTableSize`` equally spaced DER in [derMin, derMax],
+        so that the Z of an image is one linear interpolation per pixel, without any search.
+
+        Linear interpolation of a function with a continuous second derivative is off by at most
+        h ^ 2 / 8 * max(abs(Z'')) on a grid of step h. The second derivative of the cubic ``bs`` is linear between knots,
+        so its maximum is taken at the knots and the bound ``lookupTableMaxError`` is exact to compute.
+        In single precision, the rounding of DER, i.e. 8 * eps * derMax * max(abs(Z')), and of Z are added;
+        this does not cover pixels close to air, where mu itself loses precision when converted from CT numbers.
+        With the default size, the bound is a few 1e-6 in double precision and about 1e-3 in single precision,
+        using the ENDFB library.
+
+        """
+        derGridList = np.linspace(self.derMin, self.derMax, self.lookupTableSize)
+        ZGridList = self.bs(derGridList)
+        step = derGridList[1] - derGridList[0]
+
+        # der is mapped to the fractional index (der - derMin) / step
+        self.lookupScale = 1.0 / step
+        self.lookupOffset = self.derMin / step
+
+        self.lookupZList = ZGridList.astype(self.lookupDtype)
+        self.lookupSlopeList = np.diff(ZGridList).astype(self.lookupDtype)
+
+        knotList = np.clip(self.bs.t, self.derMin, self.derMax)
+        maxCurvature = np.amax(np.abs(self.bs.derivative(2)(knotList)))
+        self.lookupTableMaxError = step * step / 8.0 * maxCurvature
+
+        if self.lookupDtype == np.float32:
+            eps = np.finfo(np.float32).eps
+            maxSlope = np.amax(np.abs(self.lookupSlopeList)) / step
+            self.lookupTableMaxError += 8.0 * eps * self.derMax * maxSlope + 2.0 * eps * np.amax(np.abs(ZGridList))
+
+        print("    lookup table max error = ", self.lookupTableMaxError)
+
     #------------------------------------------------------------
     #------------------------------------------------------------
     def CalculateDualEnergyRatio2(self, Z):
@@ -206,19 +358,57 @@ class Bourque:
         # return poly.polyval(der, self.fList)
         return self.bs(der)
 
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetWaterAndAir(self):
+        """Get mu of water and air at high and low kVp, which define the CT numbers.
+
+        """
+        if self.lowEngine is not None:
+            # polychromatic mode
+            return self.highEngine.muWater, self.highEngine.muAir, self.lowEngine.muWater, self.lowEngine.muAir
+
+        return self.com.muWater_Ehigh, self.com.muAir_Ehigh, self.com.muWater_Elow, self.com.muAir_Elow
+
     #------------------------------------------------------------
     #------------------------------------------------------------
     def CalculateGivenCTNumber(self, imageHighKVP, imageLowKVP):
-        muHighKVP = self.com.ConvertCTNumberToMu(imageHighKVP, self.com.muWater_Ehigh, self.com.muAir_Ehigh)
-        muLowKVP  = self.com.ConvertCTNumberToMu(imageLowKVP , self.com.muWater_Elow , self.com.muAir_Elow )
+        muWaterHigh, muAirHigh, muWaterLow, muAirLow = self.GetWaterAndAir()
+
+        if self.useLookupTable:
+            dtype = self.lookupDtype
+            shape = np.broadcast(imageHighKVP, imageLowKVP).shape
+
+            # CT numbers to mu in copies of the images, in the precision of the table
+            muHighKVP = np.array(imageHighKVP, dtype = dtype, copy = True, ndmin = 1)
+            muHighKVP *= dtype((muWaterHigh - muAirHigh) / 1000.0)
+            muHighKVP += dtype(muWaterHigh)
+            muLowKVP = np.array(imageLowKVP, dtype = dtype, copy = True, ndmin = 1)
+            muLowKVP *= dtype((muWaterLow - muAirLow) / 1000.0)
+            muLowKVP += dtype(muWaterLow)
+
+            return self.LookupDualEnergyRatio(muHighKVP, muLowKVP, shape)
+
+        muHighKVP = self.com.ConvertCTNumberToMu(imageHighKVP, muWaterHigh, muAirHigh)
+        muLowKVP  = self.com.ConvertCTNumberToMu(imageLowKVP , muWaterLow , muAirLow )
 
         return self.Calculate(muHighKVP, muLowKVP)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
     def Calculate(self, muHighKVP, muLowKVP):
+        if self.waterMacRatio is None:
+            raise de.DuoException("--> Bourque: DER and Z not parameterized.")
+
+        if self.useLookupTable:
+            shape = np.broadcast(muHighKVP, muLowKVP).shape
+
+            return self.LookupDualEnergyRatio(np.array(muHighKVP, dtype = self.lookupDtype, copy = True, ndmin = 1),
+                                              np.array(muLowKVP, dtype = self.lookupDtype, copy = True, ndmin = 1),
+                                              shape)
+
         derList = muLowKVP / muHighKVP
-        derList *= self.water.CalculateMacAtE(self.Ehigh) / self.water.CalculateMacAtE(self.Elow)
+        derList *= self.waterMacRatio
 
         print("--> before clamp")
         print("    der max = ", np.amax(derList))
@@ -239,27 +429,78 @@ class Bourque:
         print("    der max = ", np.amax(derList))
         print("    der min = ", np.amin(derList))
 
+        # out-of-range data are already clamped
         imageZeff = self.bs(derList)
 
-        # adjust out-of-range data
-        upperBoundZ = self.bs(self.derMax)
-        lowerBoundZ = self.bs(self.derMin)
+        return imageZeff
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def LookupDualEnergyRatio(self, muHighKVP, muLowKVP, shape):
+        """Z of muLowKVP / muHighKVP from the table, both arrays of the table precision and owned by the caller.
+        The ratio is taken in place when the shapes allow it. The result has the given shape, a scalar for ().
+
+        """
+        if muLowKVP.shape == np.broadcast(muHighKVP, muLowKVP).shape:
+            derList = np.divide(muLowKVP, muHighKVP, out = muLowKVP)
+        else:
+            derList = np.divide(muLowKVP, muHighKVP)
 
-        imageZeff = np.where(derList > self.derMax, upperBoundZ, imageZeff)
-        imageZeff = np.where(derList < self.derMin, lowerBoundZ, imageZeff)
+        return self.LookupZeffInPlace(derList).reshape(shape)[()]
 
-        return imageZeff
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def LookupZeff(self, derList):
+        """Fast mode of :meth:`Calculate`: Z of the unnormalized DER muLowKVP / muHighKVP of every pixel,
+        clamped to [derMin, derMax] as in :meth:`Calculate`, from the table of :meth:`BuildLookupTable`.
+        NaN stays NaN.
+
+        :param derList: Unnormalized DER, a scalar or an array of any shape. It is not modified.
+        :returns: Z in the precision of the table, of the shape of ``derList``, a scalar for a scalar.
+
+        """
+        shape = np.shape(derList)
+
+        return self.LookupZeffInPlace(np.array(derList, dtype = self.lookupDtype, copy = True, ndmin = 1)).reshape(shape)[()]
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def LookupZeffInPlace(self, derList):
+        """:meth:`LookupZeff` on an array of at least one dimension in the precision of the table,
+        overwritten with the result.
+
+        """
+        if self.lookupZList is None:
+            raise de.DuoException("--> Bourque: lookup table not built.")
+
+        dtype = self.lookupDtype
+
+        # fractional index in the table, water normalization included
+        with np.errstate(invalid = "ignore"):
+            derList *= dtype(self.waterMacRatio * self.lookupScale)
+            derList -= dtype(self.lookupOffset)
+            np.clip(derList, 0.0, len(self.lookupZList) - 1, out = derList)
+            idxList = derList.astype(np.int32)
+
+        # fraction within the cell
+        np.subtract(derList, idxList, out = derList, casting = "unsafe")
+
+        # the last grid point has no cell, its fraction is 0
+        derList *= np.take(self.lookupSlopeList, idxList, mode = "clip")
+        derList += np.take(self.lookupZList, idxList, mode = "clip")
+
+        return derList
 
     #------------------------------------------------------------
     #------------------------------------------------------------
     def EvaluateSpline(self, mat, energy, Z):
         """Debugging purpose
         """
-        self.bcc.ParameterizeAtE(energy)
+        param = self.bcc.ParameterizeAtE(energy)
 
         my_xs_tt = mat.CalculateElectronXSAtE(energy)
 
-        result = self.bcc.EvaluateSpline(my_xs_tt, Z)
+        result = self.bcc.EvaluateSpline(param, my_xs_tt, Z)
 
         msg = "Cubic B-Spline evaluation = {:.16}, xs_tt = {:.16}".format(result, my_xs_tt)
         print(msg)
@@ -6,6 +6,8 @@ import duo.core.material as material
 import numpy.polynomial.polynomial as poly
 import numpy.polynomial.chebyshev as chebyshev
 import scipy.interpolate as interpolate
+import duo.zeff.parameterization_cache as parameterization_cache
+import duo.zeff.root_finder as root_finder
 
 #------------------------------------------------------------
 #------------------------------------------------------------
@@ -13,6 +15,9 @@ class BourqueCoeffCalculator:
     """Class that manages the parameters of Bourque's formalism,
     using polynomial for curve fitting.
 
+    The calculator holds no state of its own: :meth:`ParameterizeAtE` returns an immutable :class:`.Parameterization`,
+    which is passed explicitly to the other methods, so one calculator can be used from several threads at different energies.
+
     """
 
 
@@ -21,50 +26,73 @@ class BourqueCoeffCalculator:
     def __init__(self, elementTable):
         self.elementTable = elementTable
 
-        self.aList = []
-
     #------------------------------------------------------------
     #------------------------------------------------------------
     def ParameterizeAtE(self, energy):
-        """Calculate parameters at the given photon energy
+        """Calculate parameters at the given photon energy.
+        Fits are kept in the :class:`.ParameterizationCache` of the element table, so a repeated energy is not fitted again.
 
         :param energy: Photon energy in keV.
         :type energy: float.
+        :returns: :class:`.Parameterization`.
 
         """
         ZList = np.arange(1, 52 + 1)
 
-        xs_list = []
-        for Z in ZList:
-            element = self.elementTable.elementList[Z]
-            xs = element.CalculateElectronXSAtE(energy)
-            xs_list.append(xs)
+        return parameterization_cache.GetCache(self.elementTable).GetOrFit(self, energy, ZList, lambda: self.Fit(energy, ZList))
 
-        self.aList = poly.polyfit(ZList, xs_list, 9)
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Fit(self, energy, ZList):
+        xs_list = self.elementTable.CalculateElectronXSAtE(energy, ZList)
 
+        return parameterization_cache.Parameterization(aList = poly.polyfit(ZList, xs_list, 9))
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def CalculateElectronXS(self, Z):
+    def CalculateElectronXS(self, param, Z):
         """Given Z, calculate electron microscopic cross-section.
-        This method must be used after a call to :meth:`~ParameterizeAtE`,
-        which calculates parameters based on the given energy.
 
+        :param param: Parameterization returned by :meth:`~ParameterizeAtE` at the energy of interest.
+        :type param: :class:`.Parameterization`.
         :param Z: Atomic number.
         :type Z: int.
 
         """
-        return poly.polyval(Z, self.aList)
+        return poly.polyval(Z, param.aList)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def FindRoots(self, my_xs_tt):
-        coeffList = np.copy(self.aList)
+    def FindRoots(self, param, my_xs_tt):
+        coeffList = np.copy(param.aList)
         coeffList[0] -= my_xs_tt
         results = poly.polyroots(coeffList)
 
         return results
 
+    #------------------------------------------------------------
+    # same matrix as poly.polyroots
+    #------------------------------------------------------------
+    def GetCompanionMatrix(self, coeffList):
+        return poly.polycompanion(coeffList)[::-1, ::-1]
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def FindRootBatch(self, param, xsList, upperBound = None, refine = False):
+        """Smallest real root in (0, upperBound] of electron cross-section(Z) = xs, for each xs of ``xsList``.
+        The companion matrices of all targets are solved as one stack.
+
+        :param param: Parameterization returned by :meth:`ParameterizeAtE`.
+        :type param: :class:`.Parameterization`.
+        :param refine: Unused, the roots of polynomials are already exact.
+        :type refine: bool.
+        :returns: (ZList, statusList), where ZList is -1 wherever statusList is False.
+
+        """
+        rootList = root_finder.CalculatePolynomialRootsBatch(self.GetCompanionMatrix, param.aList, xsList)
+
+        return root_finder.SelectRoots(rootList, upperBound)
+
 #------------------------------------------------------------
 #------------------------------------------------------------
 class ChebyshevBourqueCoeffCalculator(BourqueCoeffCalculator):
@@ -80,31 +108,31 @@ class ChebyshevBourqueCoeffCalculator(BourqueCoeffCalculator):
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def ParameterizeAtE(self, energy):
-        ZList = np.arange(1, 52 + 1)
-
-        xs_list = []
-        for Z in ZList:
-            element = self.elementTable.elementList[Z]
-            xs = element.CalculateElectronXSAtE(energy)
-            xs_list.append(xs)
+    def Fit(self, energy, ZList):
+        xs_list = self.elementTable.CalculateElectronXSAtE(energy, ZList)
 
-        self.aList = chebyshev.chebfit(ZList, xs_list, 9)
+        return parameterization_cache.Parameterization(aList = chebyshev.chebfit(ZList, xs_list, 9))
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def CalculateElectronXS(self, Z):
-        return chebyshev.chebval(Z, self.aList)
+    def CalculateElectronXS(self, param, Z):
+        return chebyshev.chebval(Z, param.aList)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def FindRoots(self, my_xs_tt):
-        coeffList = np.copy(self.aList)
+    def FindRoots(self, param, my_xs_tt):
+        coeffList = np.copy(param.aList)
         coeffList[0] -= my_xs_tt
         results = chebyshev.chebroots(coeffList)
 
         return results
 
+    #------------------------------------------------------------
+    # same matrix as chebyshev.chebroots
+    #------------------------------------------------------------
+    def GetCompanionMatrix(self, coeffList):
+        return chebyshev.chebcompanion(coeffList)[::-1, ::-1]
+
 #------------------------------------------------------------
 #------------------------------------------------------------
 class BSplineBourqueCoeffCalculator(BourqueCoeffCalculator):
@@ -116,18 +144,11 @@ class BSplineBourqueCoeffCalculator(BourqueCoeffCalculator):
     #------------------------------------------------------------
     def __init__(self, elementTable):
         super().__init__(elementTable)
-        self.bs = None # b-spline object
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def ParameterizeAtE(self, energy):
-        ZList = np.arange(1, 52 + 1)
-
-        xs_list = []
-        for Z in ZList:
-            element = self.elementTable.elementList[Z]
-            xs = element.CalculateElectronXSAtE(energy)
-            xs_list.append(xs)
+    def Fit(self, energy, ZList):
+        xs_list = self.elementTable.CalculateElectronXSAtE(energy, ZList)
 
         # find the B-spline representation of 1-D curve
         (t, c, k) = interpolate.splrep(ZList, xs_list, k = 3)
@@ -135,37 +156,65 @@ class BSplineBourqueCoeffCalculator(BourqueCoeffCalculator):
         # the B-spline coefficients
         # the degree of the spline
 
-        self.bs = interpolate.BSpline(t, c, k, extrapolate = True)
+        return parameterization_cache.Parameterization(t = t, c = c, k = int(k))
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetBSpline(self, param):
+        """B-spline object of ``param``, built once per parameterization.
+
+        """
+        return param.GetDerived("bspline", lambda: interpolate.BSpline(param.t, param.c, param.k, extrapolate = True))
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def CalculateElectronXS(self, Z):
-        return self.bs(Z)
+    def CalculateElectronXS(self, param, Z):
+        return self.GetBSpline(param)(Z)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def FindRoots(self, my_xs_tt):
-        """Known issue: for single-element material Z=1 (H, H2, H3 ...), interpolate.sproot()
-        is somehow unable to find the root where Z=1
+    def GetInverseTable(self, param):
+        """Inverse table of the spline of ``param``, built once per parameterization.
+
         """
-        newT = self.bs.t
-        newC = self.bs.c - my_xs_tt
-        newK = self.bs.k
-        results = interpolate.sproot((newT, newC, newK))
+        return param.GetDerived("inverseTable", lambda: root_finder.CreateSplineInverseTable(param.t, param.c, param.k))
 
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def FindRoots(self, param, my_xs_tt):
+        """Smallest root of electron cross-section(Z) = my_xs_tt, from the inverse table of the spline refined by bisection.
+        A target crossing the spline more than once, across absorption edges, is reported.
+        Unlike interpolate.sproot, the root Z = 1 of single-element materials such as H is found.
 
+        """
+        ZList, statusList = self.FindRootBatch(param, [my_xs_tt], refine = True)
 
-        return results
+        return ZList[statusList]
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def FindRootBatch(self, param, xsList, upperBound = None, refine = False):
+        """Smallest root in (0, upperBound] of electron cross-section(Z) = xs, for each xs of ``xsList``,
+        using the inverse table of the spline.
+
+        :param param: Parameterization returned by :meth:`ParameterizeAtE`.
+        :type param: :class:`.Parameterization`.
+        :param refine: Refine each root by bisection on the spline, instead of interpolating in the table.
+        :type refine: bool.
+        :returns: (ZList, statusList), where ZList is -1 wherever statusList is False.
+
+        """
+        return root_finder.FindRootInTable(self.GetInverseTable(param), xsList, upperBound, refine, "Bourque")
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def EvaluateSpline(self, my_xs_tt, Z):
+    def EvaluateSpline(self, param, my_xs_tt, Z):
         """Debugging purpose
 
         """
-        newT = self.bs.t
-        newC = self.bs.c - my_xs_tt
-        newK = self.bs.k
+        newT = param.t
+        newC = param.c - my_xs_tt
+        newK = param.k
 
         result = interpolate.splev(Z, (newT, newC, newK))
         return result
@@ -4,6 +4,7 @@ import scipy
 import pydicom
 import duo.core.material as material
 import duo.core.element_table as element_table
+import duo.core.result_cache as result_cache
 import numpy as np
 import duo.core.timer as timer
 import duo.core.dicom_decoder as dicom_decoder
@@ -27,12 +28,21 @@ class Common:
                  dataPath,
                  method = "original",
                  use140kVpWithSn = True,
-                 use100kVp = False):
+                 use100kVp = False,
+                 useResultCache = False,
+                 resultCachePath = None):
         self.method = method
 
         self.dataPath = dataPath
         self.elementTable = None
 
+        # per-material results of ZeffCalculator, reused across runs
+        self.resultCache = None
+        if useResultCache:
+            if resultCachePath is None:
+                resultCachePath = os.path.join(self.dataPath, "zeff_result_cache.sqlite")
+            self.resultCache = result_cache.ResultCache(resultCachePath)
+
         self.CTNumber_Elow  = -1000
         self.CTNumber_Ehigh = 3095
 
@@ -43,6 +53,10 @@ class Common:
         self.muAir_Ehigh = 0.0
         self.muAir_Elow  = 0.0
 
+        # reference materials of CT numbers
+        self.water = None
+        self.air = None
+
         # Van Abbema, J.K., Van der Schaaf, A., Kristanto, W.,
         # Groen, J.M. and Greuter, M.J., 2012. Feasibility and
         # accuracy of tissue characterization with dual source
@@ -107,6 +121,9 @@ class Common:
             air.Commit()
             air.density = 1.205E-03
 
+        self.water = water
+        self.air = air
+
         self.muWater_Ehigh = water.CalculateMacAtE(self.Ehigh) * water.density
         self.muWater_Elow  = water.CalculateMacAtE(self.Elow) * water.density
         self.muAir_Ehigh   = air.CalculateMacAtE(self.Ehigh) * air.density
@@ -117,6 +134,25 @@ class Common:
         print("    muAir_Ehigh   = {0:.16e}".format(self.muAir_Ehigh  ))
         print("    muAir_Elow    = {0:.16e}".format(self.muAir_Elow   ))
 
+    #------------------------------------------------------------
+    # Release the database of the result cache, if any.
+    # Common can also be used as a context manager, which calls Close() on exit
+    #------------------------------------------------------------
+    def Close(self):
+        if self.resultCache is not None:
+            self.resultCache.Close()
+            self.resultCache = None
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __enter__(self):
+        return self
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __exit__(self, excType, excValue, traceback):
+        self.Close()
+
     #------------------------------------------------------------
     #------------------------------------------------------------
     def ProcessCTImage(self, fileName):
@@ -0,0 +1,218 @@
+import threading
+import hashlib
+import collections
+import numpy as np
+import duo.core.duo_exception as de
+import duo.core.result_cache as result_cache
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+class Parameterization:
+    """Immutable set of coefficients fitted by a coefficient calculator at one energy.
+
+    Each keyword argument becomes a read-only attribute. Arrays are copied and made read-only,
+    so a parameterization can be shared between calculators and threads.
+    Quantities derived from the coefficients, such as inverse tables, can be memoized with :meth:`GetDerived`;
+    they are not written to the disk tier.
+
+    """
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __init__(self, **kwargs):
+        object.__setattr__(self, "derivedList", {})
+
+        for key, value in kwargs.items():
+            if not np.isscalar(value):
+                value = np.array(value)
+                value.flags.writeable = False
+            object.__setattr__(self, key, value)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __setattr__(self, key, value):
+        raise de.DuoException("--> Parameterization is immutable.")
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __delattr__(self, key):
+        raise de.DuoException("--> Parameterization is immutable.")
+
+    #------------------------------------------------------------
+    # The value is a pure function of the coefficients, so computing it
+    # twice from two threads is harmless
+    #------------------------------------------------------------
+    def GetDerived(self, name, func):
+        if name not in self.derivedList.keys():
+            self.derivedList[name] = func()
+
+        return self.derivedList[name]
+
+    #------------------------------------------------------------
+    # json-serializable form, floats are written exactly
+    #------------------------------------------------------------
+    def ToDict(self):
+        result = {}
+        for key, value in self.__dict__.items():
+            if key == "derivedList":
+                continue
+
+            if isinstance(value, np.ndarray):
+                result[key] = {"array" : value.tolist(), "dtype" : str(value.dtype)}
+            else:
+                result[key] = value.item() if isinstance(value, np.generic) else value
+
+        return result
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    @classmethod
+    def FromDict(cls, data):
+        kwargs = {}
+        for key, value in data.items():
+            if isinstance(value, dict):
+                kwargs[key] = np.array(value["array"], dtype = value["dtype"])
+            else:
+                kwargs[key] = value
+
+        return cls(**kwargs)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+class ParameterizationCache:
+    """Bounded LRU cache of :class:`Parameterization` objects, shared by all coefficient calculators
+    of one element table (see :func:`GetCache`).
+
+    A key is built by :meth:`MakeKey` from the calculator type, the energy, the Z fitted
+    and the checksum of the cross-section library, so that repeated energies cost nothing after the first fit.
+    With a disk tier (see :meth:`EnableDiskTier`), parameterizations also survive across processes.
+
+    :ivar int maxSize: Maximum number of parameterizations kept in memory.
+    :ivar diskCache: Disk tier, None if disabled.
+    :vartype diskCache: :class:`.ResultCache`
+
+    """
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __init__(self, maxSize = 1024):
+        self.maxSize = maxSize
+        self.memoryCache = collections.OrderedDict()
+        self.diskCache = None
+
+        self.lock = threading.Lock()
+
+        self.numHits = 0
+        self.numMisses = 0
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def EnableDiskTier(self, cachePath, maxSize = 64 * 1024 * 1024):
+        with self.lock:
+            self.diskCache = result_cache.ResultCache(cachePath, maxSize)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    @staticmethod
+    def MakeKey(calculator, energy, ZList):
+        """
+        :param calculator: Coefficient calculator, whose type and element table identify the fit.
+        :param energy: Photon energy in keV.
+        :type energy: float.
+        :param ZList: Atomic numbers used by the fit.
+        :type ZList: array_like of int.
+
+        """
+        ZHash = hashlib.sha1(np.asarray(ZList, dtype = np.int64).tobytes()).hexdigest()
+
+        # fits read the exact cross-sections, never the interpolated ElementTable.xsMatrix
+        return "{:s}|{:s}|{:s}|exact|{:s}".format(type(calculator).__name__,
+                                                  float(energy).hex(),
+                                                  ZHash,
+                                                  calculator.elementTable.GetDataChecksum())
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Get(self, key):
+        with self.lock:
+            if key in self.memoryCache.keys():
+                self.memoryCache.move_to_end(key)
+                self.numHits += 1
+                return self.memoryCache[key]
+
+            if self.diskCache is not None:
+                value = self.diskCache.Get(key)
+                if value is not None:
+                    self.numHits += 1
+                    result = Parameterization.FromDict(value)
+                    self.AddToMemory(key, result)
+                    return result
+
+            self.numMisses += 1
+
+        return None
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Set(self, key, value):
+        with self.lock:
+            self.AddToMemory(key, value)
+
+            if self.diskCache is not None:
+                self.diskCache.Set(key, value.ToDict())
+
+    #------------------------------------------------------------
+    # must be called with the lock held
+    #------------------------------------------------------------
+    def AddToMemory(self, key, value):
+        self.memoryCache[key] = value
+        self.memoryCache.move_to_end(key)
+
+        while len(self.memoryCache) > self.maxSize:
+            self.memoryCache.popitem(last = False)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetOrFit(self, calculator, energy, ZList, fitFunc):
+        """Get the parameterization of ``calculator`` at ``energy``, calling ``fitFunc()`` only if it is not cached.
+
+        """
+        key = self.MakeKey(calculator, energy, ZList)
+
+        result = self.Get(key)
+        if result is None:
+            result = fitFunc()
+            self.Set(key, result)
+
+        return result
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Clear(self):
+        with self.lock:
+            self.memoryCache.clear()
+            self.numHits = 0
+            self.numMisses = 0
+
+#------------------------------------------------------------
+# guards the creation of the cache of an element table
+#------------------------------------------------------------
+creationLock = threading.Lock()
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def GetCache(elementTable):
+    """Get the cache held by ``elementTable``, created on first use,
+    so that all coefficient calculators using the same element table share their fits.
+
+    :param elementTable: Element table the fits are made from.
+    :type elementTable: :class:`.ElementTable`.
+    :returns: :class:`ParameterizationCache`.
+
+    """
+    if elementTable.parameterizationCache is None:
+        with creationLock:
+            if elementTable.parameterizationCache is None:
+                elementTable.parameterizationCache = ParameterizationCache()
+
+    return elementTable.parameterizationCache
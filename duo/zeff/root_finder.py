@@ -0,0 +1,288 @@
+import numpy as np
+import scipy.interpolate as interpolate
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def CalculatePolynomialRootsBatch(companionFunc, coeffList, targetList):
+    """Roots of p(Z) = target for many targets at once, where p is given by ``coeffList``.
+
+    The constant term coeffList[0] only enters one element of the companion matrix, linearly,
+    so the companion matrices of all targets are built from two matrices and their eigenvalues
+    are computed as one stack.
+
+    :param companionFunc: Function returning the companion matrix of a coefficient list, whose eigenvalues are the roots,
+        e.g. ``lambda c: numpy.polynomial.polynomial.polycompanion(c)[::-1, ::-1]``.
+    :param coeffList: Coefficients, coeffList[0] being the constant term.
+    :type coeffList: array_like.
+    :param targetList: Target values.
+    :type targetList: array_like.
+    :returns: numpy.ndarray of complex roots, shape (len(targetList), degree).
+
+    """
+    coeffList = np.array(coeffList, dtype = np.float64)
+    targetList = np.asarray(targetList, dtype = np.float64).ravel()
+
+    # constant term of p(Z) - target
+    constantList = coeffList[0] - targetList
+
+    coeffList[0] = 0.0
+    matrix0 = companionFunc(coeffList)
+    coeffList[0] = 1.0
+    matrix1 = companionFunc(coeffList)
+
+    return np.linalg.eigvals(matrix0 + (matrix1 - matrix0) * constantList.reshape(-1, 1, 1))
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def SelectRoots(rootList, upperBound = None):
+    """Select, for each row of ``rootList``, the smallest real root in (0, upperBound],
+    as the scalar Zeff solvers do.
+
+    :returns: (ZList, statusList), where ZList is -1 wherever statusList is False.
+
+    """
+    realList = np.real(rootList)
+
+    mask = (np.imag(rootList) == 0.0) & (realList > 0.0)
+    if upperBound is not None:
+        mask &= realList <= upperBound
+
+    statusList = np.any(mask, axis = -1)
+    ZList = np.min(np.where(mask, realList, np.inf), axis = -1)
+    ZList = np.where(statusList, ZList, -1.0)
+
+    return ZList, statusList
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+class InverseTable:
+    """Tabulated inverse of a curve y(Z), giving for many targets at once the smallest Z where y(Z) = target.
+
+    The curve is sampled on a fine grid. The first crossing of a target above y(Z[0]) is the first grid point
+    where the running maximum of y reaches it, and the first crossing of a target below y(Z[0]) is the first
+    grid point where the running minimum reaches it. Both running extrema are monotone, so all targets
+    are located with one binary search, then linearly interpolated within the grid step,
+    or refined by bisection on the curve itself when exactness is required.
+
+    Cross-sections are monotone in Z over most of the range, but not across absorption edges.
+    The grid is split into monotone segments; those running against the overall direction are kept in
+    ``nonMonotoneRegionList``, and targets crossing the curve more than once are reported by :meth:`CountCrossing`.
+
+    :ivar numpy.ndarray ZList: Grid of Z.
+    :ivar numpy.ndarray valueList: y on the grid.
+    :ivar list nonMonotoneRegionList: (Z start, Z end) of every segment running against the overall direction.
+
+    """
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def __init__(self, func, lowerZ, upperZ, step = 1e-3):
+        """
+        :param func: Vectorized function y(Z).
+        :param lowerZ: First Z of the grid.
+        :type lowerZ: float.
+        :param upperZ: Last Z of the grid.
+        :type upperZ: float.
+        :param step: Step of the grid.
+        :type step: float.
+
+        """
+        self.func = func
+
+        numZ = int(np.ceil((upperZ - lowerZ) / step - 1e-9)) + 1
+        self.ZList = np.linspace(lowerZ, upperZ, numZ)
+        self.valueList = np.asarray(func(self.ZList), dtype = np.float64)
+
+        self.maxList = np.maximum.accumulate(self.valueList)
+        # negated so that it is non-decreasing as well
+        self.negMinList = -np.minimum.accumulate(self.valueList)
+
+        # bisection steps to shrink a grid cell down to the rounding of Z
+        cellSize = (upperZ - lowerZ) / max(numZ - 1, 1)
+        self.numBisection = int(np.ceil(np.log2(cellSize / (np.finfo(np.float64).eps * max(abs(upperZ), 1.0))))) + 1
+        self.numBisection = max(self.numBisection, 0)
+
+        self.FindMonotoneSegments()
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def FindMonotoneSegments(self):
+        signList = np.sign(np.diff(self.valueList))
+
+        # flat steps continue the previous direction, leading ones take the first direction
+        nonzeroList = np.flatnonzero(signList)
+        if len(nonzeroList) == 0:
+            signList[:] = 1.0
+        else:
+            signList[:nonzeroList[0]] = signList[nonzeroList[0]]
+            idxList = np.where(signList != 0.0, np.arange(len(signList)), 0)
+            signList = signList[np.maximum.accumulate(idxList)]
+
+        # grid indices where the direction changes
+        turnList = np.flatnonzero(signList[1:] != signList[:-1]) + 1
+
+        # first and last grid index of each segment
+        self.segmentList = np.column_stack((np.concatenate(([0], turnList)),
+                                            np.concatenate((turnList, [len(self.ZList) - 1]))))
+
+        direction = np.sign(self.valueList[-1] - self.valueList[0])
+        if direction == 0.0:
+            direction = 1.0
+
+        self.nonMonotoneRegionList = []
+        for first, last in self.segmentList:
+            if first < len(signList) and signList[first] != direction:
+                self.nonMonotoneRegionList.append((self.ZList[first], self.ZList[last]))
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CountCrossing(self, targetList):
+        """Number of times the curve crosses each target, more than 1 meaning that the root is ambiguous.
+
+        """
+        targetList = np.asarray(targetList, dtype = np.float64)
+
+        result = np.zeros(targetList.shape, dtype = np.int64)
+        for idx, (first, last) in enumerate(self.segmentList):
+            y0 = self.valueList[first]
+            y1 = self.valueList[last]
+
+            # a turning point belongs to the segment it ends, except for the first segment which also has its start
+            lowIn  = targetList >= min(y0, y1) if idx == 0 or y0 > y1 else targetList > y0
+            highIn = targetList <= max(y0, y1) if idx == 0 or y0 < y1 else targetList < y0
+
+            result += lowIn & highIn
+
+        return result
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def ReportAmbiguity(self, targetList, label):
+        """Print a warning if any target crosses the curve more than once, in which case
+        the smallest root is still returned by :meth:`FindRoot`.
+
+        :returns: numpy.ndarray of bool, True for the ambiguous targets.
+
+        """
+        if len(self.nonMonotoneRegionList) == 0:
+            return np.zeros(np.shape(targetList), dtype = bool)
+
+        isAmbiguousList = self.CountCrossing(targetList) > 1
+
+        numAmbiguous = np.count_nonzero(isAmbiguousList)
+        if numAmbiguous > 0:
+            regionText = ", ".join("[{:.3f}, {:.3f}]".format(Zstart, Zend) for Zstart, Zend in self.nonMonotoneRegionList)
+            print("--> WARNING: {:s}: {:d} target(s) with more than one root, the smallest is taken. Non-monotone in Z: {:s}".format(
+                  label, numAmbiguous, regionText))
+
+        return isAmbiguousList
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def FindRoot(self, targetList, refine = False):
+        """
+        :param refine: Refine the root by bisection on the curve, down to the rounding of Z,
+            instead of the linear interpolation within the grid step.
+        :type refine: bool.
+        :returns: (ZList, statusList), where ZList is -1 wherever no crossing exists.
+
+        """
+        targetList = np.asarray(targetList, dtype = np.float64)
+
+        # a target within rounding of the first value, e.g. the material made of the first element, has its root there
+        firstValue = self.valueList[0]
+        isFirst = np.abs(targetList - firstValue) <= 4.0 * np.finfo(np.float64).eps * abs(firstValue)
+        targetList = np.where(isFirst, firstValue, targetList)
+
+        # index of the first grid point at or beyond the target
+        isAbove = targetList >= self.valueList[0]
+        upIdx = np.searchsorted(self.maxList, targetList, side = "left")
+        downIdx = np.searchsorted(self.negMinList, -targetList, side = "left")
+        idx = np.where(isAbove, upIdx, downIdx)
+
+        statusList = idx < len(self.ZList)
+        idx = np.minimum(idx, len(self.ZList) - 1)
+
+        # the crossing lies between the previous grid point and the crossing one
+        prevIdx = np.maximum(idx - 1, 0)
+        y0 = self.valueList[prevIdx]
+        y1 = self.valueList[idx]
+        Z0 = self.ZList[prevIdx]
+        Z1 = self.ZList[idx]
+
+        if refine:
+            ZList = self.Bisect(Z0, Z1, y0, targetList)
+        else:
+            with np.errstate(divide = "ignore", invalid = "ignore"):
+                weight = np.where(y1 != y0, (targetList - y0) / (y1 - y0), 1.0)
+            weight = np.clip(weight, 0.0, 1.0)
+
+            ZList = Z0 + (Z1 - Z0) * weight
+
+        ZList = np.where(statusList, ZList, -1.0)
+
+        return ZList, statusList
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def FindRootClamped(self, targetList):
+        """Root of every target clamped to the range of the curve, so that every finite target has a root,
+        as needed for images. The result has the shape of ``targetList``; NaN stays NaN.
+
+        """
+        targetList = np.asarray(targetList, dtype = np.float64)
+
+        clampedList = np.clip(targetList, np.amin(self.valueList), np.amax(self.valueList))
+
+        ZList, statusList = self.FindRoot(clampedList.ravel())
+        ZList[~statusList] = np.nan
+
+        return ZList.reshape(targetList.shape)
+
+    #------------------------------------------------------------
+    # y - target changes sign in [lowZList, highZList], lowValueList being y at lowZList
+    #------------------------------------------------------------
+    def Bisect(self, lowZList, highZList, lowValueList, targetList):
+        lowSignList = np.sign(lowValueList - targetList)
+
+        for idx in range(self.numBisection):
+            midZList = 0.5 * (lowZList + highZList)
+            isLow = np.sign(self.func(midZList) - targetList) == lowSignList
+
+            lowZList = np.where(isLow, midZList, lowZList)
+            highZList = np.where(isLow, highZList, midZList)
+
+        # an exact hit on the lower end keeps it
+        return np.where(lowSignList == 0.0, lowZList, 0.5 * (lowZList + highZList))
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def CreateSplineInverseTable(t, c, k, step = 1e-3):
+    """Inverse table of a B-spline over its base interval [t[k], t[-k-1]],
+    the interval in which ``scipy.interpolate.sproot`` looks for roots.
+
+    """
+    bs = interpolate.BSpline(t, c, k, extrapolate = True)
+
+    return InverseTable(bs, t[k], t[-k - 1], step)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def FindRootInTable(table, targetList, upperBound = None, refine = False, label = "InverseTable"):
+    """Smallest root in (0, upperBound] for each target using an inverse table,
+    reporting the targets with more than one root.
+
+    :returns: (ZList, statusList), where ZList is -1 wherever statusList is False.
+
+    """
+    targetList = np.asarray(targetList, dtype = np.float64).ravel()
+
+    table.ReportAmbiguity(targetList, label)
+
+    ZList, statusList = table.FindRoot(targetList, refine)
+
+    if upperBound is not None:
+        statusList &= ZList <= upperBound
+    ZList = np.where(statusList, ZList, -1.0)
+
+    return ZList, statusList
@@ -6,6 +6,8 @@ import scipy.interpolate as interpolate
 import duo.zeff.taylor_coeff_calculator as taylor_coeff_calculator
 import duo.zeff.common as common
 import duo.core.duo_exception as de
+import duo.core.material_batch as material_batch
+import duo.zeff.root_finder as root_finder
 
 #------------------------------------------------------------
 #------------------------------------------------------------
@@ -13,9 +15,16 @@ class Taylor:
     #------------------------------------------------------------
     #------------------------------------------------------------
     def __init__(self, com, method = "original"):
+        self.com = com
         self.elementTable = com.elementTable
         self.method = method
 
+        self.Ehigh = 0.0
+        self.Elow = 0.0
+
+        # inverse of DER(Z) for images, see ParameterizeDualEnergyRatioAndZ
+        self.derTable = None
+
         self.tcc = None
         if self.method == "original":
             self.tcc = taylor_coeff_calculator.TaylorCoeffCalculator(self.elementTable)
@@ -44,9 +53,9 @@ class Taylor:
         # # if the desired interval is not found
         # return 0.0
 
-        self.tcc.ParameterizeAtE(energy)
+        param = self.tcc.ParameterizeAtE(energy)
 
-        results = self.tcc.FindRoots(my_xs_tt)
+        results = self.tcc.FindRoots(param, my_xs_tt)
 
         root = -1.0
         allRoots = []
@@ -64,4 +73,69 @@ class Taylor:
 
         return root
 
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateZeffAtEForXSList(self, xsList, energy, refine = False):
+        """Batched :meth:`CalculateZeffAtE`, given the total cross-section per atom of many materials.
+        Instead of raising an exception, a material whose root is not found gets Zeff = -1 and status False.
+
+        :param refine: With method "original", refine the roots by bisection instead of interpolating in the inverse table.
+        :type refine: bool.
+        :returns: (ZeffList, statusList).
+
+        """
+        param = self.tcc.ParameterizeAtE(energy)
+
+        return self.tcc.FindRootBatch(param, xsList, refine = refine)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateZeffAtEForMaterialList(self, materialList, energy, refine = False):
+        batch = material_batch.MaterialBatch.FromMaterialList(self.elementTable, materialList)
+
+        return self.CalculateZeffAtEForXSList(batch.CalculateTotalMicroXSAtEPerAtom(energy), energy, refine)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def ParameterizeDualEnergyRatioAndZ(self, Ehigh, Elow, upperZ = 36.0):
+        """Given Ehigh and Elow, tabulate DER(Z) = xs(Z, Elow) / xs(Z, Ehigh) of the parameterized total cross-section
+        for Z in [1, upperZ], and its inverse, which gives the Z of images in :meth:`CalculateGivenCTNumber`.
+
+        This follows :meth:`.Bourque.ParameterizeDualEnergyRatioAndZ`, except that DER is not normalized by water,
+        which would scale DER of images and of the curve alike.
+
+        :param upperZ: Highest Z of the curve, DER being monotone in [1, 36] as for Bourque.
+        :type upperZ: float.
+
+        """
+        self.Ehigh = Ehigh
+        self.Elow = Elow
+
+        paramLow = self.tcc.ParameterizeAtE(self.Elow)
+        paramHigh = self.tcc.ParameterizeAtE(self.Ehigh)
+
+        derFunc = lambda Z: self.tcc.CalculateXS(paramLow, Z) / self.tcc.CalculateXS(paramHigh, Z)
+        self.derTable = root_finder.InverseTable(derFunc, 1.0, upperZ)
+
+        print("    der max = ", np.amax(self.derTable.valueList))
+        print("    der min = ", np.amin(self.derTable.valueList))
+
+        if len(self.derTable.nonMonotoneRegionList) > 0:
+            print("--> WARNING: Taylor: DER is not monotone in Z, the smallest Z is taken in", self.derTable.nonMonotoneRegionList)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateGivenCTNumber(self, imageHighKVP, imageLowKVP):
+        muHighKVP = self.com.ConvertCTNumberToMu(imageHighKVP, self.com.muWater_Ehigh, self.com.muAir_Ehigh)
+        muLowKVP  = self.com.ConvertCTNumberToMu(imageLowKVP , self.com.muWater_Elow , self.com.muAir_Elow )
+
+        return self.Calculate(muHighKVP, muLowKVP)
+
+    #------------------------------------------------------------
+    # DER out of the range of the curve is clamped, as in Bourque
+    #------------------------------------------------------------
+    def Calculate(self, muHighKVP, muLowKVP):
+        if self.derTable is None:
+            raise de.DuoException("--> Taylor: DER and Z not parameterized.")
 
+        return self.derTable.FindRootClamped(muLowKVP / muHighKVP)
@@ -6,28 +6,42 @@ import duo.core.material as material
 import scipy
 import scipy.optimize
 import scipy.interpolate as interpolate
+import duo.zeff.parameterization_cache as parameterization_cache
+import duo.zeff.root_finder as root_finder
 
 #------------------------------------------------------------
 #------------------------------------------------------------
 class TaylorCoeffCalculator:
+    """Parameterization of the total microscopic cross-section in Z using B-spline.
+
+    As :class:`.BourqueCoeffCalculator`, the calculator holds no state of its own: the :class:`.Parameterization`
+    returned by :meth:`ParameterizeAtE` is passed explicitly to the other methods.
+
+    """
+
     #------------------------------------------------------------
     #------------------------------------------------------------
     def __init__(self, elementTable):
         self.elementTable = elementTable
 
-        self.bs = None # b-spline object
-
     #------------------------------------------------------------
     #------------------------------------------------------------
     def ParameterizeAtE(self, energy):
-        # iterate all elements (Z = 1 ~ 100)
-        ZList = []
-        xs_tt_list = []
-        for Z, element in self.elementTable.elementList.items():
-            ZList.append(Z)
+        # all elements (Z = 1 ~ 100)
+        ZList = self.GetZList()
+
+        # fits are kept in the cache of the element table, so a repeated energy is not fitted again
+        return parameterization_cache.GetCache(self.elementTable).GetOrFit(self, energy, ZList, lambda: self.Fit(energy, ZList))
 
-            xs_tt = element.CalculateTotalMicroXSAtE(energy)
-            xs_tt_list.append(xs_tt)
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def GetZList(self):
+        return list(self.elementTable.elementList.keys())
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Fit(self, energy, ZList):
+        xs_tt_list = self.elementTable.CalculateMicroXSAtE("total", energy, ZList)
 
         # find the B-spline representation of 1-D curve
         (t, c, k) = interpolate.splrep(ZList, xs_tt_list, k = 3)
@@ -35,24 +49,57 @@ class TaylorCoeffCalculator:
         # the B-spline coefficients
         # the degree of the spline
 
-        self.bs = interpolate.BSpline(t, c, k, extrapolate = True)
+        return parameterization_cache.Parameterization(t = t, c = c, k = int(k))
 
     #------------------------------------------------------------
-    # base on parameterized xs data, for the same energy
+    #------------------------------------------------------------
+    def GetBSpline(self, param):
+        """B-spline object of ``param``, built once per parameterization.
+
+        """
+        return param.GetDerived("bspline", lambda: interpolate.BSpline(param.t, param.c, param.k, extrapolate = True))
+
+    #------------------------------------------------------------
+    # base on parameterized xs data, for the energy
     # that has been passed to ParameterizeAtE(self, energy)
     #------------------------------------------------------------
-    def CalculateXS(self, Z):
-        return self.bs(Z)
+    def CalculateXS(self, param, Z):
+        return self.GetBSpline(param)(Z)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def FindRoots(self, my_xs_tt):
-        newT = self.bs.t
-        newC = self.bs.c - my_xs_tt
-        newK = self.bs.k
-        results = interpolate.sproot((newT, newC, newK))
+    def GetInverseTable(self, param):
+        """Inverse table of the spline of ``param``, built once per parameterization.
 
-        return results
+        """
+        return param.GetDerived("inverseTable", lambda: root_finder.CreateSplineInverseTable(param.t, param.c, param.k))
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def FindRoots(self, param, my_xs_tt):
+        """Smallest root of total cross-section(Z) = my_xs_tt, from the inverse table of the spline refined by bisection.
+        A target crossing the spline more than once, across absorption edges, is reported.
+        Unlike interpolate.sproot, the root Z = 1 of single-element materials such as H is found.
+
+        """
+        ZList, statusList = self.FindRootBatch(param, [my_xs_tt], refine = True)
+
+        return ZList[statusList]
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def FindRootBatch(self, param, xsList, upperBound = None, refine = False):
+        """Smallest root in (0, upperBound] of total cross-section(Z) = xs, for each xs of ``xsList``,
+        using the inverse table of the spline.
+
+        :param param: Parameterization returned by :meth:`ParameterizeAtE`.
+        :type param: :class:`.Parameterization`.
+        :param refine: Refine each root by bisection on the spline, instead of interpolating in the table.
+        :type refine: bool.
+        :returns: (ZList, statusList), where ZList is -1 wherever statusList is False.
+
+        """
+        return root_finder.FindRootInTable(self.GetInverseTable(param), xsList, upperBound, refine, "Taylor")
 
 
 
@@ -73,62 +120,68 @@ class AltTaylorCoeffCalculator(TaylorCoeffCalculator):
     #------------------------------------------------------------
     #------------------------------------------------------------
     def __init__(self, elementTable):
-        self.elementTable = elementTable
-
-        self.a0 = 0.0
-        self.a1 = 0.0
-        self.a2 = 0.0
-        self.a3 = 0.0
-        self.a4 = 0.0
-        self.a5 = 0.0
+        super().__init__(elementTable)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def ParameterizeAtE(self, energy):
-        ZList = np.arange(1, 52 + 1)
+    def GetZList(self):
+        return np.arange(1, 52 + 1)
 
-        xs_list = []
-        for Z in ZList:
-            element = self.elementTable.elementList[Z]
-            xs = element.CalculateTotalMicroXSAtE(energy)
-            xs_list.append(xs)
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Fit(self, energy, ZList):
+        xs_list = self.elementTable.CalculateMicroXSAtE("total", energy, ZList)
 
         result = scipy.optimize.curve_fit(Func6,
                  ZList,
                  xs_list)
-        self.a0 = result[0][0]
-        self.a1 = result[0][1]
-        self.a2 = result[0][2]
-        self.a3 = result[0][3]
-        self.a4 = result[0][4]
-        self.a5 = result[0][5]
+
+        return parameterization_cache.Parameterization(aList = result[0])
 
     #------------------------------------------------------------
-    # base on parameterized xs data, for the same energy
+    # base on parameterized xs data, for the energy
     # that has been passed to ParameterizeAtE(self, energy)
     #------------------------------------------------------------
-    def CalculateXS(self, Z):
+    def CalculateXS(self, param, Z):
         return Func6(Z,
-                    self.a0,
-                    self.a1,
-                    self.a2,
-                    self.a3,
-                    self.a4,
-                    self.a5)
+                    param.aList[0],
+                    param.aList[1],
+                    param.aList[2],
+                    param.aList[3],
+                    param.aList[4],
+                    param.aList[5])
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def FindRoots(self, my_xs_tt):
-        coeffList = np.array([self.a5,
-                              self.a4,
-                              self.a3,
-                              self.a2,
-                              self.a1,
-                              self.a0 - my_xs_tt])
+    def FindRoots(self, param, my_xs_tt):
+        coeffList = np.array([param.aList[5],
+                              param.aList[4],
+                              param.aList[3],
+                              param.aList[2],
+                              param.aList[1],
+                              param.aList[0] - my_xs_tt])
 
         results = np.roots(coeffList)
 
         return results
 
+    #------------------------------------------------------------
+    # same matrix as np.roots, whose coefficients start from the highest degree
+    #------------------------------------------------------------
+    def GetCompanionMatrix(self, coeffList):
+        highFirstList = coeffList[::-1]
+
+        matrix = np.diag(np.ones(len(highFirstList) - 2), -1)
+        matrix[0, :] = -highFirstList[1:] / highFirstList[0]
+
+        return matrix
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def FindRootBatch(self, param, xsList, upperBound = None, refine = False):
+        rootList = root_finder.CalculatePolynomialRootsBatch(self.GetCompanionMatrix, param.aList, xsList)
+
+        return root_finder.SelectRoots(rootList, upperBound)
+
 
 
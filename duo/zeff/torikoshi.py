@@ -4,6 +4,9 @@ import duo.core.material as material
 import duo.core.element_table as element_table
 import duo.zeff.torikoshi_coeff_calculator as torikoshi_coeff_calculator
 import numpy.polynomial.polynomial as poly
+import duo.core.duo_exception as de
+import duo.core.material_batch as material_batch
+import duo.zeff.root_finder as root_finder
 
 #------------------------------------------------------------
 #------------------------------------------------------------
@@ -15,15 +18,21 @@ class Torikoshi:
         self.elementTable = com.elementTable
         self.tcc = torikoshi_coeff_calculator.TorikoshiCoeffCalculator(self.elementTable)
 
+        self.Ehigh = 0.0
+        self.Elow = 0.0
+
+        # inverse of DER(Z) for images, see ParameterizeDualEnergyRatioAndZ
+        self.derTable = None
+
     #------------------------------------------------------------
     # based on endfb xs data
     #------------------------------------------------------------
     def CalculateZeffAtE(self, mat, energy):
         my_xs_tt = mat.CalculateElectronXSAtE(energy)
 
-        self.tcc.ParameterizeAtE(energy)
+        param = self.tcc.ParameterizeAtE(energy)
 
-        results = self.tcc.FindRoots(my_xs_tt)
+        results = self.tcc.FindRoots(param, my_xs_tt)
 
         root = -1.0
         allRoots = []
@@ -40,3 +49,65 @@ class Torikoshi:
 
         return root
 
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateZeffAtEForXSList(self, xsList, energy):
+        """Batched :meth:`CalculateZeffAtE`, given the electron cross-section of many materials.
+        Instead of raising an exception, a material whose root is not found gets Zeff = -1 and status False.
+
+        :returns: (ZeffList, statusList).
+
+        """
+        param = self.tcc.ParameterizeAtE(energy)
+
+        return self.tcc.FindRootBatch(param, xsList, upperBound = 100.0)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateZeffAtEForMaterialList(self, materialList, energy):
+        batch = material_batch.MaterialBatch.FromMaterialList(self.elementTable, materialList)
+
+        return self.CalculateZeffAtEForXSList(batch.CalculateElectronXSAtE(energy), energy)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def ParameterizeDualEnergyRatioAndZ(self, Ehigh, Elow, upperZ = 20.0):
+        """Given Ehigh and Elow, tabulate DER(Z) = exs(Z, Elow) / exs(Z, Ehigh) of the parameterized electron cross-section
+        for Z in [1, upperZ], and its inverse, which gives the Z of images in :meth:`CalculateGivenCTNumber`.
+        See :meth:`.Taylor.ParameterizeDualEnergyRatioAndZ`.
+
+        :param upperZ: Highest Z of the curve, by default the highest Z of the fit, beyond which DER is not monotone.
+        :type upperZ: float.
+
+        """
+        self.Ehigh = Ehigh
+        self.Elow = Elow
+
+        paramLow = self.tcc.ParameterizeAtE(self.Elow)
+        paramHigh = self.tcc.ParameterizeAtE(self.Ehigh)
+
+        derFunc = lambda Z: self.tcc.CalculateElectronXS(paramLow, Z) / self.tcc.CalculateElectronXS(paramHigh, Z)
+        self.derTable = root_finder.InverseTable(derFunc, 1.0, upperZ)
+
+        print("    der max = ", np.amax(self.derTable.valueList))
+        print("    der min = ", np.amin(self.derTable.valueList))
+
+        if len(self.derTable.nonMonotoneRegionList) > 0:
+            print("--> WARNING: Torikoshi: DER is not monotone in Z, the smallest Z is taken in", self.derTable.nonMonotoneRegionList)
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateGivenCTNumber(self, imageHighKVP, imageLowKVP):
+        muHighKVP = self.com.ConvertCTNumberToMu(imageHighKVP, self.com.muWater_Ehigh, self.com.muAir_Ehigh)
+        muLowKVP  = self.com.ConvertCTNumberToMu(imageLowKVP , self.com.muWater_Elow , self.com.muAir_Elow )
+
+        return self.Calculate(muHighKVP, muLowKVP)
+
+    #------------------------------------------------------------
+    # DER out of the range of the curve is clamped, as in Bourque
+    #------------------------------------------------------------
+    def Calculate(self, muHighKVP, muLowKVP):
+        if self.derTable is None:
+            raise de.DuoException("--> Torikoshi: DER and Z not parameterized.")
+
+        return self.derTable.FindRootClamped(muLowKVP / muHighKVP)
@@ -4,19 +4,24 @@ import duo.core.material as material
 import duo.core.element_table as element_table
 import duo.core.material as material
 import numpy.polynomial.polynomial as poly
+import duo.zeff.parameterization_cache as parameterization_cache
+import duo.zeff.root_finder as root_finder
 
 #------------------------------------------------------------
 #------------------------------------------------------------
 class TorikoshiCoeffCalculator:
+    """Parameterization of the electron microscopic cross-section in Z following Torikoshi 2003.
+
+    As :class:`.BourqueCoeffCalculator`, the calculator holds no state of its own: the :class:`.Parameterization`
+    returned by :meth:`ParameterizeAtE` is passed explicitly to the other methods.
+
+    """
+
     #------------------------------------------------------------
     #------------------------------------------------------------
     def __init__(self, elementTable):
         self.elementTable = elementTable
 
-        self.fList = []
-        self.gList = []
-        self.aList = []
-
     #------------------------------------------------------------
     #------------------------------------------------------------
     def ParameterizeAtE(self, energy):
@@ -24,11 +29,18 @@ class TorikoshiCoeffCalculator:
 
         :param energy: Photon energy in keV.
         :type energy: float.
+        :returns: :class:`.Parameterization` with fList, gList and aList.
 
         """
 
         ZList = np.arange(1, 20 + 1)
 
+        # fits are kept in the cache of the element table, so a repeated energy is not fitted again
+        return parameterization_cache.GetCache(self.elementTable).GetOrFit(self, energy, ZList, lambda: self.Fit(energy, ZList))
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Fit(self, energy, ZList):
         # the new numpy.polynomial.polynomial module
         # uses the following order:
         # p(x) = p[0] +
@@ -41,81 +53,93 @@ class TorikoshiCoeffCalculator:
 
         # derive parameters for F(Z, E)
         fDegree = 4 #
-        xs_list = []
-        for Z in ZList:
-            element = self.elementTable.elementList[Z]
-            xs = element.CalculatePEMicroXSAtE(energy) / np.power(Z, 5.0)
-            xs_list.append(xs)
-        self.fList = poly.polyfit(ZList, xs_list, fDegree)
+        xs_list = self.elementTable.CalculateMicroXSAtE("pe", energy, ZList) / np.power(ZList, 5.0)
+        fList = poly.polyfit(ZList, xs_list, fDegree)
 
         # derive parameters for G(Z, E)
         gDegree = 3
-        xs_list = []
-        for Z in ZList:
-            element = self.elementTable.elementList[Z]
-            xs = element.CalculateCSMicroXSAtE(energy) + element.CalculateRLMicroXSAtE(energy)
-            xs /= Z
-            xs_list.append(xs)
-        self.gList = poly.polyfit(ZList, xs_list, gDegree)
+        xs_list = self.elementTable.CalculateMicroXSAtE("cs", energy, ZList) + self.elementTable.CalculateMicroXSAtE("rl", energy, ZList)
+        xs_list /= ZList
+        gList = poly.polyfit(ZList, xs_list, gDegree)
 
         highestDeg = fDegree + 4
-        self.aList = [0 for idx in range(highestDeg + 1)]
+        aList = [0 for idx in range(highestDeg + 1)]
 
         # combine coefficients
         for idx in range(gDegree + 1):
-            self.aList[idx] += self.gList[idx]
+            aList[idx] += gList[idx]
 
         for idx in range(fDegree + 1):
-            self.aList[idx + 4] += self.fList[idx]
+            aList[idx + 4] += fList[idx]
 
+        return parameterization_cache.Parameterization(fList = fList, gList = gList, aList = aList)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def CalculateElectronXS(self, Z):
+    def CalculateElectronXS(self, param, Z):
         """Given Z, calculate electron microscopic cross-section.
-        This method must be used after a call to :meth:`~ParameterizeAtE`,
-        which calculates parameters based on the given energy.
 
+        :param param: Parameterization returned by :meth:`~ParameterizeAtE` at the energy of interest.
+        :type param: :class:`.Parameterization`.
         :param Z: Atomic number.
         :type Z: int.
 
         """
-        return np.power(Z, 4.0) * poly.polyval(Z, self.fList) + poly.polyval(Z, self.gList)
+        return np.power(Z, 4.0) * poly.polyval(Z, param.fList) + poly.polyval(Z, param.gList)
 
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def CalculateF(self, Z):
+    def CalculateF(self, param, Z):
         """Given Z, calculate F(energy, Z) function defined in Torikoshi 2003.
-        This method must be used after a call to :meth:`~ParameterizeAtE`,
-        which calculates parameters based on the given energy.
 
+        :param param: Parameterization returned by :meth:`~ParameterizeAtE` at the energy of interest.
+        :type param: :class:`.Parameterization`.
         :param Z: Atomic number.
         :type Z: int.
 
         """
 
-        return poly.polyval(Z, self.fList)
+        return poly.polyval(Z, param.fList)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def CalculateG(self, Z):
+    def CalculateG(self, param, Z):
         """Given Z, calculate G(energy, Z) function defined in Torikoshi 2003.
-        This method must be used after a call to :meth:`~ParameterizeAtE`,
-        which calculates parameters based on the given energy.
 
+        :param param: Parameterization returned by :meth:`~ParameterizeAtE` at the energy of interest.
+        :type param: :class:`.Parameterization`.
         :param Z: Atomic number.
         :type Z: int.
 
         """
 
-        return poly.polyval(Z, self.gList)
+        return poly.polyval(Z, param.gList)
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def FindRoots(self, my_xs_tt):
-        coeffList = np.copy(self.aList)
+    def FindRoots(self, param, my_xs_tt):
+        coeffList = np.copy(param.aList)
         coeffList[0] -= my_xs_tt
         results = poly.polyroots(coeffList)
 
         return results
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def FindRootBatch(self, param, xsList, upperBound = None, refine = False):
+        """Smallest real root in (0, upperBound] of electron cross-section(Z) = xs, for each xs of ``xsList``.
+        The companion matrices of all targets are solved as one stack.
+
+        :param param: Parameterization returned by :meth:`ParameterizeAtE`.
+        :type param: :class:`.Parameterization`.
+        :param refine: Unused, the roots of polynomials are already exact.
+        :type refine: bool.
+        :returns: (ZList, statusList), where ZList is -1 wherever statusList is False.
+
+        """
+        # same matrix as poly.polyroots
+        companionFunc = lambda coeffList: poly.polycompanion(coeffList)[::-1, ::-1]
+        rootList = root_finder.CalculatePolynomialRootsBatch(companionFunc, param.aList, xsList)
+
+        return root_finder.SelectRoots(rootList, upperBound)
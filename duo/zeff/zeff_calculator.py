@@ -8,6 +8,7 @@ import duo.zeff.common as common
 import duo.zeff.bourque as bourque
 import duo.zeff.taylor as taylor
 import duo.core.duo_exception as de
+import duo.core.result_cache as result_cache
 
 #------------------------------------------------------------
 # Given a known material, calculate Z, mu, CTNumber at high
@@ -44,47 +45,71 @@ class ZeffCalculator:
 
     #------------------------------------------------------------
     #------------------------------------------------------------
-    def Calculate(self):
-        # high
-        if self.method == 'direct':
-            self.Z_Ehigh  = self.material.CalculateZeffAtE(self.Ehigh)
-        elif self.method == 'bourque':
-            try:
-                self.Z_Ehigh  = self.bq.CalculateZeffAtE(self.material, self.Ehigh)
-            except de.DuoException as err:
-                msg = "--> Error when calculating Z_Ehigh for material {:s} using {:s} : {:s}".format(self.material.name, self.method, str(err))
-                print(msg)
-                self.Z_Ehigh = -1.0
+    def GetMethodName(self):
+        if self.method == 'bourque':
+            return "bourque-" + self.bq.method
         elif self.method == 'taylor':
-            try:
-                self.Z_Ehigh  = self.tl.CalculateZeffAtE(self.material, self.Ehigh)
-            except de.DuoException as err:
-                msg = "--> Error when calculating Z_Ehigh for material {:s} using {:s} : {:s}".format(self.material.name, self.method, str(err))
-                print(msg)
-                self.Z_Ehigh = -1.0
+            return "taylor-" + self.tl.method
 
-        self.mu_Ehigh = self.material.CalculateMacAtE(self.Ehigh) * self.material.density
-        self.CTNumber_Ehigh = self.com.ConvertMuToCTNumber(self.mu_Ehigh, self.com.muWater_Ehigh, self.com.muAir_Ehigh)
+        return self.method
+
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def CalculateZAtE(self, energy, label):
+        Z = 0.0
 
-        # low
         if self.method == 'direct':
-            self.Z_Elow   = self.material.CalculateZeffAtE(self.Elow)
+            Z = self.material.CalculateZeffAtE(energy)
         elif self.method == 'bourque':
             try:
-                self.Z_Elow  = self.bq.CalculateZeffAtE(self.material, self.Elow)
+                Z = self.bq.CalculateZeffAtE(self.material, energy)
             except de.DuoException as err:
-                msg = "--> Error when calculating Z_Elow for material {:s} using {:s} : {:s}".format(self.material.name, self.method, str(err))
+                msg = "--> Error when calculating {:s} for material {:s} using {:s} : {:s}".format(label, self.material.name, self.method, str(err))
                 print(msg)
-                self.Z_Elow  = -1.0
+                Z = -1.0
         elif self.method == 'taylor':
             try:
-                self.Z_Elow  = self.tl.CalculateZeffAtE(self.material, self.Elow)
+                Z = self.tl.CalculateZeffAtE(self.material, energy)
             except de.DuoException as err:
-                msg = "--> Error when calculating Z_Elow for material {:s} using {:s} : {:s}".format(self.material.name, self.method, str(err))
+                msg = "--> Error when calculating {:s} for material {:s} using {:s} : {:s}".format(label, self.material.name, self.method, str(err))
                 print(msg)
-                self.Z_Elow  = -1.0
+                Z = -1.0
+
+        return Z
+
+    #------------------------------------------------------------
+    # Z and mac at the given energy, read from com.resultCache when
+    # the same material has already been calculated, so that the
+    # root finding of Bourque/Taylor is skipped
+    #------------------------------------------------------------
+    def CalculateZAndMacAtE(self, energy, label):
+        key = None
+        if self.com.resultCache is not None:
+            key = result_cache.ResultCache.MakeKey(self.material.GetContentHash(), energy, self.GetMethodName())
+            value = self.com.resultCache.Get(key)
+            if value is not None:
+                return value["Z"], value["mac"]
+
+        Z = self.CalculateZAtE(energy, label)
+        mac = self.material.CalculateMacAtE(energy)
+
+        # failures are not stored, so that their message is shown on every run
+        if key is not None and Z != -1.0:
+            self.com.resultCache.Set(key, {"Z" : float(Z), "mac" : float(mac)})
+
+        return Z, mac
 
-        self.mu_Elow  = self.material.CalculateMacAtE(self.Elow) * self.material.density
+    #------------------------------------------------------------
+    #------------------------------------------------------------
+    def Calculate(self):
+        # high
+        self.Z_Ehigh, mac = self.CalculateZAndMacAtE(self.Ehigh, "Z_Ehigh")
+        self.mu_Ehigh = mac * self.material.density
+        self.CTNumber_Ehigh = self.com.ConvertMuToCTNumber(self.mu_Ehigh, self.com.muWater_Ehigh, self.com.muAir_Ehigh)
+
+        # low
+        self.Z_Elow, mac = self.CalculateZAndMacAtE(self.Elow, "Z_Elow")
+        self.mu_Elow  = mac * self.material.density
         self.CTNumber_Elow = self.com.ConvertMuToCTNumber(self.mu_Elow, self.com.muWater_Elow, self.com.muAir_Elow)
 
         # ave
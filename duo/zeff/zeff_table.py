@@ -7,6 +7,7 @@ import os
 import sys
 import duo.zeff.bourque as bourque
 import duo.zeff.taylor as taylor
+import duo.zeff.torikoshi as torikoshi
 import duo.zeff.abbema as abbema
 import duo.zeff.abbema_coeff_calculator as abbema_coeff_calculator
 import duo.zeff.cai as cai
@@ -151,9 +152,31 @@ class ZeffTableGenerator:
         print("--> imageZeff_tl_cai")
         print("    max = {:f} min = {:f}".format(np.amax(self.imageZeff_tl_cai), np.amin(self.imageZeff_tl_cai)))
 
+        #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+        # taylor
+        #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+        tl = taylor.Taylor(self.com)
+        tl.ParameterizeDualEnergyRatioAndZ(self.com.Ehigh, self.com.Elow)
+        self.imageZeff_tl = self.com.CalculateGivenCTNumber(self.huHighKVPImage, self.huLowKVPImage, tl)
+
+        print("--> imageZeff_tl")
+        print("    max = {:f} min = {:f}".format(np.nanmax(self.imageZeff_tl), np.nanmin(self.imageZeff_tl)))
+
+        #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+        # torikoshi
+        #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+        tk = torikoshi.Torikoshi(self.com)
+        tk.ParameterizeDualEnergyRatioAndZ(self.com.Ehigh, self.com.Elow)
+        self.imageZeff_tk = self.com.CalculateGivenCTNumber(self.huHighKVPImage, self.huLowKVPImage, tk)
+
+        print("--> imageZeff_tk")
+        print("    max = {:f} min = {:f}".format(np.nanmax(self.imageZeff_tk), np.nanmin(self.imageZeff_tk)))
+
         self.PlotZeff(self.imageZeff_bq_original, "zeff_table_bourque_original_" + self.caseSuffix + ".pdf")
         self.PlotZeff(self.imageZeff_abbema, "zeff_table_abbema_" + self.caseSuffix + ".pdf")
         self.PlotZeff(self.imageZeff_tl_cai, "zeff_table_cai_taylor_" + self.caseSuffix + ".pdf", addControlPoints = True, caiObj = cai_taylor)
+        self.PlotZeff(self.imageZeff_tl, "zeff_table_taylor_" + self.caseSuffix + ".pdf")
+        self.PlotZeff(self.imageZeff_tk, "zeff_table_torikoshi_" + self.caseSuffix + ".pdf")
         self.PlotDiff(self.diffBqAbbema, "zeff_table_diff_" + self.caseSuffix + ".pdf")
 
         #self.SaveDataToDisk()
@@ -0,0 +1,35 @@
+import os
+import sys
+import shutil
+import pytest
+
+repoPath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if repoPath not in sys.path:
+    sys.path.insert(0, repoPath)
+
+import duo.zeff.common as common
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.fixture(scope = "session")
+def dataPath():
+    return os.path.join(repoPath, "data")
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.fixture(scope = "session")
+def com(dataPath):
+    return common.Common(dataPath)
+
+#------------------------------------------------------------
+# copy of the libraries of a few elements, for tests that write caches or touch files
+#------------------------------------------------------------
+@pytest.fixture
+def subsetDataPath(dataPath, tmp_path):
+    for dirName in ["photoatomic_endfb", "photoatomic_gnd"]:
+        os.mkdir(tmp_path / dirName)
+        for fileName in sorted(os.listdir(os.path.join(dataPath, dirName))):
+            if fileName.split("_")[1] in ("H", "C", "O"):
+                shutil.copy2(os.path.join(dataPath, dirName, fileName), tmp_path / dirName)
+
+    return str(tmp_path)
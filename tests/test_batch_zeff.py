@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import duo.core.duo_exception as de
+import duo.zeff.nist as nist
+import duo.zeff.bourque as bourque
+import duo.zeff.taylor as taylor
+import duo.zeff.torikoshi as torikoshi
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.fixture(scope = "module")
+def materialList(com):
+    return nist.Nist(com).materialList
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def MakeModel(com, name):
+    modelName, _, method = name.partition("-")
+    if modelName == "bourque":
+        return bourque.Bourque(com, method = method)
+    if modelName == "taylor":
+        return taylor.Taylor(com, method = method)
+    return torikoshi.Torikoshi(com)
+
+#------------------------------------------------------------
+# scalar solver, -1 where it raises
+#------------------------------------------------------------
+def CalculateZeffOneByOne(model, materialList, energy):
+    ZeffList = []
+    for mat in materialList:
+        try:
+            ZeffList.append(model.CalculateZeffAtE(mat, energy))
+        except de.DuoException:
+            ZeffList.append(-1.0)
+
+    return np.array(ZeffList)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.mark.parametrize("name", ["bourque-original", "bourque-chebyshev", "bourque-bspline",
+                                  "taylor-original", "taylor-bourque", "torikoshi"])
+def test_batch_matches_scalar(com, materialList, name):
+    model = MakeModel(com, name)
+
+    # with refine, the spline roots are bisected as in the scalar solver,
+    # otherwise they are interpolated in the inverse table
+    optionList = [({"refine" : True}, 1e-9), ({}, 1e-6)]
+    if name == "torikoshi":
+        optionList = [({}, 1e-9)]
+
+    for energy in [com.Elow, com.Ehigh]:
+        scalarZeffList = CalculateZeffOneByOne(model, materialList, energy)
+
+        for option, tolerance in optionList:
+            ZeffList, statusList = model.CalculateZeffAtEForMaterialList(materialList, energy, **option)
+            np.testing.assert_array_equal(statusList, scalarZeffList > 0.0)
+            np.testing.assert_allclose(ZeffList[statusList], scalarZeffList[statusList], rtol = 0.0, atol = tolerance)
+            assert np.all(ZeffList[~statusList] == -1.0)
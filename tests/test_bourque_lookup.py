@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+import duo.zeff.nist as nist
+import duo.zeff.bourque as bourque
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def MakeBourque(com, useLookupTable, useFloat32 = False):
+    bq = bourque.Bourque(com, useLookupTable = useLookupTable, useFloat32 = useFloat32)
+    bq.ParameterizeDualEnergyRatioAndZ(com.Ehigh, com.Elow)
+    return bq
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.fixture(scope = "module")
+def spline(com):
+    return MakeBourque(com, False)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.mark.parametrize("useFloat32", [False, True])
+def test_scalar_and_array_input(com, spline, useFloat32):
+    bq = MakeBourque(com, True, useFloat32)
+
+    imageHighKVP = np.linspace(-100.0, 1500.0, 12).reshape(3, 4)
+    imageLowKVP = imageHighKVP * 1.2
+    imageHighKVPCopy = imageHighKVP.copy()
+    imageLowKVPCopy = imageLowKVP.copy()
+
+    imageZeff = bq.CalculateGivenCTNumber(imageHighKVP, imageLowKVP)
+    assert imageZeff.shape == imageHighKVP.shape
+    assert imageZeff.dtype == bq.lookupDtype
+
+    # the images of the caller are left untouched
+    assert np.array_equal(imageHighKVP, imageHighKVPCopy)
+    assert np.array_equal(imageLowKVP, imageLowKVPCopy)
+
+    Zeff = bq.CalculateGivenCTNumber(imageHighKVP[1, 2], imageLowKVP[1, 2])
+    assert np.ndim(Zeff) == 0
+    assert Zeff == imageZeff[1, 2]
+
+    Zeff = bq.Calculate(0.2, 0.25)
+    assert np.ndim(Zeff) == 0
+    assert Zeff == pytest.approx(float(spline.Calculate(0.2, 0.25)), abs = bq.lookupTableMaxError)
+
+    derList = np.array([1.0, 1.2, 1.5])
+    bq.LookupZeff(derList)
+    assert np.array_equal(derList, [1.0, 1.2, 1.5])
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_verify_model(com):
+    water = nist.Nist(com).SearchMaterialFromNist("Water")
+    com.VerifyModel(water, MakeBourque(com, True))
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.mark.parametrize("useFloat32", [False, True])
+def test_error_bound(com, spline, useFloat32):
+    bq = MakeBourque(com, True, useFloat32)
+
+    # the bound does not cover pixels near air, see BuildLookupTable
+    imageHighKVP = np.linspace(-500.0, 3000.0, 20001)
+    imageLowKVP = imageHighKVP * 1.1
+
+    imageZeff = bq.CalculateGivenCTNumber(imageHighKVP, imageLowKVP)
+    imageZeffSpline = spline.CalculateGivenCTNumber(imageHighKVP, imageLowKVP)
+
+    assert np.amax(np.abs(imageZeff - imageZeffSpline)) <= bq.lookupTableMaxError
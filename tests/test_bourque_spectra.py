@@ -0,0 +1,84 @@
+import numpy as np
+import numpy.polynomial.polynomial as poly
+import pytest
+import duo.zeff.bourque as bourque
+import duo.spectrum.spectrum as spectrum
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def ImportSpectrum(dataPath, fileName):
+    spectrumManager = spectrum.SpectrumManager(dataPath)
+    spectrumManager.ImportSpectrum(fileName)
+    return spectrumManager
+
+#------------------------------------------------------------
+# spectrum made of a single bin at energy
+#------------------------------------------------------------
+def CreateMonochromaticSpectrum(dataPath, energy):
+    spectrumManager = spectrum.SpectrumManager(dataPath)
+    spectrumManager.energyList = np.array([energy])
+    spectrumManager.intensityList = np.array([1.0])
+    return spectrumManager
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.fixture(scope = "module")
+def spectrumPair(dataPath):
+    return ImportSpectrum(dataPath, "80kVp.txt"), ImportSpectrum(dataPath, "140kVp.txt")
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_spectra_match_per_Z_loop(com, spectrumPair):
+    bq = bourque.Bourque(com)
+    bq.ParameterizeDualEnergyRatioAndZWithSpectra(*spectrumPair)
+
+    assert bq.Elow == pytest.approx(bq.lowEngine.GetEffectiveEnergy())
+    assert bq.Ehigh == pytest.approx(bq.highEngine.GetEffectiveEnergy())
+    assert bq.waterMacRatio == pytest.approx(bq.highEngine.muWater / bq.lowEngine.muWater)
+
+    ZList = np.arange(1, 36 + 1)
+    derList = []
+    for Z in ZList:
+        exs_low = bq.lowEngine.CalculateEffectiveMicroXS([Z])[0] / Z
+        exs_high = bq.highEngine.CalculateEffectiveMicroXS([Z])[0] / Z
+        derList.append(exs_low / exs_high * bq.waterMacRatio)
+    derList = np.array(derList)
+
+    assert bq.derMin == pytest.approx(np.amin(derList), rel = 1e-12)
+    assert bq.derMax == pytest.approx(np.amax(derList), rel = 1e-12)
+
+    # the spline interpolates Z(DER), the polynomial fits DER(Z)
+    np.testing.assert_allclose(bq.bs(derList), ZList, atol = 1e-8)
+    np.testing.assert_allclose(poly.polyval(ZList, bq.dList), derList, rtol = 1e-2)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_monochromatic_limit(com, dataPath):
+    mono = bourque.Bourque(com)
+    mono.ParameterizeDualEnergyRatioAndZ(com.Ehigh, com.Elow)
+
+    bq = bourque.Bourque(com)
+    bq.ParameterizeDualEnergyRatioAndZWithSpectra(CreateMonochromaticSpectrum(dataPath, com.Elow),
+                                                  CreateMonochromaticSpectrum(dataPath, com.Ehigh))
+
+    assert bq.Elow == com.Elow
+    assert bq.Ehigh == com.Ehigh
+    assert bq.waterMacRatio == pytest.approx(mono.waterMacRatio, rel = 1e-14)
+    assert bq.derMin == pytest.approx(mono.derMin, rel = 1e-12)
+    assert bq.derMax == pytest.approx(mono.derMax, rel = 1e-12)
+    np.testing.assert_allclose(bq.dList, mono.dList, rtol = 1e-8, atol = 1e-12)
+    np.testing.assert_allclose(bq.GetWaterAndAir(), mono.GetWaterAndAir(), rtol = 1e-14)
+
+    derList = np.linspace(mono.derMin, mono.derMax, 101)
+    np.testing.assert_allclose(bq.bs(derList), mono.bs(derList), atol = 1e-8)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_monochromatic_after_spectra(com, spectrumPair):
+    bq = bourque.Bourque(com)
+    bq.ParameterizeDualEnergyRatioAndZWithSpectra(*spectrumPair)
+    assert bq.GetWaterAndAir()[0] != com.muWater_Ehigh
+
+    bq.ParameterizeDualEnergyRatioAndZ(com.Ehigh, com.Elow)
+
+    assert bq.GetWaterAndAir() == (com.muWater_Ehigh, com.muAir_Ehigh, com.muWater_Elow, com.muAir_Elow)
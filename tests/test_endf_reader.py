@@ -0,0 +1,75 @@
+import os
+import shutil
+import numpy as np
+import pytest
+import duo.core.duo_exception as de
+import duo.core.element as duoelement
+import duo.core.element_table as element_table
+import duo.nuclear_data.endf_reader as endf_reader
+
+hydrogenFileName = "photoat-001_H_000.endf"
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_endfb_matches_gnd(dataPath):
+    ZList = [1, 6, 8, 20, 53, 82]
+    energyList = np.array([10.0, 30.0, 60.0, 80.0, 100.0, 140.0])
+
+    gndTable = element_table.ElementTable(dataPath, useCache = False, lazy = True, xsSource = "gnd")
+    endfbTable = element_table.ElementTable(dataPath, useCache = False, lazy = True, xsSource = "endfb")
+
+    for category in ["total"] + duoelement.Element.reactionCategoryList:
+        gndXSList = gndTable.CalculateMicroXSAtEnergies(category, energyList, ZList)
+        endfbXSList = endfbTable.CalculateMicroXSAtEnergies(category, energyList, ZList)
+        np.testing.assert_allclose(endfbXSList, gndXSList, rtol = 1e-12)
+
+    for Z in ZList:
+        assert endfbTable.GetElementByZ(Z).AWR == gndTable.GetElementByZ(Z).AWR
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_read_head(dataPath):
+    filePath = os.path.join(dataPath, "photoatomic_endfb", hydrogenFileName)
+
+    reader = endf_reader.EndfReader(filePath)
+    ZA, AWR = reader.ReadHead()
+    assert ZA == 1000.0
+
+    reader.BuildIndex()
+    assert reader.ReadHead() == (ZA, AWR)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_read_head_missing(dataPath, tmp_path):
+    filePath = os.path.join(dataPath, "photoatomic_endfb", hydrogenFileName)
+    with open(filePath, "r") as infile:
+        tapeId = infile.readline()
+
+    emptyPath = tmp_path / "empty.endf"
+    emptyPath.write_text(tapeId)
+
+    with pytest.raises(de.DuoException):
+        endf_reader.EndfReader(str(emptyPath)).ReadHead()
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_index_rebuilt_when_mtime_changes(dataPath, tmp_path):
+    dirPath = tmp_path / "photoatomic_endfb"
+    dirPath.mkdir()
+    shutil.copy(os.path.join(dataPath, "photoatomic_endfb", hydrogenFileName), dirPath)
+
+    libraryIndex = endf_reader.EndfLibraryIndex(str(dirPath))
+    sectionList = libraryIndex.GetReader(hydrogenFileName).GetSectionList()
+    libraryIndex.OutputIndex()
+    assert os.path.isfile(libraryIndex.indexPath)
+
+    libraryIndex = endf_reader.EndfLibraryIndex(str(dirPath))
+    assert sorted(libraryIndex.GetSectionIndex(hydrogenFileName).keys()) == sectionList
+
+    filePath = dirPath / hydrogenFileName
+    stat = os.stat(filePath)
+    os.utime(filePath, ns = (stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert libraryIndex.GetSectionIndex(hydrogenFileName) is None
+    assert libraryIndex.GetReader(hydrogenFileName).GetSectionList() == sectionList
+    assert libraryIndex.isModified
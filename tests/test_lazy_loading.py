@@ -0,0 +1,55 @@
+import numpy as np
+import duo.core.element as duoelement
+import duo.core.element_table as element_table
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_lazy_matches_eager(subsetDataPath):
+    eagerTable = element_table.ElementTable(subsetDataPath, useCache = False)
+    lazyTable = element_table.ElementTable(subsetDataPath, useCache = False, lazy = True)
+
+    assert lazyTable.lazy
+    assert len(lazyTable.elementList) == 3
+    assert 8 in lazyTable.elementList
+    assert 2 not in lazyTable.elementList
+
+    # a single lookup loads a single element
+    element = lazyTable.GetElementByZ(8)
+    assert lazyTable.elementList.IsLoaded(8)
+    assert not lazyTable.elementList.IsLoaded(1)
+    assert element.AWR == eagerTable.GetElementByZ(8).AWR
+
+    energyList = np.array([10.0, 40.0, 80.0, 120.0])
+    for category in ["total"] + duoelement.Element.reactionCategoryList:
+        np.testing.assert_array_equal(lazyTable.CalculateMicroXSAtEnergies(category, energyList, [1, 6, 8]),
+                                      eagerTable.CalculateMicroXSAtEnergies(category, energyList, [1, 6, 8]))
+
+    # iteration loads everything, in increasing Z
+    assert list(lazyTable.elementList.keys()) == list(eagerTable.elementList.keys()) == [1, 6, 8]
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_load_elements(subsetDataPath):
+    lazyTable = element_table.ElementTable(subsetDataPath, useCache = False, lazy = True)
+
+    lazyTable.LoadElements([1, 6])
+    assert lazyTable.elementList.IsLoaded(1)
+    assert lazyTable.elementList.IsLoaded(6)
+    assert not lazyTable.elementList.IsLoaded(8)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_get(subsetDataPath):
+    eagerTable = element_table.ElementTable(subsetDataPath, useCache = False)
+    lazyTable = element_table.ElementTable(subsetDataPath, useCache = False, lazy = True)
+
+    element = lazyTable.elementList.get(6)
+    assert element is not None
+    assert element.AWR == eagerTable.elementList.get(6).AWR
+    assert lazyTable.elementList.IsLoaded(6)
+    assert not lazyTable.elementList.IsLoaded(8)
+
+    # elements missing from the libraries
+    assert lazyTable.elementList.get(2) is None
+    assert lazyTable.elementList.get(2, "missing") == "missing"
+    assert eagerTable.elementList.get(2) is None
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+import duo.core.material_batch as material_batch
+import duo.zeff.nist as nist
+import duo.zeff.zeff_calculator as zeff_calculator
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.fixture(scope = "module")
+def materialList(com):
+    nistMaterialList = nist.Nist(com).materialList
+    return [nistMaterialList[idx] for idx in [0, 5, 11, 23, 40]]
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.fixture(scope = "module")
+def batch(com, materialList):
+    return material_batch.MaterialBatch.FromMaterialList(com.elementTable, materialList)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.mark.parametrize("energy", [30.0, 51.93, np.array([20.0, 60.0, 89.0]), np.array([[40.0, 70.0], [100.0, 140.0]])])
+def test_batch_matches_material(com, materialList, batch, energy):
+    energyList = np.asarray(energy)
+    shape = (len(materialList),) + energyList.shape
+
+    result = {"mac" : batch.CalculateMacAtE(energy),
+              "mu" : batch.CalculateMuAtE(energy),
+              "CTNumber" : batch.CalculateCTNumberAtE(energy, com.muWater_Elow, com.muAir_Elow),
+              "Zeff" : batch.CalculateZeffAtE(energy),
+              "electronXS" : batch.CalculateElectronXSAtE(energy),
+              "totalXS" : batch.CalculateTotalMicroXSAtEPerAtom(energy)}
+
+    for key, value in result.items():
+        assert value.shape == shape, key
+
+    for idx, mat in enumerate(materialList):
+        for energyIdx in np.ndindex(energyList.shape):
+            E = float(energyList[energyIdx])
+            mac = mat.CalculateMacAtE(E)
+
+            assert result["mac"][(idx,) + energyIdx] == pytest.approx(mac, rel = 1e-12)
+            assert result["mu"][(idx,) + energyIdx] == pytest.approx(mac * mat.density, rel = 1e-12)
+            assert result["CTNumber"][(idx,) + energyIdx] == pytest.approx(
+                com.ConvertMuToCTNumber(mac * mat.density, com.muWater_Elow, com.muAir_Elow), rel = 1e-10, abs = 1e-9)
+            assert result["Zeff"][(idx,) + energyIdx] == pytest.approx(mat.CalculateZeffAtE(E), rel = 1e-12)
+            assert result["electronXS"][(idx,) + energyIdx] == pytest.approx(mat.CalculateElectronXSAtE(E), rel = 1e-12)
+            assert result["totalXS"][(idx,) + energyIdx] == pytest.approx(mat.CalculateTotalMicroXSAtEPerAtom(E), rel = 1e-12)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_dual_energy(com, materialList, batch):
+    batch.CalculateDualEnergy(com)
+
+    for idx, mat in enumerate(materialList):
+        zc = zeff_calculator.ZeffCalculator(com, mat, method = "direct")
+        zc.Calculate()
+
+        assert batch.mu_Ehigh[idx] == pytest.approx(zc.mu_Ehigh, rel = 1e-12)
+        assert batch.mu_Elow[idx] == pytest.approx(zc.mu_Elow, rel = 1e-12)
+        assert batch.CTNumber_Ehigh[idx] == pytest.approx(zc.CTNumber_Ehigh, rel = 1e-10, abs = 1e-9)
+        assert batch.CTNumber_Elow[idx] == pytest.approx(zc.CTNumber_Elow, rel = 1e-10, abs = 1e-9)
+        assert batch.Z_Ehigh[idx] == pytest.approx(zc.Z_Ehigh, rel = 1e-12)
+        assert batch.Z_Elow[idx] == pytest.approx(zc.Z_Elow, rel = 1e-12)
+        assert batch.ZeffAve[idx] == pytest.approx(zc.ZeffAve, rel = 1e-12)
+        assert batch.electronXS_Ehigh[idx] == pytest.approx(mat.CalculateElectronXSAtE(com.Ehigh), rel = 1e-12)
+        assert batch.electronXS_Elow[idx] == pytest.approx(mat.CalculateElectronXSAtE(com.Elow), rel = 1e-12)
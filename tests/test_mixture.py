@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+import duo.core.material as material
+import duo.core.mixture as mixture
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.fixture(scope = "module")
+def baseMaterialList(com):
+    water = material.Material("Water", com.elementTable)
+    water.AddElement(1 , weightFraction =  0.111894)
+    water.AddElement(8 , weightFraction =  0.888106)
+    water.Commit()
+    water.density = 1.0
+
+    iodine = material.Material("Iodine", com.elementTable)
+    iodine.AddElement(53, weightFraction = 1.0)
+    iodine.Commit()
+    iodine.density = 4.93
+
+    bone = material.Material("Bone", com.elementTable)
+    bone.AddElement(1 , weightFraction = 0.034)
+    bone.AddElement(6 , weightFraction = 0.155)
+    bone.AddElement(8 , weightFraction = 0.435)
+    bone.AddElement(20, weightFraction = 0.376)
+    bone.Commit()
+    bone.density = 1.92
+
+    return [water, iodine, bone]
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def BuildMixtureByHand(com, baseMaterialList, fractionList, useMaterialWeightFraction):
+    mix = mixture.Mixture("Mixture", com.elementTable)
+    for mat, fraction in zip(baseMaterialList, fractionList):
+        if fraction <= 0.0:
+            continue
+        if useMaterialWeightFraction:
+            mix.AddMaterial(mat, materialWeightFraction = fraction)
+        else:
+            mix.AddMaterial(mat, materiaMolarFraction = fraction)
+    mix.Commit()
+    mix.CalculateMixtureDensity()
+
+    return mix
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.mark.parametrize("useMaterialWeightFraction", [True, False])
+@pytest.mark.parametrize("numBase", [2, 3])
+def test_family_matches_mixture(com, baseMaterialList, useMaterialWeightFraction, numBase):
+    baseMaterialList = baseMaterialList[:numBase]
+    if numBase == 2:
+        fractionList = np.array([[0.9, 0.1], [0.5, 0.5], [1.0, 0.0]])
+    else:
+        fractionList = np.array([[0.8, 0.05, 0.15], [0.2, 0.3, 0.5], [0.0, 0.4, 0.6]])
+
+    family = mixture.MixtureFamily(baseMaterialList, fractionList, useMaterialWeightFraction)
+    energyList = np.array([30.0, com.Elow, com.Ehigh])
+
+    for index, fraction in enumerate(fractionList):
+        mix = BuildMixtureByHand(com, baseMaterialList, fraction, useMaterialWeightFraction)
+        builtMix = family.BuildMixture(index, "Built")
+
+        assert family.densityList[index] == pytest.approx(mix.density, rel = 1e-12)
+        assert builtMix.density == pytest.approx(mix.density, rel = 1e-12)
+
+        for energy in energyList:
+            mac = mix.CalculateMacAtE(energy)
+            assert family.CalculateMacAtE(energy)[index] == pytest.approx(mac, rel = 1e-12)
+            assert builtMix.CalculateMacAtE(energy) == pytest.approx(mac, rel = 1e-12)
+            assert family.CalculateMuAtE(energy)[index] == pytest.approx(mac * mix.density, rel = 1e-12)
+            assert family.CalculateZeffAtE(energy)[index] == pytest.approx(mix.CalculateZeffAtE(energy), rel = 1e-12)
+
+        np.testing.assert_allclose(family.CalculateMacAtE(energyList)[index],
+                                   [mix.CalculateMacAtE(energy) for energy in energyList], rtol = 1e-12)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_molar_density(com, baseMaterialList):
+    family = mixture.MixtureFamily(baseMaterialList[:2], [0.9], useMaterialWeightFraction = False)
+
+    assert family.BuildMixture(0, "Built").density == pytest.approx(family.densityList[0], rel = 1e-12)
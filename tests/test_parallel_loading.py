@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+import duo.core.element_table as element_table
+import duo.nuclear_data.photoatomic.photoatomic_xs_io as xs
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.mark.parametrize("xsSource", ["gnd", "endfb"])
+def test_process_pool_matches_serial(subsetDataPath, xsSource, monkeypatch):
+    serialTable = element_table.ElementTable(subsetDataPath, useCache = False, xsSource = xsSource)
+
+    # record the pools actually created
+    workerCountList = []
+    ProcessPoolExecutor = xs.concurrent.futures.ProcessPoolExecutor
+    def CreatePool(max_workers):
+        workerCountList.append(max_workers)
+        return ProcessPoolExecutor(max_workers = max_workers)
+    monkeypatch.setattr(xs.concurrent.futures, "ProcessPoolExecutor", CreatePool)
+
+    parallelTable = element_table.ElementTable(subsetDataPath, useCache = False, numProcesses = 2, xsSource = xsSource)
+
+    # AWR, then cross-sections
+    assert workerCountList == [2, 2]
+
+    assert list(parallelTable.elementList.keys()) == list(serialTable.elementList.keys()) == [1, 6, 8]
+
+    for Z, element in serialTable.elementList.items():
+        parallelElement = parallelTable.GetElementByZ(Z)
+
+        assert parallelElement.AWR == element.AWR
+        assert parallelElement.A == element.A
+        assert parallelElement.symbol == element.symbol
+        assert list(parallelElement.xsTable.keys()) == list(element.xsTable.keys())
+
+        for key, value in element.xsTable.items():
+            assert np.array_equal(parallelElement.xsTable[key].energy, value.energy)
+            assert np.array_equal(parallelElement.xsTable[key].microXS, value.microXS)
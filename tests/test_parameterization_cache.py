@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+import duo.core.duo_exception as de
+import duo.zeff.parameterization_cache as parameterization_cache
+import duo.zeff.bourque_coeff_calculator as bourque_coeff_calculator
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+class FakeElementTable:
+    def __init__(self, checksum):
+        self.checksum = checksum
+        self.parameterizationCache = None
+
+    def GetDataChecksum(self):
+        return self.checksum
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+class FakeCalculator:
+    def __init__(self, elementTable):
+        self.elementTable = elementTable
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_key():
+    calculator = FakeCalculator(FakeElementTable("gnd|0"))
+    MakeKey = parameterization_cache.ParameterizationCache.MakeKey
+
+    assert MakeKey(calculator, 60.0, np.arange(1, 4)) == MakeKey(calculator, 60, [1, 2, 3])
+
+    # same endpoints, different Z
+    assert MakeKey(calculator, 60.0, [1, 2, 3]) != MakeKey(calculator, 60.0, [1, 3])
+    assert MakeKey(calculator, 60.0, [1, 2, 3]) != MakeKey(calculator, 60.0 + 1e-12, [1, 2, 3])
+    assert MakeKey(calculator, 60.0, [1, 2, 3]) != MakeKey(FakeCalculator(FakeElementTable("gnd|1")), 60.0, [1, 2, 3])
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_lru():
+    cache = parameterization_cache.ParameterizationCache(maxSize = 2)
+
+    for key in ["a", "b", "c"]:
+        cache.Set(key, parameterization_cache.Parameterization(name = key))
+    assert cache.Get("a") is None
+    assert cache.Get("b").name == "b"
+
+    # "b" is now the most recent
+    cache.Set("d", parameterization_cache.Parameterization(name = "d"))
+    assert cache.Get("c") is None
+    assert cache.Get("b") is not None
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_parameterization_is_immutable():
+    param = parameterization_cache.Parameterization(coeffList = [1.0, 2.0])
+
+    with pytest.raises(de.DuoException):
+        param.coeffList = [3.0]
+    with pytest.raises(ValueError):
+        param.coeffList[0] = 3.0
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_disk_tier(tmp_path):
+    param = parameterization_cache.Parameterization(coeffList = np.array([0.1, 1.0 / 3.0]), degree = 1)
+
+    cache = parameterization_cache.ParameterizationCache()
+    cache.EnableDiskTier(str(tmp_path / "cache.sqlite"))
+    cache.Set("key", param)
+
+    cache = parameterization_cache.ParameterizationCache()
+    cache.EnableDiskTier(str(tmp_path / "cache.sqlite"))
+    result = cache.Get("key")
+    assert result.degree == 1
+    assert np.array_equal(result.coeffList, param.coeffList)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_cache_per_element_table(com):
+    elementTable = FakeElementTable("gnd|0")
+    cache = parameterization_cache.GetCache(elementTable)
+    assert parameterization_cache.GetCache(elementTable) is cache
+    assert parameterization_cache.GetCache(FakeElementTable("gnd|0")) is not cache
+
+    # calculators on the same element table share their fits
+    calculator = bourque_coeff_calculator.BSplineBourqueCoeffCalculator(com.elementTable)
+    param = calculator.ParameterizeAtE(60.0)
+    assert bourque_coeff_calculator.BSplineBourqueCoeffCalculator(com.elementTable).ParameterizeAtE(60.0) is param
+    assert com.elementTable.parameterizationCache is parameterization_cache.GetCache(com.elementTable)
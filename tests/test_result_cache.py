@@ -0,0 +1,111 @@
+import itertools
+import pytest
+import duo.core.result_cache as result_cache
+import duo.zeff.common as common
+import duo.zeff.nist as nist
+import duo.zeff.zeff_calculator as zeff_calculator
+
+#------------------------------------------------------------
+# strictly increasing access times, so that the LRU order does not depend on the clock resolution
+#------------------------------------------------------------
+@pytest.fixture
+def clock(monkeypatch):
+    counter = itertools.count(1.0)
+    monkeypatch.setattr(result_cache.time, "time", lambda: next(counter))
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_round_trip(tmp_path):
+    cache = result_cache.ResultCache(str(tmp_path / "cache.sqlite"))
+
+    assert cache.Get("key") is None
+
+    value = {"Z" : 7.217281938271, "mac" : 0.2, "list" : [1, 2.5]}
+    cache.Set("key", value)
+    assert cache.Get("key") == value
+
+    cache.Set("key", {"Z" : 1.0})
+    assert cache.Get("key") == {"Z" : 1.0}
+
+    cache.Clear()
+    assert cache.Get("key") is None
+    assert cache.GetSize() == 0
+
+    cache.Close()
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_key():
+    MakeKey = result_cache.ResultCache.MakeKey
+
+    assert MakeKey("hash", 60.0, "bourque-bspline") == MakeKey("hash", 60, "bourque-bspline")
+    assert MakeKey("hash", 60.0, "bourque-bspline") != MakeKey("hash", 60.0, "taylor-original")
+    assert MakeKey("hash", 60.0, "bourque-bspline") != MakeKey("other", 60.0, "bourque-bspline")
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_lru_eviction(tmp_path, clock):
+    value = {"data" : "x" * 100}
+    entrySize = len(result_cache.json.dumps(value))
+    cache = result_cache.ResultCache(str(tmp_path / "cache.sqlite"), maxSize = 3 * entrySize)
+
+    for key in ["a", "b", "c"]:
+        cache.Set(key, value)
+    assert cache.GetSize() == 3 * entrySize
+
+    # "a" becomes the most recently used, so "b" is evicted first
+    assert cache.Get("a") == value
+    cache.Set("d", value)
+    assert cache.Get("b") is None
+    assert [cache.Get(key) is not None for key in ["a", "c", "d"]] == [True, True, True]
+
+    # "a", "c", "d" have just been read in that order
+    cache.Set("e", value)
+    assert cache.Get("a") is None
+    assert cache.GetSize() == 3 * entrySize
+
+    cache.Close()
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_persistence(tmp_path):
+    cachePath = str(tmp_path / "cache.sqlite")
+
+    cache = result_cache.ResultCache(cachePath)
+    cache.Set("key", {"Z" : 7.5})
+    cache.Close()
+
+    cache = result_cache.ResultCache(cachePath)
+    assert cache.Get("key") == {"Z" : 7.5}
+    cache.Close()
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def FailOnRootFinding(self, energy, label):
+    raise AssertionError("root finding on a warm cache")
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_zeff_calculator_warm_hit(dataPath, tmp_path, monkeypatch):
+    cachePath = str(tmp_path / "zeff_result_cache.sqlite")
+
+    with common.Common(dataPath, useResultCache = True, resultCachePath = cachePath) as com:
+        mat = nist.Nist(com).SearchMaterialFromNist("Water")
+
+        zc = zeff_calculator.ZeffCalculator(com, mat)
+        zc.Calculate()
+        coldResult = (zc.Z_Ehigh, zc.mu_Ehigh, zc.CTNumber_Ehigh, zc.Z_Elow, zc.mu_Elow, zc.CTNumber_Elow)
+
+    assert com.resultCache is None
+
+    # a new process would open the same database
+    with common.Common(dataPath, useResultCache = True, resultCachePath = cachePath) as com:
+        mat = nist.Nist(com).SearchMaterialFromNist("Water")
+
+        monkeypatch.setattr(zeff_calculator.ZeffCalculator, "CalculateZAtE", FailOnRootFinding)
+
+        zc = zeff_calculator.ZeffCalculator(com, mat)
+        zc.Calculate()
+        warmResult = (zc.Z_Ehigh, zc.mu_Ehigh, zc.CTNumber_Ehigh, zc.Z_Elow, zc.mu_Elow, zc.CTNumber_Elow)
+
+    assert warmResult == coldResult
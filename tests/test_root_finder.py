@@ -0,0 +1,47 @@
+import numpy as np
+import numpy.polynomial.polynomial as polynomial
+import duo.zeff.root_finder as root_finder
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_polynomial_roots_batch():
+    coeffList = [0.5, -1.0, 0.25, 0.1]
+    targetList = np.array([-2.0, 0.0, 0.3, 4.0])
+
+    rootList = root_finder.CalculatePolynomialRootsBatch(polynomial.polycompanion, coeffList, targetList)
+
+    for target, roots in zip(targetList, rootList):
+        expectedRoots = polynomial.polyroots(np.array(coeffList) - [target, 0.0, 0.0, 0.0])
+        np.testing.assert_allclose(np.sort_complex(roots), np.sort_complex(expectedRoots), atol = 1e-10)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_select_roots():
+    rootList = np.array([[3.0, 1.0 + 1.0j, 2.0], [-1.0, 0.0, 150.0], [5.0, 120.0, 1.0 - 1.0j]])
+
+    ZList, statusList = root_finder.SelectRoots(rootList, upperBound = 100.0)
+
+    np.testing.assert_array_equal(ZList, [2.0, -1.0, 5.0])
+    np.testing.assert_array_equal(statusList, [True, False, True])
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_inverse_table_smallest_root():
+    # decreasing on [0, 2], increasing on [2, 5]
+    table = root_finder.InverseTable(lambda Z: (Z - 2.0) ** 2, 0.0, 5.0, step = 1e-2)
+
+    assert len(table.nonMonotoneRegionList) == 1
+
+    targetList = np.array([1.0, 2.25, 9.0, 4.0, -1.0, 10.0])
+    np.testing.assert_array_equal(table.CountCrossing(targetList), [2, 2, 1, 2, 0, 0])
+
+    ZList, statusList = table.FindRoot(targetList, refine = True)
+    np.testing.assert_array_equal(statusList, [True, True, True, True, False, False])
+    np.testing.assert_allclose(ZList[statusList], [1.0, 0.5, 5.0, 0.0], atol = 1e-12)
+    np.testing.assert_array_equal(ZList[~statusList], [-1.0, -1.0])
+
+    ZList, statusList = table.FindRoot(targetList)
+    np.testing.assert_allclose(ZList[statusList], [1.0, 0.5, 5.0, 0.0], atol = 1e-4)
+
+    ZList, statusList = root_finder.FindRootInTable(table, targetList, upperBound = 4.0)
+    np.testing.assert_array_equal(statusList, [True, True, False, True, False, False])
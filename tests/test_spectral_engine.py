@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+import duo.core.duo_exception as de
+import duo.core.material_batch as material_batch
+import duo.spectrum.spectrum as spectrum
+import duo.zeff.nist as nist
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.fixture(scope = "module")
+def lowSpectrum(dataPath):
+    spectrumManager = spectrum.SpectrumManager(dataPath)
+    spectrumManager.ImportSpectrum("80kVp.txt")
+    return spectrumManager
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.fixture(scope = "module")
+def materialList(com):
+    nistMaterialList = nist.Nist(com).materialList
+    return [nistMaterialList[idx] for idx in [0, 5, 11, 23, 40]]
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_weighting(com, lowSpectrum):
+    energyList = np.asarray(lowSpectrum.energyList)
+    intensityList = np.asarray(lowSpectrum.intensityList)
+    mask = (intensityList > 0.0) & (energyList > 0.0)
+
+    fluenceEngine = lowSpectrum.CreateSpectralEngine(com.elementTable, ZList = [1, 8])
+    np.testing.assert_allclose(fluenceEngine.weightList, intensityList[mask] / np.sum(intensityList[mask]), rtol = 1e-12)
+    assert fluenceEngine.GetEffectiveEnergy() == pytest.approx(lowSpectrum.effectiveEnergy, rel = 1e-12)
+
+    energyFluenceEngine = lowSpectrum.CreateSpectralEngine(com.elementTable, weighting = "energyFluence", ZList = [1, 8])
+    weightList = (intensityList * energyList)[mask]
+    np.testing.assert_allclose(energyFluenceEngine.weightList, weightList / np.sum(weightList), rtol = 1e-12)
+
+    # high energy bins weigh more, so the beam looks harder
+    assert energyFluenceEngine.GetEffectiveEnergy() > fluenceEngine.GetEffectiveEnergy()
+    assert energyFluenceEngine.CalculateEffectiveMu(com.water) < fluenceEngine.CalculateEffectiveMu(com.water)
+
+    # a response of 1 / E turns the energy fluence back into the fluence
+    with np.errstate(divide = "ignore"):
+        responseList = np.where(energyList > 0.0, 1.0 / energyList, 0.0)
+    responseEngine = lowSpectrum.CreateSpectralEngine(com.elementTable, weighting = "energyFluence",
+                                                      detectorResponseList = responseList, ZList = [1, 8])
+    np.testing.assert_allclose(responseEngine.weightList, fluenceEngine.weightList, rtol = 1e-12)
+
+    with pytest.raises(de.DuoException):
+        lowSpectrum.CreateSpectralEngine(com.elementTable, weighting = "unknown")
+    with pytest.raises(de.DuoException):
+        lowSpectrum.CreateSpectralEngine(com.elementTable, detectorResponseList = responseList[:-1])
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.mark.parametrize("thickness", [None, 20.0])
+def test_monochromatic_limit(com, materialList, thickness):
+    engine = spectrum.SpectralEngine(com.elementTable, [com.Elow], [1.0])
+    engine.SetWaterAndAir(com.water, com.air, thickness)
+
+    assert engine.GetEffectiveEnergy() == com.Elow
+    assert engine.muWater == pytest.approx(com.muWater_Elow, rel = 1e-12)
+    assert engine.muAir == pytest.approx(com.muAir_Elow, rel = 1e-12)
+
+    for mat in materialList:
+        mu = mat.CalculateMacAtE(com.Elow) * mat.density
+        assert engine.CalculateEffectiveMac(mat) == pytest.approx(mat.CalculateMacAtE(com.Elow), rel = 1e-12)
+        assert engine.CalculateEffectiveMu(mat, thickness) == pytest.approx(mu, rel = 1e-12)
+        assert engine.CalculateCTNumber(mat, thickness) == pytest.approx(
+            com.ConvertMuToCTNumber(mu, com.muWater_Elow, com.muAir_Elow), rel = 1e-10, abs = 1e-8)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_beam_hardening(com, lowSpectrum):
+    engine = lowSpectrum.CreateSpectralEngine(com.elementTable)
+
+    muList = [engine.CalculateEffectiveMu(com.water, thickness) for thickness in [1e-6, 1.0, 5.0, 20.0]]
+
+    # a thin slab gives back the weighted mean, a thicker one transmits a harder beam
+    assert muList[0] == pytest.approx(engine.CalculateEffectiveMu(com.water), rel = 1e-6)
+    assert np.all(np.diff(muList) < 0.0)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.mark.parametrize("thickness", [None, 10.0])
+def test_batch_matches_material(com, lowSpectrum, materialList, thickness):
+    engine = lowSpectrum.CreateSpectralEngine(com.elementTable)
+    engine.SetWaterAndAir(com.water, com.air, thickness)
+
+    batch = material_batch.MaterialBatch.FromMaterialList(com.elementTable, materialList)
+
+    muList = engine.CalculateEffectiveMuOfBatch(batch, thickness)
+    CTNumberList = engine.CalculateCTNumberOfBatch(batch, thickness)
+
+    for idx, mat in enumerate(materialList):
+        assert muList[idx] == pytest.approx(engine.CalculateEffectiveMu(mat, thickness), rel = 1e-12)
+        assert CTNumberList[idx] == pytest.approx(engine.CalculateCTNumber(mat, thickness), rel = 1e-10, abs = 1e-8)
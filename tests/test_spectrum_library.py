@@ -0,0 +1,108 @@
+import os
+import shutil
+import numpy as np
+import pytest
+import duo.core.material_batch as material_batch
+import duo.spectrum.spectrum as spectrum
+import duo.spectrum.spectrum_library as spectrum_library
+import duo.zeff.nist as nist
+
+#------------------------------------------------------------
+# copy of the spectrum directory, so that caches are written to tmp_path
+#------------------------------------------------------------
+@pytest.fixture
+def spectrumDataPath(dataPath, tmp_path):
+    shutil.copytree(os.path.join(dataPath, "spectrum"), tmp_path / "spectrum")
+    return str(tmp_path)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def FailOnInputSpectra(self):
+    raise AssertionError("spectra parsed on a cache hit")
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.mark.parametrize("energyStep, tolerance", [(0.25, 1e-12), (0.5, 1e-12), (1.0, 1e-12), (2.0, 1e-2)])
+def test_resampling_keeps_photons(dataPath, energyStep, tolerance):
+    library = spectrum_library.SpectrumLibrary(dataPath, energyStep = energyStep, useCache = False)
+
+    assert library.nameList == ["140kVp", "80kVp"]
+    np.testing.assert_allclose(np.diff(library.energyList), energyStep)
+
+    for idx, name in enumerate(library.nameList):
+        energyList, intensityList, commentList = spectrum.ReadSpectrumFile(os.path.join(dataPath, "spectrum", name + ".txt"))
+
+        assert np.sum(library.intensityMatrix[idx, :]) == pytest.approx(np.sum(intensityList), rel = tolerance)
+        assert library.effectiveEnergyList[idx] == pytest.approx(np.sum(energyList * intensityList) / np.sum(intensityList), rel = 1e-14)
+
+        meanEnergy = np.dot(library.energyList, library.intensityMatrix[idx, :]) / np.sum(library.intensityMatrix[idx, :])
+        assert meanEnergy == pytest.approx(library.effectiveEnergyList[idx], rel = tolerance)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_cache_hit(spectrumDataPath, monkeypatch):
+    library = spectrum_library.SpectrumLibrary(spectrumDataPath, energyStep = 0.5)
+    assert os.path.isfile(library.cachePath)
+
+    monkeypatch.setattr(spectrum_library.SpectrumLibrary, "InputSpectra", FailOnInputSpectra)
+    cachedLibrary = spectrum_library.SpectrumLibrary(spectrumDataPath, energyStep = 0.5)
+
+    assert np.array_equal(cachedLibrary.energyList, library.energyList)
+    assert np.array_equal(cachedLibrary.intensityMatrix, library.intensityMatrix)
+    assert np.array_equal(cachedLibrary.effectiveEnergyList, library.effectiveEnergyList)
+    assert cachedLibrary.nameList == library.nameList
+    assert cachedLibrary.commentList == library.commentList
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_cache_stale(spectrumDataPath, monkeypatch):
+    library = spectrum_library.SpectrumLibrary(spectrumDataPath, energyStep = 0.5)
+
+    # another grid does not hit the cache of the first one
+    otherLibrary = spectrum_library.SpectrumLibrary(spectrumDataPath, energyStep = 1.0, useCache = False)
+    assert otherLibrary.cachePath == library.cachePath
+    assert not otherLibrary.InputCache()
+    assert np.array_equal(spectrum_library.SpectrumLibrary(spectrumDataPath, energyStep = 1.0).energyList, otherLibrary.energyList)
+
+    # back to the first grid
+    spectrum_library.SpectrumLibrary(spectrumDataPath, energyStep = 0.5)
+    assert spectrum_library.SpectrumLibrary(spectrumDataPath, energyStep = 0.5, useCache = False).InputCache()
+
+    # a touched spectrum file
+    filePath = os.path.join(spectrumDataPath, "spectrum", "80kVp.txt")
+    stat = os.stat(filePath)
+    os.utime(filePath, ns = (stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    otherLibrary = spectrum_library.SpectrumLibrary(spectrumDataPath, energyStep = 0.5, useCache = False)
+    assert not otherLibrary.InputCache()
+
+    # the stale cache is replaced, then hit again
+    spectrum_library.SpectrumLibrary(spectrumDataPath, energyStep = 0.5)
+    monkeypatch.setattr(spectrum_library.SpectrumLibrary, "InputSpectra", FailOnInputSpectra)
+    cachedLibrary = spectrum_library.SpectrumLibrary(spectrumDataPath, energyStep = 0.5)
+    assert np.array_equal(cachedLibrary.intensityMatrix, library.intensityMatrix)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.mark.parametrize("thickness", [None, 10.0])
+@pytest.mark.parametrize("weighting", ["fluence", "energyFluence"])
+def test_batch_matches_spectral_engine(com, dataPath, thickness, weighting):
+    library = spectrum_library.SpectrumLibrary(dataPath, useCache = False)
+
+    nistMaterialList = nist.Nist(com).materialList
+    materialList = [nistMaterialList[idx] for idx in [0, 5, 11, 23, 40]]
+    batch = material_batch.MaterialBatch.FromMaterialList(com.elementTable, materialList)
+
+    muList = library.CalculateEffectiveMuOfBatch(com.elementTable, batch, thickness, weighting)
+    CTNumberList = library.CalculateCTNumberOfBatch(com.elementTable, batch, com.water, com.air, thickness, weighting)
+    assert muList.shape == (len(materialList), len(library.nameList))
+
+    for idx, name in enumerate(library.nameList):
+        engine = library.CreateSpectralEngine(name, com.elementTable, weighting = weighting)
+        engine.SetWaterAndAir(com.water, com.air, thickness)
+
+        np.testing.assert_allclose(muList[:, idx], engine.CalculateEffectiveMuOfBatch(batch, thickness), rtol = 1e-12)
+        np.testing.assert_allclose(CTNumberList[:, idx], engine.CalculateCTNumberOfBatch(batch, thickness), rtol = 1e-10, atol = 1e-8)
+
+    np.testing.assert_allclose(library.CalculateEffectiveMuOfBatch(com.elementTable, batch, thickness, weighting, nameList = ["80kVp"])[:, 0],
+                               muList[:, library.GetIndex("80kVp")], rtol = 1e-14)
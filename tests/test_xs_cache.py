@@ -0,0 +1,49 @@
+import os
+import numpy as np
+import duo.core.element_table as element_table
+import duo.nuclear_data.photoatomic.photoatomic_xs_io as xs
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def MakeIOManager(dataPath):
+    return xs.PhotoAtomicXSIOManager(endfbDir = os.path.join(dataPath, "photoatomic_endfb"),
+                                     gndDir = os.path.join(dataPath, "photoatomic_gnd"))
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_cache_matches_libraries(subsetDataPath):
+    parsedTable = element_table.ElementTable(subsetDataPath)
+    cachePath = os.path.join(subsetDataPath, "photoatomic_xs_cache.npz")
+    assert os.path.isfile(cachePath)
+
+    mg = MakeIOManager(subsetDataPath)
+    assert mg.InputXSFromCache(cachePath)
+
+    assert sorted(mg.elementList.keys()) == [1, 6, 8]
+    for Z, element in mg.elementList.items():
+        parsedElement = parsedTable.GetElementByZ(Z)
+        assert element.AWR == parsedElement.AWR
+        assert element.symbol == parsedElement.symbol
+        assert sorted(element.xsTable.keys()) == sorted(parsedElement.xsTable.keys())
+        for key, value in element.xsTable.items():
+            assert np.array_equal(value.energy, parsedElement.xsTable[key].energy)
+            assert np.array_equal(value.microXS, parsedElement.xsTable[key].microXS)
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_cache_stale_when_mtime_changes(subsetDataPath):
+    element_table.ElementTable(subsetDataPath)
+    cachePath = os.path.join(subsetDataPath, "photoatomic_xs_cache.npz")
+
+    assert MakeIOManager(subsetDataPath).InputXSFromCache(cachePath)
+    assert not MakeIOManager(subsetDataPath).InputXSFromCache(cachePath, "endfb")
+
+    filePath = os.path.join(subsetDataPath, "photoatomic_gnd", "photoat-006_C_000.xml")
+    stat = os.stat(filePath)
+    os.utime(filePath, ns = (stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert not MakeIOManager(subsetDataPath).InputXSFromCache(cachePath)
+
+    # the stale cache is replaced on the next run
+    element_table.ElementTable(subsetDataPath)
+    assert MakeIOManager(subsetDataPath).InputXSFromCache(cachePath)
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+import duo.core.duo_exception as de
+import duo.core.element as duoelement
+import duo.core.element_table as element_table
+import duo.core.material as material
+
+categoryList = ["total"] + duoelement.Element.reactionCategoryList
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+@pytest.fixture
+def elementTable(subsetDataPath):
+    elementTable = element_table.ElementTable(subsetDataPath, useCache = False)
+    elementTable.BuildXSMatrix(startEnergy = 10.0, stopEnergy = 150.0, energyStep = 0.5)
+    return elementTable
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_exact_at_grid_energies(elementTable):
+    xsMatrix = elementTable.xsMatrix
+    assert xsMatrix.ZList.tolist() == [1, 6, 8]
+    assert len(xsMatrix.energyList) == 281
+    assert 60.0 in xsMatrix.energyList
+
+    for category in categoryList:
+        exactXSList = elementTable.CalculateMicroXSAtEnergies(category, xsMatrix.energyList, [1, 6, 8])
+        np.testing.assert_array_equal(xsMatrix.table[category], exactXSList)
+        np.testing.assert_array_equal(xsMatrix.CalculateMicroXSAtEnergies(category, xsMatrix.energyList), exactXSList)
+        np.testing.assert_array_equal(elementTable.CalculateMicroXSAtEnergies(category, xsMatrix.energyList, [1, 6, 8],
+                                                                              useXSMatrix = True), exactXSList)
+        np.testing.assert_array_equal(elementTable.CalculateMicroXSAtE(category, 60.0, [8, 1], useXSMatrix = True),
+                                      elementTable.CalculateMicroXSAtE(category, 60.0, [8, 1]))
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_error_between_grid_energies(elementTable):
+    # off the grids of both matrices below
+    energyList = elementTable.xsMatrix.energyList[:-1] + 0.2
+
+    # a step of 0.5 keV keeps every category within 1 % above 10 keV for H, C and O
+    for category in categoryList:
+        exactXSList = elementTable.CalculateMicroXSAtEnergies(category, energyList, [1, 6, 8])
+        xsList = elementTable.CalculateMicroXSAtEnergies(category, energyList, [1, 6, 8], useXSMatrix = True)
+        assert not np.array_equal(xsList, exactXSList) or category == "pp"
+        np.testing.assert_allclose(xsList, exactXSList, rtol = 1e-2, atol = 0.0)
+
+    # the error shrinks as the square of the step
+    fineElementTable = element_table.ElementTable(elementTable.dataPath, useCache = False)
+    fineElementTable.BuildXSMatrix(startEnergy = 10.0, stopEnergy = 150.0, energyStep = 0.125)
+    exactXSList = elementTable.CalculateMicroXSAtEnergies("total", energyList, [1, 6, 8])
+    error = np.amax(np.abs(elementTable.CalculateMicroXSAtEnergies("total", energyList, [1, 6, 8], useXSMatrix = True) / exactXSList - 1.0))
+    fineError = np.amax(np.abs(fineElementTable.CalculateMicroXSAtEnergies("total", energyList, [1, 6, 8], useXSMatrix = True) / exactXSList - 1.0))
+    assert fineError < error / 4.0
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_fallback_outside_matrix(subsetDataPath):
+    elementTable = element_table.ElementTable(subsetDataPath, useCache = False)
+    xsMatrix = elementTable.BuildXSMatrix(startEnergy = 10.0, stopEnergy = 150.0, energyStep = 0.5,
+                                          ZList = [1, 6], categoryList = ["total"])
+
+    # off-grid energy, where the matrix would not be exact
+    energyList = np.array([30.25, 60.25])
+    assert not np.array_equal(xsMatrix.CalculateMicroXSAtEnergies("total", energyList, [1, 6]),
+                              elementTable.CalculateMicroXSAtEnergies("total", energyList, [1, 6]))
+
+    for category, energy, ZList in [("total", energyList, [1, 8]),
+                                    ("total", np.array([5.25, 60.25]), [1, 6]),
+                                    ("total", np.array([60.25, 170.25]), [1, 6]),
+                                    ("pe", energyList, [1, 6])]:
+        assert not xsMatrix.IsCovering(category, ZList, energy)
+        np.testing.assert_array_equal(elementTable.CalculateMicroXSAtEnergies(category, energy, ZList, useXSMatrix = True),
+                                      elementTable.CalculateMicroXSAtEnergies(category, energy, ZList))
+
+    with pytest.raises(de.DuoException):
+        xsMatrix.CalculateMicroXSAtEnergies("total", [5.0], [1])
+    with pytest.raises(de.DuoException):
+        xsMatrix.CalculateMicroXSAtEnergies("total", [60.0], [8])
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_electron_xs(elementTable):
+    ZList = np.array([1, 6, 8])
+
+    for energy in [60.0, 60.25]:
+        xsList = elementTable.xsMatrix.CalculateMicroXSAtE("total", energy, ZList)
+        np.testing.assert_array_equal(elementTable.CalculateElectronXSAtE(energy, ZList, useXSMatrix = True), xsList / ZList)
+
+    np.testing.assert_array_equal(elementTable.CalculateElectronXSAtE(60.0, ZList, useXSMatrix = True),
+                                  elementTable.CalculateElectronXSAtE(60.0, ZList))
+
+#------------------------------------------------------------
+#------------------------------------------------------------
+def test_material_curve(elementTable):
+    water = material.Material("Water", elementTable)
+    water.AddElement(1 , weightFraction =  0.111894)
+    water.AddElement(8 , weightFraction =  0.888106)
+    water.Commit()
+
+    gridList = elementTable.xsMatrix.energyList
+    np.testing.assert_allclose(water.CalculateMacAtEnergies(gridList, useXSMatrix = True),
+                               water.CalculateMacAtEnergies(gridList), rtol = 1e-14)
+    np.testing.assert_allclose(water.CalculateZeffAtEnergies(gridList, useXSMatrix = True),
+                               water.CalculateZeffAtEnergies(gridList), rtol = 1e-14)
+
+    energyList = 0.5 * (gridList[:-1] + gridList[1:])
+    np.testing.assert_allclose(water.CalculateMacAtEnergies(energyList, useXSMatrix = True),
+                               water.CalculateMacAtEnergies(energyList), rtol = 1e-2)